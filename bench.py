@@ -0,0 +1,335 @@
+"""Замеры основных операций кинотеатра на синтетических базах разного размера.
+
+Для каждого размера (число билетов, от 10^3 до 10^7) datagen один раз
+создаёт базу в каталоге данных; замеры идут на её копии, поэтому покупки
+и новые сеансы не меняют исходную базу. Операции вызываются через
+services без Qt, каждая iterations раз со случайными аргументами; в отчёт
+попадают перцентили задержки p50/p95/p99 и пропускная способность.
+
+Результаты сравниваются с сохранёнными базовыми значениями: если p95
+операции вырос больше допуска, программа печатает регрессии и
+завершается с кодом 1.
+
+Пример:
+    python bench.py --sizes 1000,10000,100000 --save-baseline
+    python bench.py --sizes 1000,10000,100000
+    python bench.py --sizes 10000000 --iterations 1000
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import time
+
+import datagen
+import db
+import repository
+import scheduling
+import services
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DATA_DIR = 'bench-data'
+BASELINE_PATH = 'bench-baseline.json'
+ITERATIONS = 300
+WARMUP = 20
+# Регрессия: p95 вырос больше чем на TOLERANCE и больше чем на MIN_DELTA_MS
+TOLERANCE = 0.3
+MIN_DELTA_MS = 0.05
+PERCENTILES = (50, 95, 99)
+
+# Расписание баз начинается с фиксированной даты, замеры идут из его середины,
+# поэтому результаты не зависят от дня запуска
+START_DATE = datagen.START_DATE
+SAMPLE_SIZE = 1000
+
+# Сеансов в день на зал, которые datagen гарантированно помещает с 09:00 до 23:30
+SESSIONS_PER_HALL = 6
+# Вместимость расписания с запасом, чтобы распроданы были не все сеансы
+CAPACITY_HEADROOM = 1.5
+# Меняется вместе с dataset() и datagen: базы прежнего формата создаются заново
+DATASET_VERSION = 3
+
+
+class DatasetTooSmall(Exception):
+    """В сгенерированной базе меньше билетов, чем требует размер замера."""
+
+
+def dataset(rows):
+    """Параметры datagen для базы из rows билетов.
+
+    Залов столько, чтобы места всех сеансов с запасом CAPACITY_HEADROOM
+    вмещали rows покупок среднего размера.
+    """
+    days = min(max(rows // 1000, 14), 730)
+    seats = db.DEFAULT_HALL_ROWS * db.DEFAULT_SEATS_PER_ROW
+    sessions = math.ceil(rows * datagen.MEAN_QUANTITY * CAPACITY_HEADROOM / seats)
+    halls = max(10, math.ceil(sessions / days / SESSIONS_PER_HALL))
+    return {
+        'movies': min(max(rows // 200, 20), 2000),
+        'days': days,
+        'halls': halls,
+        'sessions_per_day': halls * SESSIONS_PER_HALL,
+        'tickets': rows,
+        'users': min(max(rows // 20, 20), 100_000),
+        'start_date': START_DATE,
+    }
+
+
+def prepare(rows, data_dir, seed):
+    """Путь к рабочей копии базы размера rows; исходная база создаётся при первом запуске."""
+    os.makedirs(data_dir, exist_ok=True)
+    template = os.path.join(data_dir, f'cinema-v{DATASET_VERSION}-{rows}-{seed}.db')
+    if not os.path.exists(template):
+        print(f"Генерация базы на {rows:,} билетов...", file=sys.stderr, flush=True)
+        partial = template + '.partial'
+        counts = datagen.generate_database(partial, seed=seed, overwrite=True, **dataset(rows))
+        if counts['tickets'] < rows:
+            os.remove(partial)
+            raise DatasetTooSmall(
+                f"datagen создал {counts['tickets']:,} билетов вместо {rows:,} "
+                f"({counts['schedules']:,} сеансов): расписанию не хватает мест")
+        os.replace(partial, template)
+    work = os.path.join(data_dir, f'work-{rows}.db')
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(work + suffix):
+            os.remove(work + suffix)
+    shutil.copyfile(template, work)
+    return work
+
+
+class Context:
+    """Случайные аргументы операций, выбранные из данных базы."""
+
+    def __init__(self, repo, rows, seed):
+        self.repo = repo
+        self.rng = random.Random(seed)
+        self.day_cache = repository.DayCache(repo)
+        params = dataset(rows)
+        middle = START_DATE + datetime.timedelta(days=params['days'] // 2)
+        self.now = (middle.isoformat(), '12:00:00')
+        self.dates = [(middle + datetime.timedelta(days=offset)).isoformat() for offset in range(7)]
+        # Залы в днях расписания заполнены datagen подряд: новые сеансы ставятся после него
+        last_day = START_DATE + datetime.timedelta(days=params['days'])
+        self.free_dates = [(last_day + datetime.timedelta(days=offset)).isoformat() for offset in range(30)]
+        conn = repo.manager.get()
+        self.users = conn.execute("SELECT MAX(id) FROM users").fetchone()[0]
+        self.movies = [row[0] for row in conn.execute(
+            "SELECT DISTINCT movie_id FROM schedules WHERE date = ?", (self.now[0],))]
+        self.halls = [row[0] for row in conn.execute(repository.HALL_IDS)]
+        self.schedules = [row[0] for row in conn.execute(
+            "SELECT id FROM schedules WHERE (date, time) >= (?, ?) ORDER BY date, time LIMIT ?",
+            (*self.now, SAMPLE_SIZE))]
+        self.buyers = [row[0] for row in conn.execute(
+            "SELECT DISTINCT tickets.user_id FROM tickets JOIN schedules ON schedules.id = tickets.schedule_id "
+            "WHERE schedules.date >= ? LIMIT ?", (self.now[0], SAMPLE_SIZE))] or [1]
+
+    def user(self):
+        return self.rng.randint(1, self.users)
+
+    def username(self):
+        # datagen создаёт admin (id 1) и user1 … user{users - 1}
+        return f'user{self.rng.randrange(1, self.users)}'
+
+    def pick(self, items):
+        return self.rng.choice(items)
+
+
+def _authenticate(ctx):
+    name = ctx.username()
+    return services.authenticate(ctx.repo, name, name)
+
+
+def _afisha(ctx):
+    return services.afisha(ctx.repo, ctx.rng.choice((0, repository.PAGE_SIZE)))
+
+
+def _afisha_day(ctx):
+    return services.afisha_on(ctx.day_cache, ctx.pick(ctx.dates), now=ctx.now)
+
+
+def _movie_details(ctx):
+    return services.movie_details(ctx.repo, ctx.pick(ctx.movies), ctx.now)
+
+
+def _sessions(ctx):
+    return services.sessions(ctx.repo, ctx.pick(ctx.movies), ctx.now)
+
+
+def _tickets(ctx):
+    return services.tickets(ctx.repo, ctx.pick(ctx.buyers), ctx.now)
+
+
+def _purchase(ctx):
+    return services.purchase(ctx.repo, ctx.user(), ctx.pick(ctx.schedules), ctx.rng.randint(1, 4))
+
+
+def _add_schedule(ctx):
+    minute = ctx.rng.randrange(datagen.DAY_START, datagen.LAST_START, 5)
+    return services.add_schedule(
+        ctx.repo, ctx.pick(ctx.movies), ctx.pick(ctx.free_dates), f'{minute // 60:02d}:{minute % 60:02d}',
+        ctx.pick(ctx.halls), 300)
+
+
+# Операции записи идут последними: новые сеансы сбрасывают DayCache
+OPERATIONS = {
+    'authenticate': _authenticate,
+    'afisha': _afisha,
+    'afisha_day': _afisha_day,
+    'movie_details': _movie_details,
+    'sessions': _sessions,
+    'tickets': _tickets,
+    'purchase': _purchase,
+    'add_schedule': _add_schedule,
+}
+
+# Ожидаемые отказы: аншлаг или занятый зал — тоже результат операции
+EXPECTED_ERRORS = (repository.BookingError, scheduling.ScheduleError)
+
+
+def percentile(ordered, p):
+    """Перцентиль p отсортированного списка по ближайшему рангу."""
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def measure(operation, ctx, iterations, warmup=WARMUP):
+    """Задержки операции: {'p50': мс, ..., 'ops': операций в секунду, 'rejected': отказов}."""
+    rejected = 0
+    for _ in range(warmup):
+        try:
+            operation(ctx)
+        except EXPECTED_ERRORS:
+            pass
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        try:
+            operation(ctx)
+        except EXPECTED_ERRORS:
+            rejected += 1
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    result = {f'p{p}': round(percentile(timings, p) * 1000, 4) for p in PERCENTILES}
+    result['ops'] = round(iterations / sum(timings), 1)
+    result['rejected'] = rejected
+    return result
+
+
+def run(rows, operations, iterations, data_dir, seed):
+    """Замеры операций на базе размера rows: {операция: результат measure}."""
+    work = prepare(rows, data_dir, seed)
+    manager = db.ConnectionManager(work)
+    try:
+        repo = repository.CinemaRepository(manager)
+        ctx = Context(repo, rows, seed)
+        return {name: measure(OPERATIONS[name], ctx, iterations) for name in operations}
+    finally:
+        manager.close_all()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(work + suffix):
+                os.remove(work + suffix)
+
+
+def compare(results, baseline, tolerance=TOLERANCE, min_delta=MIN_DELTA_MS):
+    """Регрессии относительно baseline: список строк с описанием."""
+    regressions = []
+    for size, operations in results.items():
+        for name, result in operations.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            limit = base['p95'] * (1 + tolerance)
+            if result['p95'] > limit and result['p95'] - base['p95'] > min_delta:
+                regressions.append(
+                    f"{name} на {int(size):,} билетов: p95 {result['p95']:.3f} мс, "
+                    f"было {base['p95']:.3f} мс (+{(result['p95'] / base['p95'] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_baseline(path, results):
+    """Записывает результаты как базовые; замеры других размеров в файле сохраняются."""
+    baseline = load_baseline(path)
+    baseline.update(results)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(baseline, file, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def print_table(size, operations):
+    print(f"\nБилетов: {size:,}")
+    print(f"{'операция':<14} {'p50, мс':>10} {'p95, мс':>10} {'p99, мс':>10} {'опер./с':>10} {'отказов':>8}")
+    for name, result in operations.items():
+        print(f"{name:<14} {result['p50']:>10.3f} {result['p95']:>10.3f} {result['p99']:>10.3f} "
+              f"{result['ops']:>10,.0f} {result['rejected']:>8}")
+
+
+def _sizes(text):
+    sizes = [int(float(part)) for part in text.split(',') if part.strip()]
+    if not sizes or any(size not in SIZES for size in sizes):
+        raise argparse.ArgumentTypeError(f"размеры из списка: {', '.join(str(size) for size in SIZES)}")
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры основных операций кинотеатра")
+    parser.add_argument('--sizes', type=_sizes, default=list(DEFAULT_SIZES),
+                        help="размеры баз через запятую, например 1e3,1e5 (от 1e3 до 1e7)")
+    parser.add_argument('--operations', default=','.join(OPERATIONS),
+                        help=f"операции через запятую: {', '.join(OPERATIONS)}")
+    parser.add_argument('--iterations', type=int, default=ITERATIONS, help="вызовов каждой операции")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="каталог сгенерированных баз")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="файл базовых значений")
+    parser.add_argument('--save-baseline', action='store_true', help="сохранить результаты как базовые")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="допустимый рост p95 (0.3 = 30%%)")
+    parser.add_argument('--output', help="записать результаты в JSON")
+    parser.add_argument('--seed', type=int, default=42, help="зерно генератора данных и аргументов")
+    args = parser.parse_args(argv)
+
+    operations = [name.strip() for name in args.operations.split(',') if name.strip()]
+    unknown = [name for name in operations if name not in OPERATIONS]
+    if unknown:
+        parser.error(f"неизвестные операции: {', '.join(unknown)}")
+
+    results = {}
+    for size in args.sizes:
+        try:
+            results[str(size)] = run(size, operations, args.iterations, args.data_dir, args.seed)
+        except DatasetTooSmall as e:
+            print(f"Размер {size:,}: {e}", file=sys.stderr)
+            return 1
+        print_table(size, results[str(size)])
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\nБазовые значения записаны в {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f"\nБазовых значений нет ({args.baseline}); сохраните их с --save-baseline", file=sys.stderr)
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nРЕГРЕССИИ ПРОИЗВОДИТЕЛЬНОСТИ:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    print("\nРегрессий нет")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,80 +1,17 @@
 import sys
 import sqlite3
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QPushButton, QListWidget, QLineEdit, QTextEdit, QDialog,
-    QFormLayout, QComboBox, QSpinBox, QCalendarWidget, QFileDialog, QInputDialog, QMessageBox
+    QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QPushButton, QListWidget, QListWidgetItem, QLineEdit,
+    QTextEdit, QDialog, QFormLayout, QComboBox, QSpinBox, QCalendarWidget, QFileDialog, QInputDialog, QMessageBox,
+    QTimeEdit
 )
-from PyQt6.QtGui import QPixmap
-from PyQt6.QtCore import Qt
-
-
-# База данных
-class CinemaDatabase:
-    def __init__(self, db_name="cinema.db"):
-        self.conn = sqlite3.connect(db_name)
-        self.create_tables()
-
-    def create_tables(self):
-        with self.conn:
-            self.conn.execute("""
-                CREATE TABLE IF NOT EXISTS movies (
-                    id INTEGER PRIMARY KEY,
-                    title TEXT NOT NULL,
-                    poster_path TEXT,
-                    trailer_url TEXT,
-                    duration INTEGER,
-                    show_date TEXT,
-                    price REAL,
-                    hall TEXT
-                )
-            """)
-            self.conn.execute("""
-                CREATE TABLE IF NOT EXISTS tickets (
-                    id INTEGER PRIMARY KEY,
-                    movie_id INTEGER,
-                    user_name TEXT NOT NULL,
-                    FOREIGN KEY(movie_id) REFERENCES movies(id)
-                )
-            """)
-
-    def add_movie(self, title, poster_path, trailer_url, duration, show_date, price, hall):
-        with self.conn:
-            self.conn.execute("""
-                INSERT INTO movies (title, poster_path, trailer_url, duration, show_date, price, hall)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (title, poster_path, trailer_url, duration, show_date, price, hall))
-
-    def get_movies(self):
-        with self.conn:
-            return self.conn.execute("SELECT * FROM movies").fetchall()
-
-    def delete_movie(self, movie_id):
-        with self.conn:
-            self.conn.execute("DELETE FROM movies WHERE id = ?", (movie_id,))
-
-    def update_movie(self, movie_id, title, poster_path, trailer_url, duration, show_date, price, hall):
-        with self.conn:
-            self.conn.execute("""
-                UPDATE movies
-                SET title = ?, poster_path = ?, trailer_url = ?, duration = ?, show_date = ?, price = ?, hall = ?
-                WHERE id = ?
-            """, (title, poster_path, trailer_url, duration, show_date, price, hall, movie_id))
-
-    def add_ticket(self, movie_id, user_name):
-        with self.conn:
-            self.conn.execute("""
-                INSERT INTO tickets (movie_id, user_name)
-                VALUES (?, ?)
-            """, (movie_id, user_name))
-
-    def get_tickets(self, user_name):
-        with self.conn:
-            return self.conn.execute("""
-                SELECT movies.title, movies.show_date, movies.hall, movies.price
-                FROM tickets
-                JOIN movies ON tickets.movie_id = movies.id
-                WHERE tickets.user_name = ?
-            """, (user_name,)).fetchall()
+from PyQt6.QtCore import Qt, QSize
+
+import db
+import media
+import posters
+import repository
+import scheduling
 
 
 # Основное окно
@@ -83,9 +20,9 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.setWindowTitle("Кинотеатр")
         self.setGeometry(100, 100, 800, 600)
-        self.setStyleSheet(open("style.css").read())
 
-        self.db = CinemaDatabase()
+        db.setup_database()
+        self.repo = repository.CinemaRepository()
         self.init_ui()
 
     def init_ui(self):
@@ -109,66 +46,83 @@ class MainWindow(QMainWindow):
 
     def load_movies(self):
         self.movie_list.clear()
-        movies = self.db.get_movies()
+        movies = self.repo.list_movies()
         for movie in movies:
-            self.movie_list.addItem(f"{movie[1]} - {movie[5]}")
+            item = QListWidgetItem(movie.title)
+            item.setData(Qt.ItemDataRole.UserRole, movie.id)
+            self.movie_list.addItem(item)
 
     def show_movie_details(self):
         selected_item = self.movie_list.currentItem()
         if selected_item:
-            title = selected_item.text().split(" - ")[0]
-            movie = next((m for m in self.db.get_movies() if m[1] == title), None)
+            movie = self.repo.movie_details(selected_item.data(Qt.ItemDataRole.UserRole))
             if movie:
-                details = MovieDetailsDialog(movie, self.db)
+                details = MovieDetailsDialog(movie, self.repo)
                 details.exec()
 
     def add_movie(self):
-        dialog = AddMovieDialog(self.db, self.load_movies)
+        dialog = AddMovieDialog(self.repo, self.load_movies)
         dialog.exec()
 
 
 # Окно деталей фильма
 class MovieDetailsDialog(QDialog):
-    def __init__(self, movie, db):
+    def __init__(self, movie, repo):
         super().__init__()
         self.movie = movie
-        self.db = db
+        self.repo = repo
+        # Ближайший предстоящий сеанс со свободными местами; без него покупка недоступна
+        sessions = repo.upcoming_sessions(movie.id)
+        self.session = next((session for session in sessions if not session.sold_out), None)
 
-        self.setWindowTitle(movie[1])
+        self.setWindowTitle(movie.title)
         self.setLayout(QVBoxLayout())
 
         poster_label = QLabel()
-        pixmap = QPixmap(movie[2])
-        poster_label.setPixmap(pixmap.scaled(200, 300, Qt.AspectRatioMode.KeepAspectRatio))
+        poster_label.setPixmap(posters.pixmap(movie.poster_path, QSize(200, 300)))
         self.layout().addWidget(poster_label)
 
         details = f"""
-            <b>Название:</b> {movie[1]}<br>
-            <b>Длительность:</b> {movie[4]} мин.<br>
-            <b>Дата показа:</b> {movie[5]}<br>
-            <b>Зал:</b> {movie[7]}<br>
-            <b>Цена:</b> {movie[6]} руб.<br>
+            <b>Название:</b> {movie.title}<br>
+            <b>Длительность:</b> {movie.duration} мин.<br>
         """
+        if self.session:
+            details += f"""
+            <b>Дата показа:</b> {self.session.date} {self.session.time}<br>
+            <b>Зал:</b> {self.session.hall}<br>
+            <b>Цена:</b> {self.session.price} руб.<br>
+            """
+        else:
+            details += "<b>Нет предстоящих сеансов со свободными местами</b><br>"
         details_label = QLabel(details)
         details_label.setWordWrap(True)
         self.layout().addWidget(details_label)
 
         buy_button = QPushButton("Купить билет")
         buy_button.clicked.connect(self.buy_ticket)
+        buy_button.setEnabled(self.session is not None)
         self.layout().addWidget(buy_button)
 
     def buy_ticket(self):
         name, ok = QInputDialog.getText(self, "Имя пользователя", "Введите ваше имя:")
         if ok and name:
-            self.db.add_ticket(self.movie[0], name)
+            user = self.repo.find_user(name)
+            if not user:
+                QMessageBox.warning(self, "Ошибка", "Пользователь не найден.")
+                return
+            try:
+                self.repo.purchase(user.id, self.session.id, 1)
+            except repository.BookingError as e:
+                QMessageBox.warning(self, "Ошибка", str(e))
+                return
             QMessageBox.information(self, "Билет куплен", "Ваш билет успешно сохранен!")
 
 
 # Окно добавления фильма
 class AddMovieDialog(QDialog):
-    def __init__(self, db, refresh_callback):
+    def __init__(self, repo, refresh_callback):
         super().__init__()
-        self.db = db
+        self.repo = repo
         self.refresh_callback = refresh_callback
         self.setWindowTitle("Добавить фильм")
         self.setLayout(QFormLayout())
@@ -176,6 +130,9 @@ class AddMovieDialog(QDialog):
         self.title_input = QLineEdit()
         self.layout().addRow("Название:", self.title_input)
 
+        self.description_input = QTextEdit()
+        self.layout().addRow("Описание:", self.description_input)
+
         self.poster_input = QLineEdit()
         self.poster_button = QPushButton("Выбрать файл")
         self.poster_button.clicked.connect(self.select_poster)
@@ -192,6 +149,9 @@ class AddMovieDialog(QDialog):
         self.date_input = QCalendarWidget()
         self.layout().addRow("Дата показа:", self.date_input)
 
+        self.time_input = QTimeEdit()
+        self.layout().addRow("Время показа:", self.time_input)
+
         self.price_input = QSpinBox()
         self.price_input.setRange(1, 5000)
         self.layout().addRow("Цена билета:", self.price_input)
@@ -211,15 +171,24 @@ class AddMovieDialog(QDialog):
 
     def add_movie(self):
         title = self.title_input.text()
+        description = self.description_input.toPlainText()
         poster = self.poster_input.text()
         trailer = self.trailer_input.text()
         duration = self.duration_input.value()
         show_date = self.date_input.selectedDate().toString("yyyy-MM-dd")
+        show_time = self.time_input.time().toString("HH:mm:ss")
         price = self.price_input.value()
-        hall = self.hall_input.currentText()
+        hall = self.hall_input.currentIndex() + 1
 
         if title and poster:
-            self.db.add_movie(title, poster, trailer, duration, show_date, price, hall)
+            try:
+                asset = media.ingest_poster(poster)
+                self.repo.add_movie_with_schedule(
+                    (title, description, duration, asset.original, trailer, asset.card, asset.details),
+                    show_date, show_time, hall, price)
+            except (sqlite3.Error, media.MediaError, scheduling.ScheduleError) as e:
+                QMessageBox.critical(self, "Ошибка", f"Не удалось добавить фильм: {e}")
+                return
             self.refresh_callback()
             self.accept()
 
@@ -227,6 +196,8 @@ class AddMovieDialog(QDialog):
 # Запуск приложения
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    with open("style.css") as style:
+        app.setStyleSheet(style.read())
     window = MainWindow()
     window.show()
     sys.exit(app.exec())
@@ -0,0 +1,414 @@
+"""Генератор синтетической базы кинотеатра для нагрузочных проверок.
+
+Пример:
+    python datagen.py bench.db --movies 2000 --days 730 --halls 20 --sessions-per-day 200 --tickets 10000000
+"""
+import argparse
+import datetime
+import itertools
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+
+import db
+import scheduling
+import seating
+
+CHUNK_SIZE = 50_000
+# Случайных последовательностей размеров покупок, из которых выбирают сеансы
+PURCHASE_PATTERNS = 512
+# Таблицы, индексы и триггеры которых снимаются на время загрузки
+BULK_TABLES = ('schedules', 'tickets')
+
+# Генератор Лемера (MINSTD) для случайных чисел на стороне SQLite
+MINSTD_MODULUS = 2 ** 31 - 1
+MINSTD_MULTIPLIER = 48271
+
+# Время работы залов: первый сеанс в 09:00, последний начинается не позже 23:30
+DAY_START = 9 * 60
+LAST_START = 23 * 60 + 30
+CLEANING_MINUTES = scheduling.CLEANING_MINUTES
+
+# Первый день расписания по умолчанию: фиксированный, чтобы база при одном
+# seed не зависела от дня запуска
+START_DATE = datetime.date(2030, 1, 1)
+
+POSTERS = [os.path.join('posters', f'poster{i}.png') for i in range(1, 6)]
+TRAILER = os.path.join('trailers', 'trailer1.mp4')
+
+TITLE_WORDS = (
+    'Тайна', 'Последний', 'Город', 'Звёздный', 'Путь', 'Север', 'Охота', 'Тень', 'Море', 'Код',
+    'Возвращение', 'Легенда', 'Ночной', 'Огонь', 'Дом', 'Мечта', 'Остров', 'Время', 'Сердце', 'Буря',
+)
+DESCRIPTION_WORDS = (
+    'фильм', 'о', 'любви', 'дружбе', 'приключениях', 'будущем', 'героях', 'борьбе', 'семье', 'космосе',
+    'тайнах', 'прошлого', 'большом', 'городе', 'путешествии', 'через', 'время', 'и', 'надежде', 'мести',
+)
+
+# Размер покупки: чаще всего один-два билета
+QUANTITIES = (1, 2, 3, 4)
+QUANTITY_WEIGHTS = (45, 35, 10, 10)
+MEAN_QUANTITY = sum(q * w for q, w in zip(QUANTITIES, QUANTITY_WEIGHTS)) / sum(QUANTITY_WEIGHTS)
+
+
+def _chunks(rows, size=CHUNK_SIZE):
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _insert(cursor, sql, rows):
+    count = 0
+    for chunk in _chunks(rows):
+        cursor.executemany(sql, chunk)
+        count += len(chunk)
+    return count
+
+
+def _users(count):
+    yield ('admin', 'admin', db.roles[1])
+    for i in range(1, count):
+        yield (f'user{i}', f'user{i}', db.roles[0])
+
+
+def _movies(rng, count):
+    for i in range(count):
+        title = f"{' '.join(rng.sample(TITLE_WORDS, 2))} {i + 1}"
+        description = ' '.join(rng.choices(DESCRIPTION_WORDS, k=rng.randint(6, 20))).capitalize()
+        yield (title, description, rng.randint(80, 170), POSTERS[i % len(POSTERS)], TRAILER)
+
+
+def _schedules(rng, durations, popularity, start_date, days, halls, sessions_per_day):
+    """Сеансы без пересечений: залы заполняются подряд с уборкой между показами."""
+    movie_ids = range(1, len(durations) + 1)
+    cum_weights = list(itertools.accumulate(popularity))
+    for day in range(days):
+        date = (start_date + datetime.timedelta(days=day)).isoformat()
+        weekend = (start_date.weekday() + day) % 7 >= 5
+        for hall in range(1, halls + 1):
+            per_hall = sessions_per_day // halls + (hall <= sessions_per_day % halls)
+            minute = DAY_START
+            for movie_id in rng.choices(movie_ids, cum_weights=cum_weights, k=per_hall):
+                if minute > LAST_START:
+                    break
+                evening = 18 * 60 <= minute < 22 * 60
+                price = 250 + 50 * rng.randint(0, 4) + (100 if evening else 0) + (50 if weekend else 0)
+                yield (movie_id, date, f'{minute // 60:02d}:{minute % 60:02d}:00', hall, price)
+                minute += durations[movie_id - 1] + CLEANING_MINUTES
+                minute += -minute % 5
+
+
+def _demand(schedule, popularity):
+    """Относительный спрос на сеанс: популярность фильма, вечер и выходные."""
+    movie_id, date, time_, _hall, _price = schedule
+    weight = popularity[movie_id - 1]
+    if '18:00:00' <= time_ < '22:00:00':
+        weight *= 2.0
+    if datetime.date.fromisoformat(date).weekday() >= 5:
+        weight *= 1.5
+    return weight
+
+
+def _fill_scale(weights, total, limit):
+    """Множитель спроса: сумма min(вес * множитель, limit) по сеансам равна total.
+
+    Сеансы с наибольшим спросом упираются в limit, а их излишек делится
+    между остальными пропорционально весу. Если total больше limit на все
+    сеансы, каждый сеанс заполняется до limit.
+    """
+    ordered = sorted(weights, reverse=True)
+    rest = sum(ordered)
+    for capped, weight in enumerate(ordered):
+        scale = (total - capped * limit) / rest
+        if weight * scale <= limit:
+            return scale
+        rest -= weight
+    return math.inf
+
+
+def _ticket_plan(rng, weights, total, limit, patterns):
+    """Строки temp.plan: (id сеанса, образец покупок, покупок по плану).
+
+    Спрос пропорционален весу сеанса и не больше limit на сеанс; образец
+    выбирается случайно из образцов 1..patterns.
+    """
+    scale = _fill_scale(weights, total, limit)
+    planned = 0
+    for schedule_id, weight in enumerate(weights, start=1):
+        expected = min(weight * scale, limit)
+        count = min(int(expected) + (rng.random() < expected - int(expected)), total - planned)
+        if count > 0:
+            yield schedule_id, 1 + rng.randrange(patterns), count
+            planned += count
+
+
+def _purchase_patterns(rng, count, capacity):
+    """Строки temp.purchase_patterns: (образец, номер покупки, размер, занято мест с ней).
+
+    Образец — случайная последовательность размеров покупок, обрезанная по
+    вместимости зала; сеансы берут её начало нужной длины.
+    """
+    for pattern in range(1, count + 1):
+        taken = 0
+        for n, quantity in enumerate(rng.choices(QUANTITIES, QUANTITY_WEIGHTS, k=capacity), start=1):
+            taken += quantity
+            if taken > capacity:
+                break
+            yield pattern, n, quantity, taken
+
+
+def _sql_random(key):
+    """SQL-выражение: псевдослучайное число от 0 до 2^31 - 2 по целому выражению key.
+
+    Два шага генератора Лемера (MINSTD); произведения меньше 2^63, поэтому
+    SQLite считает в целых.
+    """
+    step = f"(({key}) % {MINSTD_MODULUS} * {MINSTD_MULTIPLIER} % {MINSTD_MODULUS})"
+    return f"({step} * {MINSTD_MULTIPLIER} % {MINSTD_MODULUS})"
+
+
+# Владелец покупки n сеанса: случайный пользователь; n меньше SEQ_STRIDE
+SEQ_STRIDE = 1024
+_OWNER = f"1 + {_sql_random(f'schedule_id * {SEQ_STRIDE} + n + :salt')} % :users"
+
+INSERT_PLANNED_TICKETS = f"""
+    INSERT INTO tickets (user_id, schedule_id, quantity)
+    SELECT {_OWNER}, schedule_id, quantity
+    FROM (
+        SELECT plan.schedule_id, patterns.n, patterns.quantity
+        FROM temp.plan AS plan
+        JOIN temp.purchase_patterns AS patterns
+            ON patterns.pattern = plan.pattern AND patterns.n <= plan.planned
+    )
+    ORDER BY schedule_id, n
+"""
+
+# Остаток до total — одиночные билеты в первые по порядку сеансы со свободными местами
+INSERT_EXTRA_TICKETS = f"""
+    INSERT INTO tickets (user_id, schedule_id, quantity)
+    SELECT {_OWNER}, schedule_id, 1
+    FROM (
+        SELECT extra.schedule_id, extra.purchases + seq.n AS n
+        FROM temp.extra AS extra
+        JOIN temp.purchase_patterns AS seq ON seq.pattern = 0 AND seq.n <= extra.count
+    )
+    ORDER BY schedule_id, n
+"""
+
+
+def _load_tickets(cursor, weights, rng, total, users):
+    """Загрузка покупок; возвращает их число.
+
+    Размеры покупок берутся из готовых образцов, поэтому продажи сеанса
+    известны без прохода по tickets и собираются в temp.sales — основу
+    schedule_stats и schedule_seats.
+    """
+    capacity = db.DEFAULT_HALL_ROWS * db.DEFAULT_SEATS_PER_ROW
+    cursor.execute("CREATE TEMP TABLE purchase_patterns (pattern INTEGER, n INTEGER, quantity INTEGER, "
+                   "taken INTEGER, PRIMARY KEY (pattern, n)) WITHOUT ROWID")
+    # Образец 0 из одиночных покупок служит и последовательностью номеров для добора
+    cursor.executemany(
+        "INSERT INTO temp.purchase_patterns (pattern, n, quantity, taken) VALUES (?, ?, ?, ?)",
+        itertools.chain(((0, n, 1, n) for n in range(1, capacity + 1)),
+                        _purchase_patterns(rng, PURCHASE_PATTERNS, capacity)))
+    cursor.execute("CREATE TEMP TABLE plan (schedule_id INTEGER PRIMARY KEY, pattern INTEGER, planned INTEGER)")
+    _insert(cursor, "INSERT INTO temp.plan (schedule_id, pattern, planned) VALUES (?, ?, ?)",
+            _ticket_plan(rng, weights, total, capacity / MEAN_QUANTITY, PURCHASE_PATTERNS))
+    params = {'users': users, 'salt': rng.randrange(MINSTD_MODULUS)}
+    loaded = cursor.execute(INSERT_PLANNED_TICKETS, params).rowcount
+    cursor.execute("""
+    CREATE TEMP TABLE sales AS
+    SELECT schedules.id AS schedule_id, schedules.price AS price,
+           halls.rows * halls.seats_per_row AS capacity,
+           COALESCE(sold.purchases, 0) AS purchases, COALESCE(sold.taken, 0) AS sold
+    FROM schedules
+    JOIN halls ON halls.id = schedules.hall
+    LEFT JOIN (
+        SELECT plan.schedule_id, MAX(patterns.n) AS purchases, MAX(patterns.taken) AS taken
+        FROM temp.plan AS plan
+        JOIN temp.purchase_patterns AS patterns
+            ON patterns.pattern = plan.pattern AND patterns.n <= plan.planned
+        GROUP BY plan.schedule_id
+    ) AS sold ON sold.schedule_id = schedules.id
+    """)
+    if loaded < total:
+        cursor.execute("""
+        CREATE TEMP TABLE extra AS
+        SELECT schedule_id, purchases, MIN(capacity - sold, :deficit - before) AS count
+        FROM (
+            SELECT schedule_id, purchases, sold, capacity,
+                   SUM(capacity - sold) OVER (ORDER BY schedule_id) - (capacity - sold) AS before
+            FROM temp.sales WHERE sold < capacity
+        )
+        WHERE before < :deficit
+        """, {'deficit': total - loaded})
+        loaded += cursor.execute(INSERT_EXTRA_TICKETS, params).rowcount
+        cursor.execute("""
+        UPDATE temp.sales SET sold = sold + (SELECT count FROM temp.extra WHERE extra.schedule_id = sales.schedule_id)
+        WHERE schedule_id IN (SELECT schedule_id FROM temp.extra)
+        """)
+    return loaded
+
+
+def _fill_inventory(cursor):
+    """schedule_stats и карты мест schedule_seats по temp.sales одним проходом.
+
+    Билеты без номеров мест занимают первые места зала подряд, как при
+    миграции старых баз, поэтому карта зависит только от вместимости и
+    числа проданных мест и берётся из готовых образцов.
+    """
+    cursor.execute("""
+    INSERT INTO schedule_stats (schedule_id, sold, capacity, revenue)
+    SELECT schedule_id, sold, capacity, sold * price FROM temp.sales
+    """)
+    cursor.execute("CREATE TEMP TABLE seat_patterns (capacity INTEGER, taken INTEGER, seats BLOB, "
+                   "PRIMARY KEY (capacity, taken))")
+    capacities = [row[0] for row in cursor.execute("SELECT DISTINCT capacity FROM temp.sales")]
+    cursor.executemany(
+        "INSERT INTO temp.seat_patterns (capacity, taken, seats) VALUES (?, ?, ?)",
+        [(capacity, taken, bytes(seating.filled_map(capacity, taken)))
+         for capacity in capacities for taken in range(1, capacity + 1)])
+    cursor.execute("""
+    INSERT INTO schedule_seats (schedule_id, seats)
+    SELECT sales.schedule_id, seat_patterns.seats
+    FROM temp.sales AS sales
+    JOIN temp.seat_patterns AS seat_patterns
+        ON seat_patterns.capacity = sales.capacity AND seat_patterns.taken = sales.sold
+    """)
+
+
+def _drop_bulk_objects(cursor):
+    """Удаляет индексы и триггеры таблиц массовой загрузки и возвращает их SQL для восстановления."""
+    objects = cursor.execute(f"""
+    SELECT type, name, sql FROM sqlite_master
+    WHERE type IN ('index', 'trigger') AND tbl_name IN {BULK_TABLES} AND sql IS NOT NULL
+    ORDER BY type = 'trigger', name
+    """).fetchall()
+    for kind, name, _sql in objects:
+        cursor.execute(f"DROP {kind.upper()} {name}")
+    return [sql for _kind, _name, sql in objects]
+
+
+def generate_database(path, movies=500, days=365, halls=10, sessions_per_day=80, tickets=1_000_000,
+                      users=10_000, seed=42, start_date=None, overwrite=False):
+    """Создаёт базу path с синтетическими данными и возвращает количество строк по таблицам.
+
+    Данные детерминированы при одинаковых seed и start_date (по умолчанию
+    START_DATE, а не текущий день). Схема создаётся миграциями на пустой
+    базе, затем индексы и триггеры расписания и билетов снимаются на время
+    загрузки. Покупки порождаются в SQLite одним запросом по плану сеансов,
+    заполненность и карты мест считаются по плану одним проходом, после
+    чего индексы и триггеры создаются заново.
+    """
+    if os.path.exists(path):
+        if not overwrite:
+            raise FileExistsError(f"Файл {path} уже существует")
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    rng = random.Random(seed)
+    start_date = start_date or START_DATE
+    counts = {}
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -262144")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        db.migrate(conn)
+
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        deferred = _drop_bulk_objects(cursor)
+        counts['users'] = _insert(
+            cursor, "INSERT INTO users (username, password, role) VALUES (?, ?, ?)", _users(users))
+
+        movie_rows = list(_movies(rng, movies))
+        counts['movies'] = _insert(
+            cursor,
+            "INSERT INTO movies (title, description, duration, poster_path, trailer_path) VALUES (?, ?, ?, ?, ?)",
+            movie_rows)
+
+        cursor.executemany(
+            "INSERT OR IGNORE INTO halls (id, rows, seats_per_row) VALUES (?, ?, ?)",
+            [(hall, db.DEFAULT_HALL_ROWS, db.DEFAULT_SEATS_PER_ROW) for hall in range(1, halls + 1)])
+
+        # Популярность фильмов по закону Ципфа: несколько хитов и длинный хвост
+        popularity = [1 / (rank ** 0.8) for rank in range(1, movies + 1)]
+        rng.shuffle(popularity)
+        durations = [movie[2] for movie in movie_rows]
+        schedule_rows = list(_schedules(rng, durations, popularity, start_date, days, halls, sessions_per_day))
+        counts['schedules'] = _insert(
+            cursor, "INSERT INTO schedules (movie_id, date, time, hall, price) VALUES (?, ?, ?, ?, ?)",
+            schedule_rows)
+
+        weights = [_demand(schedule, popularity) for schedule in schedule_rows]
+        del schedule_rows
+        counts['tickets'] = _load_tickets(cursor, weights, rng, tickets, users)
+        _fill_inventory(cursor)
+        for sql in deferred:
+            cursor.execute(sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+    # Режим WAL и остальные настройки приложения
+    manager = db.ConnectionManager(path)
+    try:
+        db.migrate(manager.get())
+    finally:
+        manager.close_all()
+    return counts
+
+
+def _start_date(text):
+    if text == 'today':
+        return datetime.date.today()
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ожидается ГГГГ-ММ-ДД или today, получено {text!r}") from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генерация синтетической базы кинотеатра")
+    parser.add_argument('path', help="путь к создаваемой базе")
+    parser.add_argument('--movies', type=int, default=500, help="количество фильмов")
+    parser.add_argument('--days', type=int, default=365, help="количество дней расписания")
+    parser.add_argument('--halls', type=int, default=10, help="количество залов")
+    parser.add_argument('--sessions-per-day', type=int, default=80, help="сеансов в день по всем залам")
+    parser.add_argument('--tickets', type=int, default=1_000_000, help="количество билетов")
+    parser.add_argument('--users', type=int, default=10_000, help="количество пользователей")
+    parser.add_argument('--seed', type=int, default=42, help="зерно генератора случайных чисел")
+    parser.add_argument('--start-date', type=_start_date, default=START_DATE,
+                        help=f"первый день расписания (ГГГГ-ММ-ДД или today), по умолчанию {START_DATE}")
+    parser.add_argument('--overwrite', action='store_true', help="перезаписать существующий файл")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        counts = generate_database(
+            args.path, movies=args.movies, days=args.days, halls=args.halls,
+            sessions_per_day=args.sessions_per_day, tickets=args.tickets, users=args.users,
+            seed=args.seed, start_date=args.start_date, overwrite=args.overwrite)
+    except FileExistsError as e:
+        print(f"{e}. Укажите --overwrite, чтобы перезаписать.", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - started
+
+    for table, count in counts.items():
+        print(f"{table:<10} {count:>12,}")
+    print(f"Готово за {elapsed:.1f} с")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
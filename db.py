@@ -1,127 +1,513 @@
+import argparse
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
 
-def create_connection() -> sqlite3.Connection:
-    return sqlite3.connect('cinema.db')
-        
-def setup_database():
-        conn =  create_connection()
-        cursor = conn.cursor()
+import seating
 
-        # Таблица пользователей
-        cursor.execute(f"""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL CHECK(role IN {roles})
-        )
-        """)
+DB_PATH = 'cinema.db'
+
+# Залы по умолчанию: 10 залов по 10 рядов из 15 мест
+DEFAULT_HALLS = 10
+DEFAULT_HALL_ROWS = 10
+DEFAULT_SEATS_PER_ROW = 15
+
+# Настройки соединения: WAL позволяет читателям не ждать пишущую кассу,
+# остальные параметры уменьшают число fsync и обращений к диску
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+class ConnectionManager:
+    """Выдаёт каждому потоку собственное соединение с базой."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def get(self) -> sqlite3.Connection:
+        """Соединение текущего потока (создаётся при первом обращении)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # check_same_thread отключён только ради close_all():
+            # соединением по-прежнему пользуется лишь создавший его поток
+            conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Соединение потока в виде транзакции: commit при успехе, rollback при ошибке."""
+        conn = self.get()
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+    def close(self):
+        """Закрытие соединения текущего потока."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            with self._lock:
+                self._connections.remove(conn)
+            conn.close()
+
+    def close_all(self):
+        """Закрытие соединений всех потоков (при выходе из приложения)."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+manager = ConnectionManager()
+
+
+def get_connection() -> sqlite3.Connection:
+    return manager.get()
 
-        # Таблица фильмов
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS movies (
+
+def connection():
+    return manager.connection()
+
+
+def _create_tables(cursor):
+    # Таблица пользователей
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL CHECK(role IN {roles})
+    )
+    """)
+
+    # Таблица фильмов
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS movies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        description TEXT NOT NULL,
+        duration INTEGER NOT NULL,
+        poster_path TEXT NOT NULL,
+        trailer_path TEXT NOT NULL
+    )
+    """)
+
+    # Таблица расписания
+    cursor.execute("""
+       CREATE TABLE IF NOT EXISTS schedules (
+           id INTEGER PRIMARY KEY AUTOINCREMENT,
+           movie_id INTEGER NOT NULL,
+           date TEXT NOT NULL,
+           time TEXT NOT NULL,
+           hall INTEGER NOT NULL,
+           price Decimal(10, 2) NOT NULL,
+           FOREIGN KEY (movie_id) REFERENCES movies (id)
+       )
+       """)
+
+    # Таблица билетов
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tickets (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            description TEXT NOT NULL,
-            duration INTEGER NOT NULL,
-            poster_path TEXT NOT NULL,
-            trailer_path TEXT NOT NULL
+            user_id INTEGER NOT NULL,
+            schedule_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (schedule_id) REFERENCES schedule (id)
         )
         """)
 
-        # Таблица расписания
-        cursor.execute("""
-           CREATE TABLE IF NOT EXISTS schedules (
-               id INTEGER PRIMARY KEY AUTOINCREMENT,
-               movie_id INTEGER NOT NULL,
-               date TEXT NOT NULL,
-               time TEXT NOT NULL,
-               hall INTEGER NOT NULL,
-               price Decimal(10, 2) NOT NULL,
-               FOREIGN KEY (movie_id) REFERENCES movies (id)
-           )
-           """)
-
-        # Таблица билетов
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tickets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                schedule_id INTEGER NOT NULL,
-                quantity INTEGER NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (schedule_id) REFERENCES schedule (id)
-            )
-            """)
 
+def _create_indexes(cursor):
+    # Билеты пользователя (MyTicketsWidget) и их сеансы без обращения к таблице
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tickets_user_schedule ON tickets (user_id, schedule_id)")
+    # Сеансы фильма по дате и времени (MovieInfoWindow)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_schedules_movie_date_time ON schedules (movie_id, date, time)")
+    # Занятость зала по дням (проверка пересечений сеансов)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_schedules_hall_date ON schedules (hall, date)")
+
+
+def _add_column(cursor, table, column, declaration):
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def _create_seat_inventory(cursor):
+    # Залы и их размеры
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS halls (
+        id INTEGER PRIMARY KEY,
+        rows INTEGER NOT NULL,
+        seats_per_row INTEGER NOT NULL
+    )
+    """)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO halls (id, rows, seats_per_row) VALUES (?, ?, ?)",
+        [(hall, DEFAULT_HALL_ROWS, DEFAULT_SEATS_PER_ROW) for hall in range(1, DEFAULT_HALLS + 1)])
+    cursor.execute(f"""
+    INSERT OR IGNORE INTO halls (id, rows, seats_per_row)
+    SELECT DISTINCT hall, {DEFAULT_HALL_ROWS}, {DEFAULT_SEATS_PER_ROW} FROM schedules
+    """)
+
+    # Карта мест сеанса: битовая маска, см. seating.py
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schedule_seats (
+        schedule_id INTEGER PRIMARY KEY,
+        seats BLOB NOT NULL,
+        FOREIGN KEY (schedule_id) REFERENCES schedules (id)
+    )
+    """)
+
+    # Номера мест билета через запятую
+    _add_column(cursor, 'tickets', 'seats', 'TEXT')
+
+    # Билеты, купленные до появления мест, занимают первые места зала подряд
+    sold = cursor.execute("""
+    SELECT tickets.schedule_id, SUM(tickets.quantity), halls.rows * halls.seats_per_row
+    FROM tickets
+    JOIN schedules ON tickets.schedule_id = schedules.id
+    JOIN halls ON schedules.hall = halls.id
+    WHERE tickets.seats IS NULL
+    GROUP BY tickets.schedule_id
+    """).fetchall()
+    cursor.executemany(
+        "INSERT OR IGNORE INTO schedule_seats (schedule_id, seats) VALUES (?, ?)",
+        [(schedule_id, bytes(seating.filled_map(capacity, quantity))) for schedule_id, quantity, capacity in sold])
+
+
+def _create_schedule_stats(cursor):
+    # Заполненность сеанса, поддерживается триггерами при покупке и возврате билетов
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schedule_stats (
+        schedule_id INTEGER PRIMARY KEY,
+        sold INTEGER NOT NULL DEFAULT 0,
+        capacity INTEGER NOT NULL,
+        revenue REAL NOT NULL DEFAULT 0,
+        FOREIGN KEY (schedule_id) REFERENCES schedules (id)
+    )
+    """)
+    for trigger in STATS_TRIGGERS:
+        cursor.execute(trigger)
+    rebuild_schedule_stats(cursor)
+
+
+HALL_CAPACITY = f"""
+    COALESCE((SELECT rows * seats_per_row FROM halls WHERE id = NEW.hall), {DEFAULT_HALL_ROWS * DEFAULT_SEATS_PER_ROW})
+"""
+
+STATS_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS schedules_stats_insert AFTER INSERT ON schedules BEGIN
+        INSERT OR IGNORE INTO schedule_stats (schedule_id, sold, capacity, revenue)
+        VALUES (NEW.id, 0, {HALL_CAPACITY}, 0);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS schedules_stats_hall AFTER UPDATE OF hall ON schedules BEGIN
+        UPDATE schedule_stats SET capacity = {HALL_CAPACITY} WHERE schedule_id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS schedules_stats_delete AFTER DELETE ON schedules BEGIN
+        DELETE FROM schedule_stats WHERE schedule_id = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tickets_stats_insert AFTER INSERT ON tickets BEGIN
+        UPDATE schedule_stats
+        SET sold = sold + NEW.quantity,
+            revenue = revenue + NEW.quantity * (SELECT price FROM schedules WHERE id = NEW.schedule_id)
+        WHERE schedule_id = NEW.schedule_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tickets_stats_delete AFTER DELETE ON tickets BEGIN
+        UPDATE schedule_stats
+        SET sold = sold - OLD.quantity,
+            revenue = revenue - OLD.quantity * (SELECT price FROM schedules WHERE id = OLD.schedule_id)
+        WHERE schedule_id = OLD.schedule_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tickets_stats_update AFTER UPDATE OF quantity, schedule_id ON tickets BEGIN
+        UPDATE schedule_stats
+        SET sold = sold - OLD.quantity,
+            revenue = revenue - OLD.quantity * (SELECT price FROM schedules WHERE id = OLD.schedule_id)
+        WHERE schedule_id = OLD.schedule_id;
+        UPDATE schedule_stats
+        SET sold = sold + NEW.quantity,
+            revenue = revenue + NEW.quantity * (SELECT price FROM schedules WHERE id = NEW.schedule_id)
+        WHERE schedule_id = NEW.schedule_id;
+    END
+    """,
+)
+
+
+def rebuild_schedule_stats(cursor):
+    """Пересчёт schedule_stats по таблице билетов (восстановление после сбоев и массовой загрузки)."""
+    cursor.execute("DELETE FROM schedule_stats")
+    cursor.execute(f"""
+    INSERT INTO schedule_stats (schedule_id, sold, capacity, revenue)
+    SELECT schedules.id,
+           COALESCE(sales.sold, 0),
+           COALESCE(halls.rows * halls.seats_per_row, {DEFAULT_HALL_ROWS * DEFAULT_SEATS_PER_ROW}),
+           COALESCE(sales.sold, 0) * schedules.price
+    FROM schedules
+    LEFT JOIN halls ON schedules.hall = halls.id
+    LEFT JOIN (
+        SELECT schedule_id, SUM(quantity) AS sold FROM tickets GROUP BY schedule_id
+    ) AS sales ON sales.schedule_id = schedules.id
+    """)
+
+
+def _create_movie_search(cursor):
+    # Полнотекстовый индекс по названию и описанию; содержимое берётся из movies
+    cursor.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+        title, description,
+        content='movies', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN
+        INSERT INTO movies_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN
+        INSERT INTO movies_fts (movies_fts, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS movies_fts_update AFTER UPDATE OF title, description ON movies BEGIN
+        INSERT INTO movies_fts (movies_fts, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        INSERT INTO movies_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """)
+    rebuild_movie_search(cursor)
+
+
+def rebuild_movie_search(cursor):
+    cursor.execute("INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')")
+
+
+def _add_poster_variants(cursor):
+    # Готовые варианты постера из медиахранилища; NULL — только исходный poster_path
+    _add_column(cursor, 'movies', 'poster_card_path', 'TEXT')
+    _add_column(cursor, 'movies', 'poster_details_path', 'TEXT')
+
+
+def _create_media_index(cursor):
+    # Файлы медиахранилища по SHA-256 содержимого: дедупликация и проверка целостности
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS media_files (
+        digest TEXT PRIMARY KEY,
+        path TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        kind TEXT NOT NULL
+    ) WITHOUT ROWID
+    """)
+
+
+def _create_import_progress(cursor):
+    # Последняя записанная строка файла массового импорта: продолжение после сбоя.
+    # Ключ — SHA-256 файла, поэтому изменённый файл импортируется заново
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS import_progress (
+        source TEXT PRIMARY KEY,
+        line INTEGER NOT NULL,
+        finished INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """)
+
+
+def _create_date_index(cursor):
+    # Сеансы за диапазон дат по всем залам (сетка расписания, афиша на день);
+    # индекс покрывающий, поэтому таблица schedules при выборке не читается
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_schedules_date ON schedules (date, hall, time, movie_id)")
+
+
+# Счётчик изменений расписания и фильмов: кэш афиши по дням сравнивает его
+# с запомненным и сбрасывается, даже если расписание изменено другим процессом
+REVISION_TRIGGERS = tuple(
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_revision_{event.lower()} AFTER {event} ON {table} BEGIN
+        UPDATE schedule_revision SET revision = revision + 1 WHERE id = 1;
+    END
+    """
+    for table, events in (('schedules', ('INSERT', 'UPDATE', 'DELETE')), ('movies', ('UPDATE', 'DELETE')))
+    for event in events
+)
+
+
+def _create_schedule_revision(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schedule_revision (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        revision INTEGER NOT NULL
+    )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO schedule_revision (id, revision) VALUES (1, 0)")
+    for trigger in REVISION_TRIGGERS:
+        cursor.execute(trigger)
+
+
+# Миграции схемы в порядке применения: шаг N переводит базу в user_version = N.
+# Каждый шаг идемпотентен, чтобы базы, созданные до появления версий, обновлялись без ошибок.
+MIGRATIONS = (
+    _create_tables,
+    _create_indexes,
+    _create_seat_inventory,
+    _create_schedule_stats,
+    _create_movie_search,
+    _add_poster_variants,
+    _create_media_index,
+    _create_import_progress,
+    _create_date_index,
+    _create_schedule_revision,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn: sqlite3.Connection, target=SCHEMA_VERSION) -> int:
+    """Применяет недостающие миграции (до версии target) и возвращает итоговую версию схемы."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= target:
+        return version
+
+    conn.commit()
+    cursor = conn.cursor()
+    for number in range(version + 1, target + 1):
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            MIGRATIONS[number - 1](cursor)
+            cursor.execute(f"PRAGMA user_version = {number}")
+        except BaseException:
+            conn.rollback()
+            raise
         conn.commit()
-        conn.close()
+    return target
 
-        print("База данных создана")
+
+def setup_database():
+    conn = get_connection()
+    previous = conn.execute("PRAGMA user_version").fetchone()[0]
+    version = migrate(conn)
+    if version != previous:
+        print(f"Схема базы данных обновлена до версии {version}")
 
 
 roles = ('Пользователь', "Администратор")
 
 
 def seed_database():
-    conn = create_connection()
-    cursor = conn.cursor()
+    with connection() as conn:
+        cursor = conn.cursor()
 
 
-    users = [
-        ('2', '2', 'Пользователь'),
-        ('1', '1', 'Администратор')
-    ]
+        users = [
+            ('2', '2', 'Пользователь'),
+            ('1', '1', 'Администратор')
+        ]
 
-    for user in users:
-        cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", user)
+        for user in users:
+            cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", user)
 
 
-    movies = [
-        ('Титаник', 'Фильм о любви', 180, os.path.join(os.getcwd(), 'posters', 'poster1.png'), os.path.join(os.getcwd(), 'trailers', 'trailer1.mp4')),
-        ('Мстители', 'Фильм о супергероях', 120, os.path.join(os.getcwd(), 'posters', 'poster2.png'), os.path.join(os.getcwd(), 'trailers', 'trailer1.mp4')),
-        ('Интерстеллар', 'Фильм о будущем', 150, os.path.join(os.getcwd(), 'posters', 'poster3.png'), os.path.join(os.getcwd(), 'trailers', 'trailer1.mp4')),
-        ('Бойцовский клуб', 'Фильм о борьбе', 110, os.path.join(os.getcwd(), 'posters', 'poster4.png'), os.path.join(os.getcwd(), 'trailers', 'trailer1.mp4')),
-        ('Джуманджи', 'Фильм о приключениях', 130, os.path.join(os.getcwd(), 'posters', 'poster5.png'), os.path.join(os.getcwd(), 'trailers', 'trailer1.mp4'))
-    ]
+        movies = [
+            ('Титаник', 'Фильм о любви', 180, os.path.join('posters', 'poster1.png'), os.path.join('trailers', 'trailer1.mp4')),
+            ('Мстители', 'Фильм о супергероях', 120, os.path.join('posters', 'poster2.png'), os.path.join('trailers', 'trailer1.mp4')),
+            ('Интерстеллар', 'Фильм о будущем', 150, os.path.join('posters', 'poster3.png'), os.path.join('trailers', 'trailer1.mp4')),
+            ('Бойцовский клуб', 'Фильм о борьбе', 110, os.path.join('posters', 'poster4.png'), os.path.join('trailers', 'trailer1.mp4')),
+            ('Джуманджи', 'Фильм о приключениях', 130, os.path.join('posters', 'poster5.png'), os.path.join('trailers', 'trailer1.mp4'))
+        ]
 
-    for movie in movies:
-        cursor.execute("INSERT INTO movies (title, description, duration, poster_path, trailer_path) VALUES (?, ?, ?, ?, ?)", movie)
+        for movie in movies:
+            cursor.execute("INSERT INTO movies (title, description, duration, poster_path, trailer_path) VALUES (?, ?, ?, ?, ?)", movie)
     
 
 
-    schedules = [
-        (1, '2023-05-01', '10:00:00', 1, 100),
-        (2, '2023-05-02', '11:00:00', 2, 150),
-        (3, '2023-05-03', '12:00:00', 3, 200),
-        (4, '2023-05-04', '13:00:00', 1, 120),
-        (5, '2023-05-05', '14:00:00', 2, 180),
-        (6, '2023-05-06', '15:00:00', 3, 140),
-        (7, '2023-05-07', '16:00:00', 1, 90),
-        (8, '2023-05-08', '17:00:00', 2, 160),
-        (9, '2023-05-09', '18:00:00', 3, 110),
-        (10, '2023-05-10', '19:00:00', 1, 130),
-        (11, '2023-05-11', '20:00:00', 2, 190),
-        (12, '2023-05-12', '21:00:00', 3, 150),
-        (13, '2023-05-13', '22:00:00', 1, 100),
-        (14, '2023-05-14', '23:00:00', 2, 170),
-        (15, '2023-05-15', '00:00:00', 3, 120),
-        (16, '2023-05-16', '01:00:00', 1, 130),
-        (17, '2023-05-17', '02:00:00', 2, 190),
-        (18, '2023-05-18', '03:00:00', 3, 150),
-        (19, '2023-05-19', '04:00:00', 1, 100),
-        (20, '2023-05-20', '05:00:00', 2, 170),
-        (21, '2023-05-21', '06:00:00', 3, 120),
-        (22, '2023-05-22', '07:00:00', 1, 130),
-        (23, '2023-05-23', '08:00:00', 2, 190),
-    ]
-
-    for schedule in schedules:
-        cursor.execute("INSERT INTO schedules (movie_id, date, time, hall, price) VALUES (?, ?, ?, ?, ?)", schedule)
+        schedules = [
+            (1, '2023-05-01', '10:00:00', 1, 100),
+            (2, '2023-05-02', '11:00:00', 2, 150),
+            (3, '2023-05-03', '12:00:00', 3, 200),
+            (4, '2023-05-04', '13:00:00', 1, 120),
+            (5, '2023-05-05', '14:00:00', 2, 180),
+            (6, '2023-05-06', '15:00:00', 3, 140),
+            (7, '2023-05-07', '16:00:00', 1, 90),
+            (8, '2023-05-08', '17:00:00', 2, 160),
+            (9, '2023-05-09', '18:00:00', 3, 110),
+            (10, '2023-05-10', '19:00:00', 1, 130),
+            (11, '2023-05-11', '20:00:00', 2, 190),
+            (12, '2023-05-12', '21:00:00', 3, 150),
+            (13, '2023-05-13', '22:00:00', 1, 100),
+            (14, '2023-05-14', '23:00:00', 2, 170),
+            (15, '2023-05-15', '00:00:00', 3, 120),
+            (16, '2023-05-16', '01:00:00', 1, 130),
+            (17, '2023-05-17', '02:00:00', 2, 190),
+            (18, '2023-05-18', '03:00:00', 3, 150),
+            (19, '2023-05-19', '04:00:00', 1, 100),
+            (20, '2023-05-20', '05:00:00', 2, 170),
+            (21, '2023-05-21', '06:00:00', 3, 120),
+            (22, '2023-05-22', '07:00:00', 1, 130),
+            (23, '2023-05-23', '08:00:00', 2, 190),
+        ]
 
-    conn.commit()
+        for schedule in schedules:
+            cursor.execute("INSERT INTO schedules (movie_id, date, time, hall, price) VALUES (?, ?, ?, ?, ?)", schedule)
+
+        print("База данных заполнена")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Обслуживание базы кинотеатра")
+    parser.add_argument('--db', default=DB_PATH, help="путь к базе")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('migrate', help="применить миграции схемы")
+    commands.add_parser('rebuild-stats', help="пересчитать заполненность сеансов по билетам")
+    commands.add_parser('rebuild-search', help="перестроить полнотекстовый индекс фильмов")
+    args = parser.parse_args(argv)
+
+    global manager
+    manager = ConnectionManager(args.db)
+    try:
+        setup_database()
+        if args.command == 'rebuild-stats':
+            with connection() as conn:
+                rebuild_schedule_stats(conn.cursor())
+            print("Заполненность сеансов пересчитана")
+        elif args.command == 'rebuild-search':
+            with connection() as conn:
+                rebuild_movie_search(conn.cursor())
+            print("Поисковый индекс перестроен")
+    finally:
+        manager.close_all()
 
-    conn.close()
 
-    print("База данных заполнена")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+"""Массовый импорт расписания и каталога фильмов из файла.
+
+Файл CSV с заголовком или JSONL (объект JSON в строке) читается потоком,
+ошибки возвращаются по номерам строк.
+
+Расписание: поля movie_id, date, time, hall, price. Поля каждой строки
+проверяются при чтении, а фильмы, залы и пересечения сеансов — в
+repository.add_schedules. Файл читается пачками по SCHEDULE_BATCH_SIZE
+записей, и корректные строки каждой пачки вставляются её транзакцией,
+поэтому большой файл не держится в памяти целиком.
+
+Каталог: поля title, description, duration, poster, trailer; пути
+относительно файла каталога. Постеры обрабатываются в пуле процессов на
+всех ядрах, трейлеры переносятся в хранилище, фильмы пишутся пачками по
+транзакции вместе с номером последней записанной строки, поэтому
+прерванный импорт продолжается с места остановки.
+
+Пример:
+    python importers.py schedules october.csv
+    python importers.py schedules october.jsonl --dry-run
+    python importers.py movies catalogue/manifest.csv --workers 8
+"""
+import argparse
+import collections
+import csv
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import db
+import media
+import scheduling
+
+SCHEDULE_FIELDS = ('movie_id', 'date', 'time', 'hall', 'price')
+SCHEDULE_BATCH_SIZE = 1000
+MOVIE_BATCH_SIZE = 100
+MAX_DURATION = 1000
+MAX_REPORTED_ERRORS = 20
+
+
+class RecordError(ValueError):
+    """Запись файла импорта заполнена неверно."""
+
+
+class RowError:
+    """Ошибка в строке файла импорта."""
+    __slots__ = ('line', 'message')
+
+    def __init__(self, line, message):
+        self.line = line
+        self.message = message
+
+    def __str__(self):
+        return f"строка {self.line}: {self.message}"
+
+
+class ImportResult:
+    __slots__ = ('inserted', 'errors', 'skipped')
+
+    def __init__(self, inserted, errors, skipped=0):
+        self.inserted = inserted
+        self.errors = errors
+        self.skipped = skipped
+
+    def summary(self):
+        text = f"Добавлено: {self.inserted}, с ошибками: {len(self.errors)}"
+        if self.skipped:
+            text += f", пропущено уже импортированных строк: {self.skipped}"
+        if self.errors:
+            lines = [str(error) for error in self.errors[:MAX_REPORTED_ERRORS]]
+            if len(self.errors) > MAX_REPORTED_ERRORS:
+                lines.append(f"... и ещё {len(self.errors) - MAX_REPORTED_ERRORS}")
+            text += "\n" + "\n".join(lines)
+        return text
+
+
+def read_records(path):
+    """Записи файла по одной: пары (номер строки, dict или текст ошибки)."""
+    if os.path.splitext(path)[1].lower() in ('.jsonl', '.ndjson', '.json'):
+        with open(path, encoding='utf-8') as file:
+            for number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield number, f"неверный JSON: {e}"
+                    continue
+                yield number, record if isinstance(record, dict) else "ожидается объект JSON"
+    else:
+        with open(path, encoding='utf-8-sig', newline='') as file:
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, record
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _integer(record, field):
+    value = record.get(field)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RecordError(f"поле {field}: ожидается целое число, получено {value!r}") from None
+
+
+def _require(record, fields):
+    missing = [field for field in fields if record.get(field) in (None, '')]
+    if missing:
+        raise RecordError(f"нет полей: {', '.join(missing)}")
+
+
+def parse_schedule(record):
+    """Кортеж (movie_id, date, time, hall, price) из записи файла.
+
+    При неверных полях бросает RecordError или scheduling.ScheduleError.
+    """
+    _require(record, SCHEDULE_FIELDS)
+    price = record['price']
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        raise RecordError(f"поле price: ожидается число, получено {price!r}") from None
+    if price <= 0:
+        raise RecordError("цена должна быть больше нуля")
+    return (
+        _integer(record, 'movie_id'),
+        scheduling.parse_date(str(record['date'])),
+        scheduling.parse_time(str(record['time'])),
+        _integer(record, 'hall'),
+        int(price) if price.is_integer() else price,
+    )
+
+
+def import_schedules(repo, path, buffer=scheduling.CLEANING_MINUTES, dry_run=False,
+                     batch_size=SCHEDULE_BATCH_SIZE):
+    """Импорт сеансов из CSV или JSONL; возвращает ImportResult. Выполняется в рабочем потоке.
+
+    Каждая пачка из batch_size записей проверяется и пишется отдельным
+    вызовом add_schedules. При dry_run ничего не пишется, а принятые
+    сеансы копятся в IntervalIndex, чтобы пересечения между пачками
+    тоже попали в ошибки.
+    """
+    errors, inserted = [], 0
+    placed = scheduling.IntervalIndex() if dry_run else None
+    for batch in _batches(read_records(path), batch_size):
+        rows = []
+        for line, record in batch:
+            if isinstance(record, str):
+                errors.append(RowError(line, record))
+                continue
+            try:
+                rows.append((line, *parse_schedule(record)))
+            except (RecordError, scheduling.ScheduleError) as e:
+                errors.append(RowError(line, str(e)))
+        if not rows:
+            continue
+        added, rejected = repo.add_schedules(rows, buffer, dry_run, placed)
+        inserted += added
+        errors.extend(RowError(line, message) for line, message in rejected)
+    errors.sort(key=lambda error: error.line)
+    return ImportResult(inserted, errors)
+
+
+def parse_movie(record, base):
+    """Кортеж (title, description, duration, poster, trailer) из записи каталога; RecordError при неверных полях.
+
+    Относительные пути постера и трейлера отсчитываются от каталога base.
+    """
+    _require(record, ('title', 'duration', 'poster'))
+    duration = _integer(record, 'duration')
+    if not 0 < duration <= MAX_DURATION:
+        raise RecordError(f"длительность должна быть от 1 до {MAX_DURATION} минут")
+    trailer = record.get('trailer') or None
+    return (
+        str(record['title']).strip(),
+        str(record.get('description') or ''),
+        duration,
+        os.path.join(base, str(record['poster'])),
+        os.path.join(base, str(trailer)) if trailer else None,
+    )
+
+
+def _init_poster_worker():
+    # Плагины форматов изображений Qt доступны только при созданном приложении
+    from PyQt6.QtGui import QGuiApplication
+    global _app
+    _app = QGuiApplication(['importers', '-platform', 'offscreen'])
+
+
+def _ingest_poster(path, root):
+    """Задача процесса пула: PosterAsset или текст ошибки."""
+    try:
+        return media.ingest_poster(path, root)
+    except (media.MediaError, OSError) as e:
+        return str(e)
+
+
+def _count_records(path, after):
+    """(строк до after включительно, строк после after) в файле."""
+    before = remaining = 0
+    for line, _record in read_records(path):
+        if line > after:
+            remaining += 1
+        else:
+            before += 1
+    return before, remaining
+
+
+def import_movies(repo, path, workers=None, batch_size=MOVIE_BATCH_SIZE, progress=None, restart=False,
+                  root=media.MEDIA_DIR):
+    """Импорт каталога фильмов; возвращает ImportResult. Выполняется в рабочем потоке.
+
+    progress(обработано, всего) вызывается после каждой записанной пачки.
+    Импорт продолжает ранее прерванный импорт того же файла, если не
+    указан restart; полностью импортированный файл повторно не импортируется.
+    """
+    source = media.file_digest(path)
+    if restart:
+        repo.reset_import_progress(source)
+    done_line, finished = repo.import_progress(source)
+    skipped, total = _count_records(path, done_line)
+    if finished:
+        return ImportResult(0, [], skipped + total)
+    base = os.path.dirname(os.path.abspath(path))
+    errors, inserted, processed = [], 0, 0
+    last_line = done_line
+
+    def submit(pool, batch, posters):
+        """Разбор пачки и постановка её постеров в пул; одинаковые постеры обрабатываются один раз."""
+        entries = []
+        for line, record in batch:
+            if isinstance(record, str):
+                errors.append(RowError(line, record))
+                continue
+            try:
+                movie = parse_movie(record, base)
+            except RecordError as e:
+                errors.append(RowError(line, str(e)))
+                continue
+            future = posters.get(movie[3])
+            if future is None:
+                future = posters[movie[3]] = pool.submit(_ingest_poster, movie[3], root)
+            entries.append((line, movie, future))
+        return batch[-1][0], len(batch), entries
+
+    def write(line, count, entries):
+        nonlocal inserted, processed, last_line
+        rows = []
+        for entry_line, (title, description, duration, poster, trailer), future in entries:
+            asset = future.result()
+            if isinstance(asset, str):
+                errors.append(RowError(entry_line, asset))
+                continue
+            trailer_path = ''
+            if trailer:
+                try:
+                    trailer_path = media.ingest_trailer(trailer, repo, root).path
+                except media.MediaError as e:
+                    errors.append(RowError(entry_line, str(e)))
+                    continue
+            rows.append((title, description, duration, asset.original, trailer_path, asset.card, asset.details))
+        repo.add_movies(rows, source, line)
+        inserted += len(rows)
+        processed += count
+        last_line = line
+        if progress is not None:
+            progress(processed, total)
+
+    records = ((line, record) for line, record in read_records(path) if line > done_line)
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_poster_worker) as pool:
+        # Пока пишется одна пачка, процессы уже обрабатывают постеры следующей
+        posters, pending = {}, collections.deque()
+        for batch in _batches(records, batch_size):
+            pending.append(submit(pool, batch, posters))
+            if len(pending) > 1:
+                write(*pending.popleft())
+                posters = {key: future for key, future in posters.items() if not future.done()}
+        while pending:
+            write(*pending.popleft())
+    repo.add_movies([], source, last_line, finished=True)
+    errors.sort(key=lambda error: error.line)
+    return ImportResult(inserted, errors, skipped)
+
+
+def _print_progress(done, total):
+    print(f"\rОбработано строк: {done} из {total}", end='', file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    import repository
+
+    parser = argparse.ArgumentParser(description="Массовый импорт расписания")
+    parser.add_argument('--db', default=db.DB_PATH, help="путь к базе")
+    commands = parser.add_subparsers(dest='command', required=True)
+    schedules = commands.add_parser('schedules', help="импорт сеансов из CSV или JSONL")
+    schedules.add_argument('path', help="файл с полями movie_id, date, time, hall, price")
+    schedules.add_argument('--buffer', type=int, default=scheduling.CLEANING_MINUTES,
+                           help="минут на уборку зала между сеансами")
+    schedules.add_argument('--dry-run', action='store_true', help="только проверить файл")
+    movies = commands.add_parser('movies', help="импорт каталога фильмов с постерами и трейлерами")
+    movies.add_argument('path', help="файл с полями title, description, duration, poster, trailer")
+    movies.add_argument('--workers', type=int, default=None, help="процессов для постеров (по числу ядер)")
+    movies.add_argument('--batch', type=int, default=MOVIE_BATCH_SIZE, help="фильмов в одной транзакции")
+    movies.add_argument('--root', default=media.MEDIA_DIR, help="каталог медиахранилища")
+    movies.add_argument('--restart', action='store_true', help="начать импорт файла заново")
+    args = parser.parse_args(argv)
+
+    db.manager = db.ConnectionManager(args.db)
+    try:
+        db.setup_database()
+        repo = repository.CinemaRepository()
+        if args.command == 'schedules':
+            result = import_schedules(repo, args.path, args.buffer, args.dry_run)
+        else:
+            result = import_movies(repo, args.path, args.workers, args.batch, _print_progress, args.restart,
+                                   args.root)
+            print(file=sys.stderr)
+    finally:
+        db.manager.close_all()
+    for error in result.errors:
+        print(error, file=sys.stderr)
+    if args.command == 'schedules':
+        print(f"Сеансов {'проверено' if args.dry_run else 'добавлено'}: {result.inserted}, "
+              f"с ошибками: {len(result.errors)}")
+    else:
+        print(f"Фильмов добавлено: {result.inserted}, с ошибками: {len(result.errors)}, "
+              f"пропущено строк: {result.skipped}")
+    return 1 if result.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,19 @@
-from math import log
-from shutil import move
+# Замер запуска включается до остальных импортов, чтобы учесть и их
 import sys
-import sqlite3
+import profiling
+sys.argv = profiling.configure(sys.argv)
+
+import datetime
+import time
 import db
+import posters
+import repository
+import scheduling
+import services
+import theme
 import utils
+import views
+import workers
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QLabel, QLineEdit, QPushButton, QMessageBox,
@@ -11,194 +21,70 @@ from PyQt6.QtWidgets import (
     QHBoxLayout, QSpinBox, QComboBox, QTextEdit, QFormLayout, QGridLayout, QLayout, QFrame, QListWidget, QListWidgetItem,
     QListView, QAbstractItemView, QHeaderView, QButtonGroup, QScrollArea
 )
-from PyQt6.QtMultimedia import QMediaPlayer
-from PyQt6.QtMultimediaWidgets import QVideoWidget
-
-from PyQt6.QtGui import QPixmap, QDesktopServices, QPixmap
-from PyQt6.QtCore import QUrl, Qt
-
-
-def init_base_stylesheet():
-    return """
-        QWidget {
-            background-color: white;
-            color: black;
-            font-size: 14px;
-            font-family: Arial, sans-serif;
-        }
-        QPushButton {
-            background-color: yellow;
-            border: none;
-            color: black;
-            outline: none;
-            padding: 10px;
-            border-radius: 5px;
-            font-size: 14px;
-            font-weight: bold;
-        }
-        QPushButton:hover {
-            background-color: #FFB02E;
-        }
-        QPushButton:pressed {
-            background-color: #FFB02E;
-        }
-        QPushButton:focus {
-            background-color: #FFB02E;
-        }
-        QPushButton:checked {
-            background-color: #FFB02E;
-        }
-        QPushButton#destructive_button {
-            background-color: transparent;
-            color: red;
-        }
-        QPushButton#destructive_button:hover {
-            background-color: white;
-        }
-        QLineEdit {
-            padding: 5px;
-            border: 1px solid #888;
-            border-radius: 5px;
-        }
-        QComboBox {
-            padding: 5px;
-            border: 1px solid #888;
-            border-radius: 5px;
-        }
-        QTableWidget {
-            background-color: white;
-            color: white;
-            font-size: 14px;
-        }
-        QAbstractItemView {
-            background: black;
-            outline: none;
-            border-radius: 5px;
-        }
-        QAbstractItemView::item {
-            padding: 5px;
-            outline: none;
-            color: white;
-            background-color: transparent;
-        }
-        QAbstractItemView::item:selected {
-            background-color: #FFB02E;
-            color: black;
-        }
-        QScrollBar {
-            border: none;
-            outline: none;
-        }
-        QScrollBar:horizontal {
-            background-color: gray;
-            height: 10px;
-            border-radius: 5px;
-        }
-        QScrollBar:vertical {
-            background-color: gray;
-            width: 10px;
-            border-radius: 5px;
-        }
-        QSpinBox {
-            padding: 5px;
-            border: 1px solid #888;
-            border-radius: 5px;
-        }
-        #logo {
-            font-size: 24px;
-            margin-bottom: 30px;
-            font-style: italic;
-            font-weight: bold;
-        }
-        #caption {
-            color: #eee;
-        }
-    """
-
-
-class VideoPlayer(QMainWindow):
-    def __init__(self, video_path):
-        super().__init__()
-        self.media_player = QMediaPlayer()
-        self.media_player.setSource(video_path)
-        self.video_widget = QVideoWidget()
-        self.media_player.setVideoOutput(self.video_widget)
-        self.setCentralWidget(self.video_widget)
-        self.media_player.play()
+from PyQt6.QtGui import QDesktopServices
+from PyQt6.QtCore import QUrl, Qt, QTimer, pyqtSignal
+
 
 class CinemaApp(QMainWindow):
-    def __init__(self, user):
+    """Главное окно. Создаётся только панель роли пользователя."""
+
+    def __init__(self, user, login_started=None):
         super().__init__()
         self.setWindowTitle("Кинотеатры (Афиша)")
         self.resize(1290, 700)
 
         utils.center_window(self)
-        self.setStyleSheet(init_base_stylesheet())
         
         self.user = user
-        self.conn = db.create_connection()
+        self.repo = repository.CinemaRepository()
 
         self.stack = QStackedWidget()
         self.setCentralWidget(self.stack)
 
-        self.user_main_window = UserWindow(self.conn, user, self)
-        self.admin_main_window = AdminWindow(self.conn, self)
+        self.user_main_window = None
+        self.admin_main_window = None
 
-        self.stack.addWidget(self.user_main_window)
-        self.stack.addWidget(self.admin_main_window)
+        # Время от входа до первого отрисованного кадра
+        self.login_started = login_started
+        self.first_frame_ms = None
 
-        if user[2] == 'Администратор':
+        if user.is_admin:
             self.show_admin_main_window()
         else:
             self.show_user_main_window()
+
     def show_admin_main_window(self):
+        if self.admin_main_window is None:
+            self.admin_main_window = AdminWindow(self.repo, self)
+            self.stack.addWidget(self.admin_main_window)
         self.stack.setCurrentWidget(self.admin_main_window)
 
     def show_user_main_window(self):
+        if self.user_main_window is None:
+            self.user_main_window = UserWindow(self.repo, self.user, self)
+            self.stack.addWidget(self.user_main_window)
         self.stack.setCurrentWidget(self.user_main_window)
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.login_started is not None and self.first_frame_ms is None:
+            # Срабатывает после обработки уже поставленных событий отрисовки
+            QTimer.singleShot(0, self.on_first_frame)
+
+    def on_first_frame(self):
+        self.first_frame_ms = (time.perf_counter() - self.login_started) * 1000
+        profiling.mark('main_window_first_frame')
+
 
 class AdminWindow(QWidget):
-    def __init__(self, conn, parent):
+    def __init__(self, repo, parent):
         super().__init__()
-        self.conn = conn
-        self.cursor = conn.cursor()
+        self.setObjectName("adminWindow")
+        self.repo = repo
         self.parent = parent
 
         self.setWindowTitle("Панель администратора")
         self.setGeometry(200, 100, 1000, 700)
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #111;
-                color: #fff;
-                font-family: Arial, sans-serif;
-            }
-            QLabel {
-                font-size: 16px;
-                margin-bottom: 15px;
-                color: #fff;
-            }
-            QPushButton {
-                background-color: #FFD700;
-                color: #111;
-                border: none;
-                padding: 15px 30px;
-                font-size: 18px;
-                font-weight: bold;
-                border-radius: 8px;
-                margin: 10px 0;
-            }
-            QPushButton:hover {
-                background-color: #E6C200;
-            }
-            QPushButton#destructive_button {
-                background-color: #FF6347;
-                color: white;
-            }
-            QPushButton#destructive_button:hover {
-                background-color: #E5533E;
-            }
-        """)
 
         layout = QVBoxLayout()
         layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -221,23 +107,25 @@ class AdminWindow(QWidget):
         self.setLayout(layout)
 
     def open_movies_management(self):
-        self.movies_window = MovieManagementWindow(self.conn, self) 
+        self.movies_window = MovieManagementWindow(self.repo, self)
         self.movies_window.show()
 
     def open_schedule_management(self):
-        self.schedule_window = ScheduleManagementWindow(self.conn, self) 
+        self.schedule_window = ScheduleManagementWindow(self.repo, self)
         self.schedule_window.show()
 
     def logout(self):
         self.parent.close()
 
 class MovieManagementWindow(QWidget):
-    def __init__(self, conn, parent):
+    # Ход импорта каталога; испускается из рабочего потока
+    import_progress = pyqtSignal(int, int)
+
+    def __init__(self, repo, parent):
         super().__init__()
-        self.conn = conn
-        self.cursor = conn.cursor()
+        self.repo = repo
         self.parent = parent
-        self.setStyleSheet(init_base_stylesheet())
+        self.queries = workers.AsyncQueries(self)
         self.resize(800, 600)
         utils.center_window(self)
         self.setWindowTitle("Управление фильмами")
@@ -257,14 +145,20 @@ class MovieManagementWindow(QWidget):
 
         self.poster_button = QPushButton("Загрузить постер")
         self.poster_button.clicked.connect(self.upload_poster)
-        self.poster_path = ""
+        self.poster = None
+        self.poster_task = None
 
         self.trailer_button = QPushButton("Загрузить трейлер")
         self.trailer_button.clicked.connect(self.upload_trailer)
-        self.trailer_path = ""
+        self.trailer = None
+        self.trailer_task = None
+
+        self.add_movie_button = QPushButton("Добавить фильм")
+        self.add_movie_button.clicked.connect(self.add_movie)
 
-        add_movie_button = QPushButton("Добавить фильм")
-        add_movie_button.clicked.connect(self.add_movie)
+        self.import_button = QPushButton("Импорт каталога фильмов")
+        self.import_button.clicked.connect(self.import_movies)
+        self.import_progress.connect(self.on_import_progress)
 
         layout.addWidget(QLabel("Добавление фильма"))
         layout.addWidget(QLabel("Название"))
@@ -275,54 +169,138 @@ class MovieManagementWindow(QWidget):
         layout.addWidget(self.duration_input)
         layout.addWidget(self.poster_button)
         layout.addWidget(self.trailer_button)
-        layout.addWidget(add_movie_button)
+        layout.addWidget(self.add_movie_button)
+        layout.addWidget(self.import_button)
 
         self.setLayout(layout)
 
+    def closeEvent(self, event):
+        self.queries.cancel_all()
+        super().closeEvent(event)
+
     def upload_poster(self):
+        import media
+
         file_path, _ = QFileDialog.getOpenFileName(self, "Выберите постер", "", "Изображения (*.png *.jpg *.jpeg)")
         if file_path:
-            self.poster_path = file_path
-            QMessageBox.information(self, "Успех", "Постер загружен!")
+            # Копирование в хранилище и подготовка вариантов идут в рабочем потоке
+            self.queries.cancel(self.poster_task)
+            self.poster = None
+            self.poster_button.setText("Обработка постера...")
+            self.poster_task = self.queries.run(
+                media.ingest_poster, file_path, on_result=self.on_poster_ingested, on_error=self.on_poster_failed)
+
+    def on_poster_ingested(self, poster):
+        self.poster_task = None
+        self.poster = poster
+        self.poster_button.setText("Загрузить постер")
+        QMessageBox.information(self, "Успех", "Постер загружен!")
+
+    def on_poster_failed(self, error):
+        self.poster_task = None
+        self.poster_button.setText("Загрузить постер")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить постер: {error}")
 
     def upload_trailer(self):
+        import media
+
         file_path, _ = QFileDialog.getOpenFileName(self, "Выберите трейлер", "", "Видео (*.mp4 *.mkv)")
         if file_path:
-            self.trailer_path = file_path
-            QMessageBox.information(self, "Успех", "Трейлер загружен!")
+            # Хеширование и перенос в хранилище идут в рабочем потоке
+            self.queries.cancel(self.trailer_task)
+            self.trailer = None
+            self.trailer_button.setText("Обработка трейлера...")
+            self.trailer_task = self.queries.run(
+                media.ingest_trailer, file_path, self.repo,
+                on_result=self.on_trailer_ingested, on_error=self.on_trailer_failed)
+
+    def on_trailer_ingested(self, trailer):
+        self.trailer_task = None
+        self.trailer = trailer
+        self.trailer_button.setText("Загрузить трейлер")
+        QMessageBox.information(self, "Успех", "Трейлер загружен!")
+
+    def on_trailer_failed(self, error):
+        self.trailer_task = None
+        self.trailer_button.setText("Загрузить трейлер")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить трейлер: {error}")
 
     def add_movie(self):
         title = self.title_input.text()
         description = self.description_input.toPlainText()
         duration = self.duration_input.value()
 
-        if not all([title, description, self.poster_path, self.trailer_path]):
+        if self.poster_task is not None or self.trailer_task is not None:
+            QMessageBox.warning(self, "Ошибка", "Дождитесь окончания обработки постера и трейлера.")
+            return
+        if not all([title, description, self.poster, self.trailer]):
             QMessageBox.warning(self, "Ошибка", "Заполните все поля и загрузите постер и трейлер.")
             return
 
-        self.cursor.execute("""
-        INSERT INTO movies (title, description, duration, poster_path, trailer_path) 
-        VALUES (?, ?, ?, ?, ?)
-        """, (title, description, duration, self.poster_path, self.trailer_path))
-        self.conn.commit()
+        self.add_movie_button.setEnabled(False)
+        self.queries.run(
+            self.repo.add_movie, title, description, duration, self.poster.original, self.trailer.path,
+            self.poster.card, self.poster.details,
+            on_result=self.on_movie_added, on_error=self.on_movie_failed,
+        )
 
+    def on_movie_added(self, movie_id):
+        self.add_movie_button.setEnabled(True)
         QMessageBox.information(self, "Успех", "Фильм успешно добавлен!")
         self.title_input.clear()
         self.description_input.clear()
         self.duration_input.setValue(1)
-        self.poster_path = ""
-        self.trailer_path = ""
+        self.poster = None
+        self.trailer = None
+
+    def on_movie_failed(self, error):
+        self.add_movie_button.setEnabled(True)
+        QMessageBox.critical(self, "Ошибка", f"Не удалось добавить фильм: {error}")
+
+    def import_movies(self):
+        """Импорт каталога из CSV или JSONL; постеры обрабатываются в пуле процессов."""
+        # importers тянет concurrent.futures и multiprocessing, которые нужны только при импорте
+        import importers
+
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Выбрать файл каталога", "", "Каталог (*.csv *.jsonl)")
+        if not file_path:
+            return
+        self.import_button.setEnabled(False)
+        self.import_button.setText("Импорт каталога...")
+        self.queries.run(
+            importers.import_movies, self.repo, file_path, progress=self.import_progress.emit,
+            on_result=self.on_movies_imported, on_error=self.on_movies_import_failed,
+        )
 
+    def on_import_progress(self, done, total):
+        self.import_button.setText(f"Импорт каталога: {done} из {total}")
+
+    def on_movies_imported(self, result):
+        self.import_button.setEnabled(True)
+        self.import_button.setText("Импорт каталога фильмов")
+        if result.errors:
+            QMessageBox.warning(self, "Импорт каталога", result.summary())
+        else:
+            QMessageBox.information(self, "Импорт каталога", result.summary())
+
+    def on_movies_import_failed(self, error):
+        self.import_button.setEnabled(True)
+        self.import_button.setText("Импорт каталога фильмов")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось импортировать каталог: {error}")
 
 
 class ScheduleManagementWindow(QWidget):
-    def __init__(self, conn, parent):
+    def __init__(self, repo, parent):
+        # Сетка расписания нужна только администратору и не загружается при запуске
+        import timeline
+
         super().__init__()
-        self.conn = conn
-        self.cursor = conn.cursor()
+        self.repo = repo
         self.parent = parent
-        self.setStyleSheet(init_base_stylesheet())
-        self.resize(800, 600)
+        self.queries = workers.AsyncQueries(self)
+        self.schedule_task = None
+        self.resize(1200, 700)
         utils.center_window(self)
         self.setWindowTitle("Управление расписанием")
 
@@ -342,8 +320,15 @@ class ScheduleManagementWindow(QWidget):
         self.hall_input.setRange(1, 10)
         self.hall_input.setPrefix("Зал ")
 
-        add_schedule_button = QPushButton("Добавить расписание")
-        add_schedule_button.clicked.connect(self.add_schedule)
+        self.price_input = QSpinBox()
+        self.price_input.setRange(1, 5000)
+        self.price_input.setSuffix(" руб.")
+
+        self.add_schedule_button = QPushButton("Добавить расписание")
+        self.add_schedule_button.clicked.connect(self.add_schedule)
+
+        self.import_button = QPushButton("Импорт расписания из файла")
+        self.import_button.clicked.connect(self.import_schedules)
 
         layout.addWidget(QLabel("Добавление расписания"))
         layout.addWidget(QLabel("Выберите фильм"))
@@ -354,17 +339,60 @@ class ScheduleManagementWindow(QWidget):
         layout.addWidget(self.time_input)
         layout.addWidget(QLabel("Зал"))
         layout.addWidget(self.hall_input)
-        layout.addWidget(add_schedule_button)
+        layout.addWidget(QLabel("Цена билета"))
+        layout.addWidget(self.price_input)
+        layout.addWidget(self.add_schedule_button)
+        layout.addWidget(self.import_button)
+        layout.addStretch()
+
+        # Сетка расписания: залы по строкам, время по столбцам
+        self.previous_button = QPushButton("<")
+        self.previous_button.clicked.connect(lambda: self.shift_range(-1))
+        self.next_button = QPushButton(">")
+        self.next_button.clicked.connect(lambda: self.shift_range(1))
+        self.range_label = QLabel()
+        self.mode_selector = QComboBox()
+        self.mode_selector.addItem("День", timeline.DAY)
+        self.mode_selector.addItem("Неделя", timeline.WEEK)
+        self.mode_selector.currentIndexChanged.connect(lambda: self.show_range(self.grid.first_day))
+
+        navigation = QHBoxLayout()
+        navigation.addWidget(self.previous_button)
+        navigation.addWidget(self.range_label, 1, alignment=Qt.AlignmentFlag.AlignCenter)
+        navigation.addWidget(self.next_button)
+        navigation.addWidget(self.mode_selector)
+
+        self.grid = timeline.ScheduleGrid()
+        self.grid.move_requested.connect(self.move_session)
+
+        grid_layout = QVBoxLayout()
+        grid_layout.addLayout(navigation)
+        grid_layout.addWidget(self.grid, 1)
+
+        form = QWidget()
+        form.setLayout(layout)
+        form.setFixedWidth(300)
+        main_layout = QHBoxLayout()
+        main_layout.addWidget(form)
+        main_layout.addLayout(grid_layout, 1)
+        self.setLayout(main_layout)
 
-        self.setLayout(layout)
+        self.show_range(datetime.date.today())
+
+    def closeEvent(self, event):
+        self.queries.cancel_all()
+        super().closeEvent(event)
 
     def load_movies(self):
         """Загрузка списка фильмов для выбора."""
-        self.cursor.execute("SELECT id, title FROM movies")
-        movies = self.cursor.fetchall()
         self.movie_selector.clear()
+        self.movie_selector.setPlaceholderText("Загрузка...")
+        self.queries.run(self.repo.list_movies, on_result=self.on_movies_loaded)
+
+    def on_movies_loaded(self, movies):
+        self.movie_selector.setPlaceholderText("")
         for movie in movies:
-            self.movie_selector.addItem(movie[1], movie[0])
+            self.movie_selector.addItem(movie.title, movie.id)
 
     def add_schedule(self):
         """Добавление нового расписания."""
@@ -372,57 +400,123 @@ class ScheduleManagementWindow(QWidget):
         date = self.date_input.text()
         time = self.time_input.text()
         hall = self.hall_input.value()
+        price = self.price_input.value()
 
         if not all([movie_id, date, time]):
             QMessageBox.warning(self, "Ошибка", "Заполните все поля!")
             return
 
-        try:
-            self.cursor.execute("""
-            INSERT INTO schedules (movie_id, date, time, hall) VALUES (?, ?, ?, ?)
-            """, (movie_id, date, time, hall))
-            self.conn.commit()
-            QMessageBox.information(self, "Успех", "Расписание успешно добавлено!")
-            self.date_input.clear()
-            self.time_input.clear()
-        except sqlite3.Error as e:
-            print(e)
-            QMessageBox.critical(self, "Ошибка", f"Не удалось добавить расписание: {e}")
+        self.add_schedule_button.setEnabled(False)
+        self.queries.run(
+            services.add_schedule, self.repo, movie_id, date, time, hall, price,
+            on_result=self.on_schedule_added, on_error=self.on_schedule_failed,
+        )
+
+    def on_schedule_added(self, schedule_id):
+        self.add_schedule_button.setEnabled(True)
+        QMessageBox.information(self, "Успех", "Расписание успешно добавлено!")
+        self.date_input.clear()
+        self.time_input.clear()
+        self.load_schedule()
+
+    def on_schedule_failed(self, error):
+        self.add_schedule_button.setEnabled(True)
+        if isinstance(error, scheduling.ScheduleError):
+            QMessageBox.warning(self, "Ошибка", str(error))
+        else:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось добавить расписание: {error}")
+
+    def import_schedules(self):
+        """Импорт сеансов из CSV или JSONL в рабочем потоке."""
+        import importers
+
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Выбрать файл расписания", "", "Расписание (*.csv *.jsonl)")
+        if not file_path:
+            return
+        self.import_button.setEnabled(False)
+        self.import_button.setText("Импорт...")
+        self.queries.run(
+            importers.import_schedules, self.repo, file_path,
+            on_result=self.on_schedules_imported, on_error=self.on_import_failed,
+        )
+
+    def on_schedules_imported(self, result):
+        self.import_button.setEnabled(True)
+        self.import_button.setText("Импорт расписания из файла")
+        self.load_schedule()
+        if result.errors:
+            QMessageBox.warning(self, "Импорт расписания", result.summary())
+        else:
+            QMessageBox.information(self, "Импорт расписания", result.summary())
+
+    def on_import_failed(self, error):
+        self.import_button.setEnabled(True)
+        self.import_button.setText("Импорт расписания из файла")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось импортировать расписание: {error}")
+
+    def show_range(self, first_day):
+        """Показ дня или недели, начиная с first_day."""
+        import timeline
+
+        mode = self.mode_selector.currentData()
+        self.grid.set_range(first_day, mode)
+        if mode == timeline.DAY:
+            self.range_label.setText(first_day.strftime('%d.%m.%Y'))
+            self.grid.scroll_to_minute(8 * 60)
+        else:
+            self.range_label.setText(f"{first_day.strftime('%d.%m')} – {self.grid.last_day.strftime('%d.%m.%Y')}")
+            self.grid.scroll_to_minute(0)
+        self.load_schedule()
+
+    def shift_range(self, direction):
+        self.show_range(self.grid.first_day + datetime.timedelta(days=direction * self.grid.days))
+
+    def load_schedule(self):
+        """Сеансы видимого диапазона; предыдущая незавершённая загрузка отменяется."""
+        self.queries.cancel(self.schedule_task)
+        self.schedule_task = self.queries.run(
+            self.fetch_schedule, self.grid.first_day.isoformat(), self.grid.last_day.isoformat(),
+            on_result=self.on_schedule_loaded, on_error=self.on_schedule_load_failed,
+        )
+
+    def fetch_schedule(self, first_day, last_day):
+        """Залы и сеансы диапазона (выполняется в рабочем потоке)."""
+        return first_day, self.repo.halls(), self.repo.schedule_range(first_day, last_day)
+
+    def on_schedule_loaded(self, result):
+        first_day, halls, sessions = result
+        self.schedule_task = None
+        if first_day == self.grid.first_day.isoformat():
+            self.grid.set_sessions(halls, sessions)
+
+    def on_schedule_load_failed(self, error):
+        self.schedule_task = None
+        QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить расписание: {error}")
+
+    def move_session(self, session, date, time, hall):
+        """Перенос сеанса, перетащенного в сетке; пересечения проверяются в транзакции."""
+        self.queries.run(
+            self.repo.move_schedule, session.id, date, time, hall,
+            on_result=lambda _: self.grid.move_item(session, date, time, hall),
+            on_error=self.on_move_failed,
+        )
+
+    def on_move_failed(self, error):
+        if isinstance(error, scheduling.ScheduleError):
+            QMessageBox.warning(self, "Ошибка", str(error))
+        else:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось перенести сеанс: {error}")
+        self.load_schedule()
 
 
 
 class Navbar(QFrame):
     def __init__(self, widgets=[]):
         super().__init__()
+        self.setObjectName("navbar")
         self.setContentsMargins(0, 0, 0, 0)
         self.setFixedWidth(200)
-        self.setStyleSheet("""
-            QFrame {
-                background-color: black;
-                padding: 0;
-                color: #ffffff;
-            }
-            QPushButton {
-                background-color: black;
-                color: #ffffff;
-                border: none;
-                padding: 10px;
-            }
-            QPushButton:checked {
-                background-color: #333333;
-            }
-            QPushButton:hover {
-                background-color: #333333;
-            }
-            QPushButton#destructive_button {
-                background-color: transparent;
-                color: red;
-            }
-            QPushButton#destructive_button:hover {
-                background-color: red;
-                color: #ffffff;
-            }
-        """)
 
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 15, 0, 0)
@@ -435,18 +529,13 @@ class Navbar(QFrame):
         self.setLayout(layout)     
 
 class UserWindow(QWidget):
-    def __init__(self, conn, user, parent):
+    def __init__(self, repo, user, parent):
         super().__init__()
-        self.conn = conn
+        self.setObjectName("userWindow")
+        self.repo = repo
         self.user = user
-        self.cursor = conn.cursor()
         self.parent = parent
         self.setContentsMargins(0, 0, 0, 0)
-        self.setStyleSheet(init_base_stylesheet() + """
-            QPushButton {
-                border-radius: 0;
-            }
-        """)
 
         self.setWindowTitle("Панель пользователя")
 
@@ -458,13 +547,10 @@ class UserWindow(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(0)
 
+        # Страницы создаются при первом открытии
         self.stack = QStackedWidget()
-        self.afisha = AfishaWidget(self.conn, self)
-        self.stack.addWidget(self.afisha)
-        self.my_tickets = MyTicketsWidget(self.conn, self.user[0], self)
-        self.stack.addWidget(self.my_tickets)
-
-        self.stack.currentChanged.connect(self.on_stacked_widget_changed)
+        self.afisha = None
+        self.my_tickets = None
         
         layout.addWidget(self.stack)
         logo = QLabel("КиноАфиша")
@@ -507,152 +593,173 @@ class UserWindow(QWidget):
         main_layout.addLayout(layout)
         self.setLayout(main_layout)
 
-    def on_stacked_widget_changed(self, index):
-        if index == 1:
-            self.my_tickets.refresh_tickets()
+        self.open_afisha()
 
     def logout(self):
         self.parent.close()
 
     def open_afisha(self):
-        self.stack.setCurrentIndex(0)
+        if self.afisha is None:
+            self.afisha = AfishaWidget(self.repo, self)
+            self.stack.addWidget(self.afisha)
+        elif self.afisha.model.date is not None:
+            # Сеансы дня могли начаться или измениться, пока страница была скрыта
+            self.afisha.load_movies()
+        self.stack.setCurrentWidget(self.afisha)
 
     def open_my_tickets(self):
-        self.stack.setCurrentIndex(1)
+        # Новая страница загружает билеты сама, уже открытая — обновляется
+        if self.my_tickets is None:
+            self.my_tickets = MyTicketsWidget(self.repo, self.user.id, self)
+            self.stack.addWidget(self.my_tickets)
+        else:
+            self.my_tickets.refresh_tickets()
+        self.stack.setCurrentWidget(self.my_tickets)
+
+
+SEARCH_DEBOUNCE_MS = 250
+# Дней в ленте дат афиши, начиная с сегодняшнего
+AFISHA_DAYS = 7
+WEEKDAYS = ('Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс')
 
 
 class AfishaWidget(QFrame):
-    def __init__(self, conn, parent):
+    def __init__(self, repo, parent):
         super().__init__()
-        self.conn = conn
-        self.cursor = conn.cursor()
+        self.setObjectName("afisha")
+        self.repo = repo
         self.parent = parent
 
-        self.setStyleSheet("""
-            QFrame {
-                background-color: white;
-                color: black;  
-            }                   
-        """)
 
         self.setGeometry(300, 150, 800, 600)
+        self.first_paint_marked = False
 
         layout = QVBoxLayout()
 
-        self.movies_list = QListWidget()
+        # Поиск по мере ввода: запрос уходит после паузы в наборе
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Поиск фильма...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.load_movies)
+        self.search_input.textChanged.connect(self.search_timer.start)
+
+        # Лента дат: афиша целиком или фильмы с сеансами выбранного дня
+        self.date_group = QButtonGroup(self)
+        self.date_group.setExclusive(True)
+        self.date_group.idClicked.connect(self.select_date)
+        self.dates = [None]
+        date_layout = QHBoxLayout()
+        date_layout.setSpacing(5)
+        today = datetime.date.today()
+        for offset in range(-1, AFISHA_DAYS):
+            if offset < 0:
+                text = "Все"
+            else:
+                day = today + datetime.timedelta(days=offset)
+                self.dates.append(day.isoformat())
+                text = ("Сегодня", "Завтра")[offset] if offset < 2 else f"{WEEKDAYS[day.weekday()]} {day.strftime('%d.%m')}"
+            button = QPushButton(text)
+            button.setObjectName("date_button")
+            button.setCheckable(True)
+            button.setChecked(offset < 0)
+            self.date_group.addButton(button, offset + 1)
+            date_layout.addWidget(button)
+        date_layout.addStretch()
+
+        # Карточки рисует делегат: виджеты создаются только для видимой области
+        self.model = views.MovieListModel(self.repo, self)
+        self.model.loaded.connect(self.on_movies_loaded)
+        self.model.failed.connect(self.on_load_failed)
+
+        self.movies_list = QListView()
         self.movies_list.setContentsMargins(0, 0, 0, 0)
         self.movies_list.setSpacing(10)
         self.movies_list.setWrapping(True)
-      
-
         self.movies_list.setViewMode(QListView.ViewMode.IconMode)
         self.movies_list.setResizeMode(QListView.ResizeMode.Adjust)
-
-        self.movies_list.setDragEnabled(False)
-        self.movies_list.setAcceptDrops(False)
-        self.movies_list.setDropIndicatorShown(False)
-        self.movies_list.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection) 
-        movies = self.get_movies_list()
-
-        if not movies or len(movies) == 0:
-            label = QLabel("Фильмы не найдены")
-            label.setObjectName("caption")
-            layout.addStretch()
-            label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(label)
-        else:
-            for film in movies:
-                self.add_movie_to_list(film)
-
+        self.movies_list.setMovement(QListView.Movement.Static)
+        self.movies_list.setUniformItemSizes(True)
+        self.movies_list.setMouseTracking(True)
+        self.movies_list.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.movies_list.setItemDelegate(views.MovieCardDelegate(self.movies_list))
+        self.movies_list.setModel(self.model)
+        self.movies_list.clicked.connect(self.open_movie_info)
+
+        # Постеры читаются в фоне: после прокрутки лишние загрузки отменяются,
+        # постеры следующих карточек загружаются заранее
+        self.poster_timer = QTimer(self)
+        self.poster_timer.setSingleShot(True)
+        self.poster_timer.setInterval(0)
+        self.poster_timer.timeout.connect(self.prefetch_posters)
+        self.movies_list.verticalScrollBar().valueChanged.connect(self.poster_timer.start)
+        self.model.rowsInserted.connect(self.poster_timer.start)
+        posters.cache.loaded.connect(self.movies_list.viewport().update)
+
+        self.status_label = QLabel("Загрузка...")
+        self.status_label.setObjectName("caption")
+        self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        layout.addLayout(date_layout)
+        layout.addWidget(self.search_input)
+        layout.addWidget(self.status_label)
         layout.addWidget(self.movies_list)
         self.setLayout(layout)
-    
-    def add_movie_to_list(self, movie):
-        card = MovieCard(movie, self.parent.user[0], self)
-        item = QListWidgetItem()
-        item.setSizeHint(card.size())
-        self.movies_list.addItem(item)
-        self.movies_list.setItemWidget(item, card)
-
-    def get_movies_list(self):
-        self.cursor.execute("""
-            SELECT movies.id, movies.title, movies.poster_path, movies.description FROM movies
-        """)
-        records = self.cursor.fetchall()
-        return records
-
-
-class MovieCard(QPushButton):
-    def __init__(self, movie, user_id, parent):
-        super().__init__() 
-        self.movie = movie
-        self.parent = parent
-        self.user_id = user_id
-        self.setFixedSize(200, 250)
-        self.setContentsMargins(0, 0, 0, 5)
-        self.setStyleSheet("""
-            QWidget {
-                border: 1px solid #111;
-                border-radius: 4px;
-                background-color: #111;
-            }
-            QWidget {
-                border: none;
-            }
-            QLabel {
-                color: #fff; 
-                font-family: Arial, sans-serif;
-            }
-            QLabel#poster {
-                border-radius: 5px;
-            }
-            QLabel#title {
-                font-size: 14px;
-                font-weight: 600;
-                margin: 5px 0;
-                text-align: center;
-            }
-            QLabel#description {
-                font-size: 13px;
-                color: #aaa;
-                margin: 5px 0;
-            }
-        """)
-        
-        title = QLabel(movie[1])
-        title.setObjectName("title")
-        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        pixmap = QPixmap(movie[2]).scaled(
-            200, 149, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
-        )
-        image = QLabel()
-        image.setPixmap(pixmap)
-        image.setObjectName("poster")
-        image.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.load_movies()
 
-        description = QLabel(movie[3])
-        description.setObjectName("description")
-        description.setWordWrap(True)
-        description.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    def load_movies(self):
+        """Загрузка афиши с начала или результатов поиска; предыдущий запрос отменяется."""
+        self.model.set_search(self.search_input.text().strip())
 
-        layout = QVBoxLayout()
-        layout.addWidget(image)
-        layout.addWidget(title)
-        layout.addWidget(description)
-        layout.setSpacing(6)
-        layout.setContentsMargins(1, 1, 1, 1)
-        self.setLayout(layout)
-        self.clicked.connect(self.open_movie_info)
-    def open_movie_info(self):
-        self.movie_info_window = MovieInfoWindow(self.parent.conn, self.movie[0], self.user_id)
+    def select_date(self, button_id):
+        self.model.set_date(self.dates[button_id])
+
+    def on_movies_loaded(self):
+        if not self.model.rowCount():
+            self.status_label.setText("Фильмы не найдены" if self.model.date is None else "На этот день сеансов нет")
+            self.status_label.show()
+            return
+        self.status_label.hide()
+        # Если страница не заполнила окно, прокрутки не будет: подгружаем сразу
+        QTimer.singleShot(0, self.fill_viewport)
+        if profiling.enabled() and not self.first_paint_marked:
+            self.first_paint_marked = True
+            QTimer.singleShot(0, self.on_first_paint)
+
+    def on_first_paint(self):
+        profiling.mark('afisha_first_paint')
+        profiling.finish()
+
+    def fill_viewport(self):
+        if self.movies_list.verticalScrollBar().maximum() == 0 and self.model.canFetchMore():
+            self.model.fetchMore()
+
+    def prefetch_posters(self):
+        views.prefetch_posters(self.movies_list, posters.CARD_SIZE)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.poster_timer.start()
+
+    def on_load_failed(self, error):
+        self.status_label.setText(f"Не удалось загрузить афишу: {error}")
+        self.status_label.show()
+
+    def open_movie_info(self, index):
+        movie = index.data(views.MovieListModel.MovieRole)
+        self.movie_info_window = MovieInfoWindow(self.repo, movie.id, self.parent.user.id)
         self.movie_info_window.show()
 
+
 class MovieInfoWindow(QWidget):
-    def __init__(self, conn, movie_id, user_id):
+    def __init__(self, repo, movie_id, user_id):
         super().__init__()
-        self.conn = conn
-        self.cursor = conn.cursor()
+        self.setObjectName("movieInfo")
+        self.repo = repo
+        self.queries = workers.AsyncQueries(self)
         self.movie_id = movie_id
         self.user_id = user_id
 
@@ -660,72 +767,35 @@ class MovieInfoWindow(QWidget):
         self.setWindowTitle("Детали фильма")
         self.setGeometry(300, 150, 800, 600)
 
-        # Стилизация окна
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #f9f9f9;
-                font-family: Arial, sans-serif;
-                color: #333;
-            }
-            QLabel#title {
-                font-size: 24px;
-                font-weight: bold;
-                color: #111;
-                margin-bottom: 10px;
-            }
-            QLabel#description {
-                font-size: 16px;
-                line-height: 1.5;
-                margin-bottom: 15px;
-                color: #555;
-            }
-            QLabel#info {
-                font-size: 14px;
-                color: #777;
-                margin-bottom: 5px;
-            }
-            QLabel#poster {
-                border-radius: 8px;
-            }
-            QPushButton {
-                font-size: 14px;
-                padding: 8px 15px;
-                background-color: #FFD700;
-                color: #111;
-                border: none;
-                border-radius: 5px;
-            }
-            QPushButton:hover {
-                background-color: #FFC107;
-            }
-            QPushButton:pressed {
-                background-color: #E6AC00;
-            }
-            QSpinBox {
-                padding: 5px;
-                border: 1px solid #888;
-                border-radius: 5px;
-                background-color: #fff;
-                color: #333;
-                font-size: 14px;
-            }
-        """)
 
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(20, 20, 20, 20)
         main_layout.setSpacing(15)
 
-        self.cursor.execute("""
-        SELECT movies.title, movies.description, movies.duration, movies.poster_path, movies.trailer_path, 
-            schedules.hall, schedules.time
-        FROM movies 
-        LEFT JOIN schedules ON movies.id = schedules.movie_id
-        WHERE movies.id = ?
-        """, (movie_id,))
-        movie = self.cursor.fetchone()
+        self.main_layout = main_layout
+        self.loading_label = QLabel("Загрузка...")
+        self.loading_label.setObjectName("info")
+        main_layout.addWidget(self.loading_label, alignment=Qt.AlignmentFlag.AlignCenter)
+        self.setLayout(main_layout)
+
+        self.queries.run(self.load_movie, on_result=self.on_movie_loaded)
 
+    def closeEvent(self, event):
+        self.queries.cancel_all()
+        super().closeEvent(event)
+
+    def load_movie(self):
+        """Данные фильма и его сеансы (выполняется в рабочем потоке)."""
+        return services.movie_details(self.repo, self.movie_id)
+
+    def on_movie_loaded(self, result):
+        movie, sessions = result
+        main_layout = self.main_layout
+        self.loading_label.deleteLater()
         if movie:
-            title, description, duration, poster, trailer, hall, time = movie
+            title, description, duration = movie.title, movie.description, movie.duration
+            poster, trailer = movie.poster_path, movie.trailer_path
+            self.session = None
 
             # Заголовок
             title_label = QLabel(title)
@@ -734,11 +804,17 @@ class MovieInfoWindow(QWidget):
 
             # Постер
             if poster:
-                pixmap = QPixmap(poster).scaled(400, 300, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-                poster_label = QLabel()
-                poster_label.setPixmap(pixmap)
-                poster_label.setObjectName("poster")
-                main_layout.addWidget(poster_label, alignment=Qt.AlignmentFlag.AlignCenter)
+                self.poster_label = QLabel()
+                self.poster_label.setObjectName("poster")
+                self.poster_label.setFixedSize(posters.DETAILS_SIZE)
+                self.poster_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+                self.poster_key = posters.cache.key(poster, posters.DETAILS_SIZE)
+                pixmap = posters.cache.request(poster, posters.DETAILS_SIZE)
+                if pixmap is None:
+                    posters.cache.loaded.connect(self.on_poster_loaded)
+                else:
+                    self.poster_label.setPixmap(pixmap)
+                main_layout.addWidget(self.poster_label, alignment=Qt.AlignmentFlag.AlignCenter)
 
             # Описание
             description_label = QLabel(description)
@@ -750,19 +826,28 @@ class MovieInfoWindow(QWidget):
             info_layout = QVBoxLayout()
             duration_label = QLabel(f"Продолжительность: {duration} минут")
             duration_label.setObjectName("info")
-            hall_label = QLabel(f"Зал: {hall}")
-            hall_label.setObjectName("info")
-            time_label = QLabel(f"Время: {time}")
-            time_label.setObjectName("info")
             info_layout.addWidget(duration_label)
-            info_layout.addWidget(hall_label)
-            info_layout.addWidget(time_label)
             main_layout.addLayout(info_layout)
 
+            # Сеансы
+            sessions_label = QLabel("Сеансы:" if sessions else "Ближайших сеансов нет")
+            sessions_label.setObjectName("info")
+            main_layout.addWidget(sessions_label)
+            self.session_list = QListWidget()
+            self.session_list.setObjectName("sessions")
+            self.session_list.setUniformItemSizes(True)
+            self.session_list.setMinimumHeight(100)
+            self.session_list.setMaximumHeight(160)
+            for session in sessions:
+                self.session_list.addItem(self.session_item(session))
+            self.session_list.currentItemChanged.connect(self.select_session)
+            self.session_list.setVisible(bool(sessions))
+            main_layout.addWidget(self.session_list)
+
             # Трейлер
             if trailer:
                 trailer_button = QPushButton("Просмотреть трейлер")
-                trailer_button.clicked.connect(lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(trailer)))
+                trailer_button.clicked.connect(lambda: self.open_trailer(trailer))
                 main_layout.addWidget(trailer_button, alignment=Qt.AlignmentFlag.AlignCenter)
 
             # Покупка билета
@@ -770,164 +855,151 @@ class MovieInfoWindow(QWidget):
             ticket_label = QLabel("Количество билетов:")
             self.ticket_count = QSpinBox()
             self.ticket_count.setRange(1, 10)
-            buy_button = QPushButton("Купить билет")
-            buy_button.clicked.connect(self.buy_ticket)
+            self.buy_button = QPushButton("Купить билет")
+            self.buy_button.clicked.connect(self.buy_ticket)
+            self.buy_button.setEnabled(False)
 
             ticket_layout.addWidget(ticket_label)
             ticket_layout.addWidget(self.ticket_count)
-            ticket_layout.addWidget(buy_button)
+            ticket_layout.addWidget(self.buy_button)
             main_layout.addLayout(ticket_layout)
 
-        self.setLayout(main_layout)
+            available = next((row for row, session in enumerate(sessions) if not session.sold_out), None)
+            if available is not None:
+                self.session_list.setCurrentRow(available)
+
+    @staticmethod
+    def session_item(session):
+        seats = "мест нет" if session.sold_out else (
+            "" if session.seats_left is None else f"свободно мест: {session.seats_left}")
+        item = QListWidgetItem(f"{session.date}  {session.time[:5]}   Зал {session.hall}   {session.price} руб.   {seats}")
+        item.setData(Qt.ItemDataRole.UserRole, session)
+        if session.sold_out:
+            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEnabled)
+        return item
+
+    def select_session(self, item):
+        """Покупка будет на выбранный сеанс; билетов не больше, чем свободных мест."""
+        self.session = item.data(Qt.ItemDataRole.UserRole) if item else None
+        if self.session is not None and self.session.seats_left is not None:
+            self.ticket_count.setMaximum(max(1, min(10, self.session.seats_left)))
+        else:
+            self.ticket_count.setMaximum(10)
+        self.buy_button.setEnabled(self.session is not None and not self.session.sold_out)
+
+    def on_poster_loaded(self, key):
+        if key == self.poster_key:
+            posters.cache.loaded.disconnect(self.on_poster_loaded)
+            pixmap = posters.cache.cached(key)
+            if pixmap is not None:
+                self.poster_label.setPixmap(pixmap)
 
     def buy_ticket(self):
         """Покупка билета."""
         quantity = self.ticket_count.value()
 
-        self.cursor.execute("""
-        INSERT INTO tickets (user_id, schedule_id, quantity) VALUES (?, ?, ?)
-        """, (self.user_id, self.movie_id, quantity))
-        self.conn.commit()
+        self.buy_button.setEnabled(False)
+        self.queries.run(
+            services.purchase, self.repo, self.user_id, self.session.id, quantity,
+            on_result=self.on_ticket_bought, on_error=self.on_purchase_failed,
+        )
+
+    def on_ticket_bought(self, booking):
+        seats = "\n".join(booking.labels())
+        QMessageBox.information(self, "Успех", f"Билет успешно куплен!\n{seats}")
+        self.close()
+
+    def on_purchase_failed(self, error):
+        self.buy_button.setEnabled(True)
+        if isinstance(error, repository.BookingError):
+            QMessageBox.warning(self, "Ошибка", str(error))
+        else:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось купить билет: {error}")
+
+    def open_trailer(self, trailer_path):
+        import media
+
+        self.queries.run(media.resolve, trailer_path, self.repo, on_result=self.on_trailer_resolved)
 
-        QMessageBox.information(self, "Успех", "Билет успешно куплен!")
-        self.close()        
-    def play_trailer(self, trailer_path):
-        """Функция для воспроизведения трейлера"""
-        if trailer_path:
-            self.player = VideoPlayer(trailer_path)
-            self.player.show()
+    def on_trailer_resolved(self, path):
+        if path is None:
+            QMessageBox.warning(self, "Ошибка", "Файл трейлера не найден.")
+            return
+        QDesktopServices.openUrl(QUrl.fromLocalFile(path))
 
 class MyTicketsWidget(QWidget):
-    def __init__(self, conn, user_id, parent):
+    def __init__(self, repo, user_id, parent):
         super().__init__()
-        self.conn = conn
-        self.cursor = conn.cursor()
+        self.setObjectName("myTickets")
+        self.repo = repo
         self.user_id = user_id
         self.parent = parent
         self.setContentsMargins(0, 0, 0, 0)
 
-        self.setStyleSheet("""
-            QFrame {
-                background-color: #222;
-                border-radius: 8px;
-                margin-bottom: 10px;
-                color: white;
-            }
-            #ticket-title {
-                font-size: 16px;
-                font-weight: bold;
-            }
-            #ticket-info {
-                font-size: 14px;
-            }
-        """)
-
         # Основной макет
         layout = QVBoxLayout()
         layout.setSpacing(10)
         layout.setContentsMargins(0, 0, 0, 0)
 
-        # Прокручиваемая область для билетов
-        scroll_area = QScrollArea()
-        scroll_area.setContentsMargins(0, 0, 0, 0)
-        scroll_area.setWidgetResizable(True)
+        # Билеты рисует делегат; модель подгружает их страницами
+        self.model = views.TicketListModel(self.repo, self.user_id, self)
+        self.model.loaded.connect(self.on_tickets_loaded)
+        self.model.failed.connect(self.on_load_failed)
+
+        self.tickets_list = QListView()
+        self.tickets_list.setUniformItemSizes(True)
+        self.tickets_list.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.tickets_list.setItemDelegate(views.TicketDelegate(self.tickets_list))
+        self.tickets_list.setModel(self.model)
 
-        # Контейнер для карточек билетов
-        self.tickets_container = QVBoxLayout()
-        self.tickets_container.setAlignment(Qt.AlignmentFlag.AlignTop)
+        self.status_label = QLabel("Загрузка...")
+        self.status_label.setObjectName("ticket-info")
 
-        tickets_widget = QWidget()
-        tickets_widget.setLayout(self.tickets_container)
-        scroll_area.setWidget(tickets_widget)
+        self.history_button = QPushButton("Показать прошедшие сеансы")
+        self.history_button.clicked.connect(self.show_history)
 
-        layout.addWidget(scroll_area)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.tickets_list)
+        layout.addWidget(self.history_button)
         self.setLayout(layout)
 
         # Загрузка билетов
-        self.load_tickets()
-    def load_tickets(self):
-        """Загружает список билетов пользователя и отображает их."""
-        self.cursor.execute("""
-        SELECT movies.title, schedules.date, schedules.time, schedules.hall, tickets.quantity
-        FROM tickets
-        JOIN schedules ON tickets.schedule_id = schedules.id
-        JOIN movies ON schedules.movie_id = movies.id
-        WHERE tickets.user_id = ?
-        """, (self.user_id,))
-        tickets = self.cursor.fetchall()
-
-        # Очистка контейнера
-        while self.tickets_container.count():
-            child = self.tickets_container.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-
-        # Создание карточек для каждого билета
-        for ticket in tickets:
-            container = QHBoxLayout()
-            movie_title, date, time, hall, quantity = ticket
-            ticket_card = QFrame()
-            ticket_layout = QVBoxLayout()
-            ticket_layout.setSpacing(5)
-
-            # Заголовок фильма
-            movie_label = QLabel(movie_title)
-            movie_label.setObjectName("ticket-title")
-            ticket_layout.addWidget(movie_label)
-
-            # Дата и время
-            date_label = QLabel(f"Дата: {date}")
-            time_label = QLabel(f"Время: {time}")
-            ticket_layout.addWidget(date_label)
-            ticket_layout.addWidget(time_label)
-
-            # Зал
-            hall_label = QLabel(f"Зал: {hall}")
-            ticket_layout.addWidget(hall_label)
-
-            # Количество билетов
-            quantity_label = QLabel(f"Билетов: {quantity}")
-            quantity_label.setObjectName("info")
-            quantity_label.setAlignment(Qt.AlignmentFlag.AlignTop)
-            container.addLayout(ticket_layout, 1)
-            container.addStretch()
-            container.addWidget(quantity_label)
-            ticket_card.setLayout(container)
-            self.tickets_container.addWidget(ticket_card)
+        self.model.fetchMore()
+
+    def on_tickets_loaded(self):
+        if self.model.rowCount():
+            self.status_label.hide()
+        else:
+            self.status_label.setText("Билетов пока нет")
+            self.status_label.show()
+        # Если страница не заполнила список, прокрутки не будет: подгружаем сразу
+        QTimer.singleShot(0, self.fill_viewport)
+
+    def fill_viewport(self):
+        if self.tickets_list.verticalScrollBar().maximum() == 0 and self.model.canFetchMore():
+            self.model.fetchMore()
+
+    def on_load_failed(self, error):
+        self.status_label.setText(f"Не удалось загрузить билеты: {error}")
+        self.status_label.show()
+
+    def show_history(self):
+        self.history_button.hide()
+        self.model.show_history()
 
     def refresh_tickets(self):
-        """Обновление списка билетов."""
-        self.load_tickets()
+        """Обновление списка билетов: меняются только изменившиеся строки."""
+        self.model.refresh()
 
 class AuthWindow(QWidget):
     def __init__(self):
         super().__init__()
-        self.conn = db.create_connection()
+        self.setObjectName("authWindow")
+        self.repo = repository.CinemaRepository()
         self.setFixedSize(400, 300)
         utils.center_window(self)
         self.setWindowTitle("Авторизация и Регистрация")
 
-        self.setStyleSheet(
-            init_base_stylesheet()
-            + """
-            #submit_button {
-                background-color: yellow;
-                margin-top: 10px;
-            }
-
-            #submit_button:hover {  
-                background-color: #FF8C00;
-            }
-
-            #submit_button:pressed {
-                background-color: #FF8C00;
-            }
-            #switch_button {
-                background-color: white;
-                color: black;
-            }
-            """
-        )
 
         self.setContentsMargins(10, 10, 10, 10)
 
@@ -936,8 +1008,8 @@ class AuthWindow(QWidget):
 
         self.stack = QStackedWidget()
         self.stack.setContentsMargins(0, 0, 0, 0)
-        self.stack.addWidget(LoginFormWidget(self.conn, self))
-        self.stack.addWidget(RegisterFormWidget(self.conn, self))
+        self.stack.addWidget(LoginFormWidget(self.repo, self))
+        self.stack.addWidget(RegisterFormWidget(self.repo, self))
         
         layout.addWidget(self.stack)
         self.setLayout(layout)
@@ -946,11 +1018,11 @@ class AuthWindow(QWidget):
         self.stack.setCurrentIndex(number)
 
 class LoginFormWidget(QWidget):
-    def __init__(self, conn, parent):
+    def __init__(self, repo, parent):
         super().__init__()
-        self.conn = conn
-        self.db_cursor = conn.cursor()
+        self.repo = repo
         self.parent = parent
+        self.queries = workers.AsyncQueries(self)
 
         form_layout = QFormLayout()
         fields_layout = QGridLayout()
@@ -963,10 +1035,10 @@ class LoginFormWidget(QWidget):
         self.password_input.setEchoMode(QLineEdit.EchoMode.Password)
 
 
-        submit_button = QPushButton('Войти')
-        submit_button.clicked.connect(self.login)
+        self.submit_button = QPushButton('Войти')
+        self.submit_button.clicked.connect(self.login)
 
-        submit_button.setObjectName("submit_button")
+        self.submit_button.setObjectName("submit_button")
 
         open_register_button = QPushButton('Создать аккаунт')
         open_register_button.clicked.connect(self.open_register_window)
@@ -978,7 +1050,7 @@ class LoginFormWidget(QWidget):
         fields_layout.addWidget(password_label, 1, 0)
         fields_layout.addWidget(self.password_input, 1, 1)
 
-        fields_layout.addWidget(submit_button, 2, 0, 1, 2)
+        fields_layout.addWidget(self.submit_button, 2, 0, 1, 2)
         fields_layout.addWidget(open_register_button, 3, 0, 1, 2)
       
 
@@ -995,33 +1067,44 @@ class LoginFormWidget(QWidget):
             QMessageBox.warning(self, "Ошибка", "Заполните все поля!")
             return
         
-        self.db_cursor.execute("""
-        SELECT id, username, role FROM users WHERE username = ? AND password = ?
-        """, (username, password))
-        user = self.db_cursor.fetchone()
+        self.submit_button.setEnabled(False)
+        self.queries.run(
+            services.authenticate, self.repo, username, password,
+            on_result=self.on_authenticated, on_error=self.on_login_failed,
+        )
 
+    def on_authenticated(self, user):
+        self.submit_button.setEnabled(True)
         if user:
-            QMessageBox.information(self, "Успех", f"Добро пожаловать, {username}!")
+            QMessageBox.information(self, "Успех", f"Добро пожаловать, {user.username}!")
             self.open_main_window(user)
         else:
             QMessageBox.warning(self, "Ошибка", "Неверное имя пользователя, пароль или роль.")
 
-   
+    def on_login_failed(self, error):
+        self.submit_button.setEnabled(True)
+        QMessageBox.critical(self, "Ошибка", f"Не удалось выполнить вход: {error}")
+
     def open_main_window(self, user):
         """Открытие основного окна после авторизации."""
+        started = time.perf_counter()
+        profiling.mark('login')
         self.parent.close()
-        CinemaApp(user).show()
+        with profiling.phase('cinema_app'):
+            # Окно без родителя живёт, пока на него есть ссылка из Python
+            self.main_window = CinemaApp(user, login_started=started)
+            self.main_window.show()
 
     def open_register_window(self):
         self.parent.switch_window(1)
 
 
 class RegisterFormWidget(QWidget):
-    def __init__(self, conn, parent):
+    def __init__(self, repo, parent):
         super().__init__()
-        self.conn = conn
+        self.repo = repo
         self.parent = parent
-        self.db_cursor = conn.cursor()
+        self.queries = workers.AsyncQueries(self)
 
         form_layout = QFormLayout()
         fields_layout = QGridLayout()
@@ -1037,10 +1120,10 @@ class RegisterFormWidget(QWidget):
         self.role_combobox = QComboBox()
         self.role_combobox.addItems(db.roles)
 
-        submit_button = QPushButton('Создать аккаунт')
-        submit_button.clicked.connect(self.register)
+        self.submit_button = QPushButton('Создать аккаунт')
+        self.submit_button.clicked.connect(self.register)
 
-        submit_button.setObjectName("submit_button")
+        self.submit_button.setObjectName("submit_button")
 
         open_login_button = QPushButton('Войти')
         open_login_button.clicked.connect(self.open_login_window)
@@ -1054,7 +1137,7 @@ class RegisterFormWidget(QWidget):
         fields_layout.addWidget(role_label, 2, 0)
         fields_layout.addWidget(self.role_combobox, 2, 1)
 
-        fields_layout.addWidget(submit_button, 3, 0, 1, 2)
+        fields_layout.addWidget(self.submit_button, 3, 0, 1, 2)
         fields_layout.addWidget(open_login_button, 4, 0, 1, 2)
 
         form_layout.setLayout(1, QFormLayout.ItemRole.SpanningRole, fields_layout)
@@ -1071,23 +1154,52 @@ class RegisterFormWidget(QWidget):
             QMessageBox.warning(self, "Ошибка", "Заполните все поля!")
             return
 
-        self.db_cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        if self.db_cursor.fetchone():
+        self.submit_button.setEnabled(False)
+        self.queries.run(
+            services.register, self.repo, username, password, role,
+            on_result=self.on_registered, on_error=self.on_register_failed,
+        )
+
+    def on_registered(self, user_id):
+        self.submit_button.setEnabled(True)
+        if user_id is None:
             QMessageBox.warning(self, "Ошибка", "Имя пользователя уже занято.")
             return
-
-        self.db_cursor.execute("""
-        INSERT INTO users (username, password, role) VALUES (?, ?, ?)
-        """, (username, password, role))
-        self.conn.commit()
         QMessageBox.information(self, "Успех", "Регистрация успешно завершена!")
 
+    def on_register_failed(self, error):
+        self.submit_button.setEnabled(True)
+        QMessageBox.critical(self, "Ошибка", f"Не удалось зарегистрироваться: {error}")
+
     def open_login_window(self):
         self.parent.switch_window(0)
 
-app = QApplication(sys.argv)
-db.setup_database()
-# db.seed_database()
-auth_window = AuthWindow()
-auth_window.show()
-sys.exit(app.exec())
\ No newline at end of file
+def main(argv=None):
+    """Запуск приложения; возвращает код выхода."""
+    profiling.mark('imports')
+    with profiling.phase('qapplication'):
+        app = QApplication(sys.argv if argv is None else argv)
+    with profiling.phase('theme'):
+        theme.apply(app)
+    with profiling.phase('db_open'):
+        db.get_connection()
+    with profiling.phase('db_migrate'):
+        db.setup_database()
+    # db.seed_database()
+    with profiling.phase('auth_window'):
+        auth_window = AuthWindow()
+        auth_window.show()
+    QTimer.singleShot(0, lambda: profiling.mark('auth_window_first_frame'))
+    exit_code = app.exec()
+    workers.pool().waitForDone()
+    posters.cache.shutdown()
+    db.manager.close_all()
+    if theme.metrics is not None:
+        theme.print_report()
+    profiling.finish()
+    return exit_code
+
+
+# Процессы пула импорта (spawn) импортируют этот модуль заново: запуск только при прямом вызове
+if __name__ == '__main__':
+    sys.exit(main())
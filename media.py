@@ -0,0 +1,289 @@
+"""Медиахранилище: постеры и трейлеры, адресуемые по содержимому.
+
+Загруженный файл копируется в MEDIA_DIR под именем из SHA-256 его
+содержимого, поэтому один и тот же файл хранится один раз. Для постеров
+рядом сохраняются готовые варианты для карточки афиши и окна фильма,
+и интерфейс читает только их. Трейлеры переносятся самым дешёвым
+способом, который позволяет файловая система, и учитываются в таблице
+media_files. Пути в базе относительные, от каталога приложения.
+
+Примеры (для фильмов, добавленных до появления хранилища):
+    python media.py ingest-posters
+    python media.py ingest-trailers
+    python media.py verify
+"""
+import argparse
+import errno
+import hashlib
+import os
+import shutil
+import sys
+import threading
+
+import db
+import posters
+
+MEDIA_DIR = 'media'
+HASH_CHUNK = 1024 * 1024
+
+# Варианты постера: суффикс файла и размер
+POSTER_VARIANTS = (
+    ('card', posters.CARD_SIZE),
+    ('details', posters.DETAILS_SIZE),
+)
+
+
+# ioctl FICLONE из linux/fs.h: копия с общими блоками (btrfs, xfs)
+FICLONE = 0x40049409
+
+TRAILER = 'trailer'
+
+
+class MediaError(Exception):
+    """Файл нельзя поместить в хранилище."""
+
+
+class PosterAsset:
+    __slots__ = ('digest', 'original', 'card', 'details')
+
+    def __init__(self, digest, original, card, details):
+        self.digest = digest
+        self.original = original
+        self.card = card
+        self.details = details
+
+    def __repr__(self):
+        return f"PosterAsset({self.digest[:12]}, card={self.card!r}, details={self.details!r})"
+
+
+def file_digest(path):
+    """SHA-256 содержимого файла, читаемого блоками."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _store_path(root, kind, digest, suffix):
+    return os.path.join(root, kind, digest[:2], digest + suffix)
+
+
+def _reflink(source, target):
+    import fcntl
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def _copy_file_range(source, target):
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+            if copied == 0:
+                raise OSError(errno.EIO, "copy_file_range остановился до конца файла")
+            remaining -= copied
+
+
+def clone_file(source, target):
+    """Копирует source в target самым дешёвым доступным способом и возвращает его название.
+
+    По порядку: reflink (общие блоки, изменения копий независимы), жёсткая
+    ссылка (файлы хранилища не изменяются), copy_file_range внутри ядра,
+    shutil.copyfile (sendfile на Linux).
+    """
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    methods = [('link', os.link), ('copyfile', shutil.copyfile)]
+    if hasattr(os, 'copy_file_range'):
+        methods.insert(1, ('copy_file_range', _copy_file_range))
+    if sys.platform.startswith('linux'):
+        methods.insert(0, ('reflink', _reflink))
+    for name, method in methods:
+        try:
+            method(source, tmp_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if name == 'copyfile':
+                raise
+            continue
+        os.replace(tmp_path, target)
+        return name
+
+
+def _atomic_copy(source, target):
+    # Копия под временным именем: параллельная загрузка того же файла не увидит недописанный
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+def ingest_poster(source, root=MEDIA_DIR):
+    """Помещает постер в хранилище и создаёт его варианты; возвращает PosterAsset.
+
+    Повторная загрузка того же изображения (под любым именем) не копирует
+    файл и не пересчитывает варианты. Выполняется в рабочем потоке.
+    """
+    if not os.path.isfile(source):
+        raise MediaError(f"Файл {source} не найден")
+    digest = file_digest(source)
+    extension = os.path.splitext(source)[1].lower() or '.img'
+    original = _store_path(root, 'originals', digest, extension)
+    if not os.path.exists(original):
+        _atomic_copy(source, original)
+        posters.cache.invalidate(original)
+
+    variants = {}
+    for name, size in POSTER_VARIANTS:
+        path = _store_path(root, 'posters', digest, f'_{name}.png')
+        if not os.path.exists(path):
+            image = posters.read_scaled(original, size)
+            if image.isNull():
+                raise MediaError(f"Не удалось прочитать изображение {source}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            if not image.save(tmp_path, 'PNG'):
+                raise MediaError(f"Не удалось сохранить {path}")
+            os.replace(tmp_path, path)
+            posters.cache.invalidate(path)
+        variants[name] = path
+    return PosterAsset(digest, original, variants['card'], variants['details'])
+
+
+def ingest_missing_posters(repo, root=MEDIA_DIR):
+    """Варианты для фильмов без них; возвращает (обработано путей, пропущено путей).
+
+    Фильмы с одним и тем же исходным файлом обрабатываются одним проходом.
+    """
+    assets, skipped = [], 0
+    for poster_path in repo.posters_without_variants():
+        try:
+            asset = ingest_poster(poster_path, root)
+        except MediaError as e:
+            print(e, file=sys.stderr)
+            skipped += 1
+            continue
+        assets.append((poster_path, asset))
+    repo.set_poster_variants(assets)
+    return len(assets), skipped
+
+
+def ingest_trailer(source, repo, root=MEDIA_DIR):
+    """Помещает трейлер в хранилище и возвращает repository.MediaFile.
+
+    Файл читается блоками для хеша, затем переносится через clone_file.
+    Если такое содержимое уже есть в media_files, копия не создаётся.
+    Выполняется в рабочем потоке.
+    """
+    if not os.path.isfile(source):
+        raise MediaError(f"Файл {source} не найден")
+    digest = file_digest(source)
+    known = repo.find_media_file(digest)
+    if known is not None and os.path.exists(known.path):
+        return known
+
+    extension = os.path.splitext(source)[1].lower() or '.video'
+    target = _store_path(root, 'trailers', digest, extension)
+    if not os.path.exists(target):
+        try:
+            clone_file(source, target)
+        except OSError as e:
+            raise MediaError(f"Не удалось скопировать {source}: {e}") from e
+    size = os.path.getsize(target)
+    repo.add_media_file(digest, target, size, TRAILER)
+    return repo.find_media_file(digest)
+
+
+def ingest_missing_trailers(repo, root=MEDIA_DIR):
+    """Импортирует трейлеры, на которые фильмы ссылаются вне хранилища."""
+    paths, skipped = [], 0
+    for trailer_path in repo.trailers_outside_store():
+        try:
+            media_file = ingest_trailer(trailer_path, repo, root)
+        except MediaError as e:
+            print(e, file=sys.stderr)
+            skipped += 1
+            continue
+        paths.append((trailer_path, media_file.path))
+    repo.set_trailers(paths)
+    return len(paths), skipped
+
+
+def verify(repo):
+    """Пересчитывает хеши файлов хранилища; возвращает список повреждённых или пропавших."""
+    broken = []
+    for media_file in repo.list_media_files():
+        try:
+            intact = file_digest(media_file.path) == media_file.digest
+        except OSError:
+            intact = False
+        if not intact:
+            broken.append(media_file)
+    return broken
+
+
+def _path_digest(path):
+    """SHA-256 из имени файла хранилища или None для файлов вне его."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    if len(name) == 64 and all(c in '0123456789abcdef' for c in name):
+        return name
+    return None
+
+
+def resolve(path, repo):
+    """Абсолютный путь к файлу медиа или None, если файла нет.
+
+    Для файлов хранилища путь берётся из записи media_files по хешу в имени,
+    поэтому фильм находит трейлер, даже если запись указывает на другой
+    экземпляр того же содержимого. Выполняется в рабочем потоке.
+    """
+    if not path:
+        return None
+    digest = _path_digest(path)
+    media_file = repo.find_media_file(digest) if digest else None
+    if media_file is not None:
+        path = media_file.path
+    path = os.path.abspath(path)
+    return path if os.path.isfile(path) else None
+
+
+def main(argv=None):
+    import repository
+    from PyQt6.QtGui import QGuiApplication
+
+    parser = argparse.ArgumentParser(description="Медиахранилище кинотеатра")
+    parser.add_argument('--db', default=db.DB_PATH, help="путь к базе")
+    parser.add_argument('--root', default=MEDIA_DIR, help="каталог хранилища")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('ingest-posters', help="создать варианты постеров для фильмов без них")
+    commands.add_parser('ingest-trailers', help="перенести трейлеры фильмов в хранилище")
+    commands.add_parser('verify', help="проверить хеши файлов хранилища")
+    args = parser.parse_args(argv)
+
+    # Плагины форматов изображений Qt доступны только при созданном приложении
+    app = QGuiApplication.instance() or QGuiApplication(['media.py', '-platform', 'offscreen'])
+    db.manager = db.ConnectionManager(args.db)
+    try:
+        db.setup_database()
+        repo = repository.CinemaRepository()
+        if args.command == 'ingest-posters':
+            done, skipped = ingest_missing_posters(repo, args.root)
+            print(f"Постеров обработано: {done}, пропущено: {skipped}")
+        elif args.command == 'ingest-trailers':
+            done, skipped = ingest_missing_trailers(repo, args.root)
+            print(f"Трейлеров перенесено: {done}, пропущено: {skipped}")
+        elif args.command == 'verify':
+            broken = verify(repo)
+            for media_file in broken:
+                print(f"Повреждён или отсутствует: {media_file.path}", file=sys.stderr)
+            print(f"Проверено файлов: {len(repo.list_media_files())}, с ошибками: {len(broken)}")
+            return 1 if broken else 0
+    finally:
+        db.manager.close_all()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
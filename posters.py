@@ -0,0 +1,356 @@
+"""Кэш уменьшенных постеров.
+
+Два уровня: в памяти — QPixmap в LRU с ограничением по байтам, на диске —
+готовые миниатюры в DISK_CACHE_DIR. Ключ включает путь к исходному файлу,
+его mtime и размер, а также целевой размер миниатюры, поэтому изменённый
+постер не попадёт в кэш по старому ключу. mtime и размер читаются один
+раз на путь и запоминаются, чтобы отрисовка карточек не обращалась к
+файловой системе; медиахранилище сбрасывает их через invalidate() при
+записи файла. Повторное открытие афиши или карточки фильма не требует
+декодирования исходного изображения.
+
+Промах по памяти можно обработать асинхронно: request() ставит чтение
+в отдельный пул потоков и сразу возвращает None, а по готовности кэш
+испускает loaded(key). QImageReader декодирует постер сразу в целевом
+размере, без полноразмерной копии в памяти.
+"""
+import hashlib
+import os
+import threading
+import traceback
+from collections import OrderedDict
+
+from PyQt6.QtCore import QObject, QRunnable, QSize, Qt, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPixmap
+
+DISK_CACHE_DIR = os.path.join('.cache', 'posters')
+MEMORY_BUDGET = 48 * 1024 * 1024
+DISK_BUDGET = 256 * 1024 * 1024
+MAX_DECODE_THREADS = 2
+
+# Приоритеты задач пула: видимые карточки раньше предзагрузки
+PRIORITY_VISIBLE = 1
+PRIORITY_PREFETCH = 0
+
+# Размеры миниатюр в интерфейсе
+CARD_SIZE = QSize(200, 149)
+DETAILS_SIZE = QSize(400, 300)
+
+
+def _source_key(path):
+    """Путь, mtime и размер исходного файла одной строкой или None, если файла нет."""
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return f'{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}'
+
+
+def fits(path, size):
+    """Изображение в path уже вписывается в size и его не нужно уменьшать."""
+    source = QImageReader(path).size()
+    return source.isValid() and source.width() <= size.width() and source.height() <= size.height()
+
+
+def read_scaled(path, size):
+    """QImage из path, декодированный сразу в размере, вписанном в size.
+
+    QImageReader уменьшает изображение при чтении, поэтому полноразмерная
+    копия не создаётся. Пустой QImage, если файл не читается.
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    source = reader.size()
+    if source.isValid():
+        reader.setScaledSize(source.scaled(size, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    return image if not image.isNull() else QImage()
+
+
+_UNKNOWN = object()
+
+
+def _pixmap_bytes(pixmap):
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+class DecodeSignals(QObject):
+    finished = pyqtSignal(str, QImage)
+
+
+class DecodeTask(QRunnable):
+    """Задача пула: миниатюра с диска или из исходного файла."""
+
+    def __init__(self, cache, path, size, key):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.cache = cache
+        self.path = path
+        self.size = size
+        self.key = key
+        self.signals = DecodeSignals()
+        self.cancelled = False
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            image = self.cache.image(self.path, self.size, self.key)
+        except Exception:
+            traceback.print_exc()
+            image = QImage()
+        self.signals.finished.emit(self.key, image)
+
+
+class PosterCache(QObject):
+    """Миниатюры постеров: LRU в памяти перед кэшем файлов на диске."""
+
+    loaded = pyqtSignal(str)
+
+    def __init__(self, directory=DISK_CACHE_DIR, memory_budget=MEMORY_BUDGET, disk_budget=DISK_BUDGET):
+        super().__init__()
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = None
+        # Диск может заполняться из нескольких потоков
+        self._disk_lock = threading.Lock()
+        # Счётчики увеличиваются и из DecodeTask в рабочих потоках
+        self._counters_lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            ('memory_hits', 'disk_hits', 'decodes', 'missing', 'memory_evictions', 'disk_evictions',
+             'direct_reads', 'requests', 'cancelled'), 0)
+        self._pending = {}
+        self._pool = None
+        # Путь -> результат _source_key; заполняется при первом обращении к пути
+        self._sources = {}
+
+    def key(self, path, size):
+        """Ключ миниатюры path в размере size или None, если файла нет."""
+        if not path:
+            return None
+        source = self._sources.get(path, _UNKNOWN)
+        if source is _UNKNOWN:
+            source = self._sources[path] = _source_key(path)
+        return f'{source}|{size.width()}x{size.height()}' if source is not None else None
+
+    def invalidate(self, path=None):
+        """Забывает mtime и размер path (без path — всех файлов): файл записан заново."""
+        if path is None:
+            self._sources.clear()
+        else:
+            self._sources.pop(path, None)
+
+    def pixmap(self, path, size):
+        """Миниатюра постера не больше size с сохранением пропорций; пустой QPixmap, если файла нет."""
+        key = self.key(path, size)
+        if key is None:
+            self._count('missing')
+            return QPixmap()
+        pixmap = self.cached(key)
+        if pixmap is None:
+            image = self.image(path, size, key)
+            pixmap = QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+            self.store(key, pixmap)
+        return pixmap
+
+    def request(self, path, size, priority=PRIORITY_VISIBLE):
+        """Миниатюра из памяти или None, если она ещё читается в фоне.
+
+        Для отсутствующего файла сразу возвращается пустой QPixmap.
+        Когда миниатюра будет готова, испускается loaded(key).
+        """
+        key = self.key(path, size)
+        if key is None:
+            self._count('missing')
+            return QPixmap()
+        pixmap = self.cached(key)
+        if pixmap is not None:
+            return pixmap
+        task = self._pending.get(key)
+        if task is None:
+            task = DecodeTask(self, path, size, key)
+            task.signals.finished.connect(self._on_decoded)
+            self._pending[key] = task
+            self._count('requests')
+            self.pool().start(task, priority)
+        return None
+
+    def prefetch(self, path, size):
+        """Фоновая загрузка миниатюры, которая понадобится позже."""
+        key = self.key(path, size)
+        if key is not None and key not in self._memory and key not in self._pending:
+            self.request(path, size, PRIORITY_PREFETCH)
+        return key
+
+    def retain(self, keys):
+        """Отменяет ещё не начатые загрузки, ключей которых нет в keys."""
+        keys = set(keys)
+        for key, task in list(self._pending.items()):
+            if key not in keys and self.pool().tryTake(task):
+                task.cancelled = True
+                del self._pending[key]
+                self._count('cancelled')
+
+    def pool(self):
+        if self._pool is None:
+            self._pool = QThreadPool(self)
+            self._pool.setMaxThreadCount(MAX_DECODE_THREADS)
+        return self._pool
+
+    def shutdown(self):
+        """Отмена очереди и ожидание выполняющихся задач перед выходом."""
+        if self._pool is not None:
+            self._pool.clear()
+            self._pool.waitForDone()
+        self._pending.clear()
+
+    def _on_decoded(self, key, image):
+        task = self._pending.pop(key, None)
+        if task is None or task.cancelled:
+            return
+        self.store(key, QPixmap.fromImage(image) if not image.isNull() else QPixmap())
+        self.loaded.emit(key)
+
+    def cached(self, key):
+        """QPixmap из памяти или None."""
+        pixmap = self._memory.get(key)
+        if pixmap is not None:
+            self._memory.move_to_end(key)
+            self._count('memory_hits')
+        return pixmap
+
+    def store(self, key, pixmap):
+        """Кладёт QPixmap в память, вытесняя давно не использованные миниатюры."""
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= _pixmap_bytes(old)
+        self._memory[key] = pixmap
+        self._memory_bytes += _pixmap_bytes(pixmap)
+        while self._memory_bytes > self.memory_budget and len(self._memory) > 1:
+            _key, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= _pixmap_bytes(evicted)
+            self._count('memory_evictions')
+
+    def image(self, path, size, key=None):
+        """QImage миниатюры с диска, а при промахе — из исходного файла с сохранением на диск.
+
+        Работает только с QImage, поэтому может вызываться из рабочих потоков.
+        """
+        key = key or self.key(path, size)
+        if key is None:
+            return QImage()
+        # Готовые варианты из медиахранилища уже не больше нужного размера
+        if fits(path, size):
+            self._count('direct_reads')
+            return QImage(path)
+        disk_path = self._disk_path(key)
+        image = QImage(disk_path)
+        if not image.isNull():
+            self._count('disk_hits')
+            self._touch(disk_path)
+            return image
+        image = self.decode(path, size)
+        if not image.isNull():
+            self._save(disk_path, image)
+        return image
+
+    def decode(self, path, size):
+        """Декодирование исходного постера сразу в размере, вписанном в size."""
+        self._count('decodes')
+        return read_scaled(path, size)
+
+    def _count(self, name):
+        with self._counters_lock:
+            self._counters[name] += 1
+
+    def _disk_path(self, key):
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name[:2], name + '.png')
+
+    @staticmethod
+    def _touch(disk_path):
+        # Время изменения файла служит меткой использования для вытеснения с диска
+        try:
+            os.utime(disk_path)
+        except OSError:
+            pass
+
+    def _save(self, disk_path, image):
+        os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+        # Запись через временный файл: параллельный читатель не увидит недописанный PNG
+        tmp_path = f'{disk_path}.{threading.get_ident()}.tmp'
+        if not image.save(tmp_path, 'PNG'):
+            return
+        os.replace(tmp_path, disk_path)
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _path, size, _mtime in self._disk_entries())
+            else:
+                self._disk_bytes += os.path.getsize(disk_path)
+            if self._disk_bytes > self.disk_budget:
+                self._prune_disk()
+
+    def _disk_entries(self):
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _prune_disk(self):
+        """Удаляет давно не использованные файлы, пока кэш не станет меньше 90% бюджета."""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        self._disk_bytes = sum(size for _path, size, _mtime in entries)
+        for path, size, _mtime in entries:
+            if self._disk_bytes <= self.disk_budget * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._disk_bytes -= size
+            self._count('disk_evictions')
+
+    def stats(self):
+        """Счётчики попаданий и промахов, занятая память и место на диске."""
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _path, size, _mtime in self._disk_entries())
+            disk_bytes = self._disk_bytes
+        with self._counters_lock:
+            counters = dict(self._counters)
+        return {
+            **counters,
+            'memory_entries': len(self._memory),
+            'memory_bytes': self._memory_bytes,
+            'memory_budget': self.memory_budget,
+            'disk_bytes': disk_bytes,
+            'disk_budget': self.disk_budget,
+        }
+
+    def clear(self, disk=False):
+        """Очистка памяти, а при disk=True — и файлов на диске."""
+        self._memory.clear()
+        self._memory_bytes = 0
+        self._sources.clear()
+        if disk:
+            with self._disk_lock:
+                for path, _size, _mtime in list(self._disk_entries()):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._disk_bytes = 0
+
+
+cache = PosterCache()
+
+
+def pixmap(path, size):
+    return cache.pixmap(path, size)
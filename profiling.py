@@ -0,0 +1,202 @@
+"""Замер времени запуска приложения по фазам.
+
+Включается переменной окружения или флагом командной строки:
+    CINEMA_PROFILE=startup.json python main.py
+    python main.py --profile-startup[=startup.json] [--profile-imports]
+
+Фазы отмечаются вызовами mark() и phase() в коде запуска; время
+отсчитывается от импорта этого модуля, то есть от начала main.py.
+Отчёт записывается в JSON и печатается таблицей один раз: после первой
+отрисовки афиши или при выходе. С --profile-imports (CINEMA_PROFILE_IMPORTS=1)
+в отчёт добавляется время импорта каждого модуля.
+Без включения все функции модуля ничего не делают.
+"""
+import importlib.abc
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+PROFILE_ENV = 'CINEMA_PROFILE'
+IMPORTS_ENV = 'CINEMA_PROFILE_IMPORTS'
+PROFILE_FLAG = '--profile-startup'
+IMPORTS_FLAG = '--profile-imports'
+DEFAULT_REPORT = 'startup-profile.json'
+TOP_IMPORTS = 25
+
+_started = time.perf_counter()
+
+
+def _elapsed_ms():
+    return (time.perf_counter() - _started) * 1000
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """Искатель модулей, оборачивающий загрузчики замером exec_module.
+
+    Для каждого модуля считается полное время (с вложенными импортами)
+    и собственное — без них.
+    """
+
+    def __init__(self):
+        self.modules = {}
+        self._stack = []
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def run(self, name, exec_module, module):
+        self._stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            exec_module(module)
+        finally:
+            total = time.perf_counter() - started
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += total
+            self.modules[name] = (total * 1000, (total - children) * 1000)
+
+    def report(self, limit=TOP_IMPORTS):
+        rows = sorted(self.modules.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        return [{'module': name, 'total_ms': round(total, 2), 'self_ms': round(own, 2)}
+                for name, (total, own) in rows]
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader, timer):
+        self._loader = loader
+        self._timer = timer
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._timer.run(module.__name__, self._loader.exec_module, module)
+
+    def __getattr__(self, name):
+        # get_data, get_resource_reader и прочее — как у исходного загрузчика
+        return getattr(self._loader, name)
+
+
+class StartupProfile:
+    """Отметки фаз запуска и запись отчёта."""
+
+    def __init__(self, report_path, imports=False):
+        self.report_path = report_path
+        self.marks = []
+        self.phases = []
+        self.imports = None
+        self.written = False
+        if imports:
+            self.imports = ImportTimer()
+            sys.meta_path.insert(0, self.imports)
+
+    def mark(self, name):
+        self.marks.append((name, _elapsed_ms()))
+
+    def add_phase(self, name, started_ms, finished_ms):
+        self.phases.append((name, started_ms, finished_ms - started_ms))
+
+    def report(self):
+        report = {
+            'marks': [{'name': name, 'at_ms': round(at, 1)} for name, at in self.marks],
+            'phases': [{'name': name, 'start_ms': round(start, 1), 'duration_ms': round(duration, 1)}
+                       for name, start, duration in self.phases],
+        }
+        if self.imports is not None:
+            report['imports'] = self.imports.report()
+        return report
+
+    def write(self):
+        if self.written:
+            return
+        self.written = True
+        if self.imports is not None and self.imports in sys.meta_path:
+            sys.meta_path.remove(self.imports)
+        report = self.report()
+        with open(self.report_path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        print(format_table(report))
+        print(f"Отчёт о запуске записан в {self.report_path}")
+
+
+def format_table(report):
+    lines = [f"{'Фаза':<32} {'начало, мс':>12} {'длит., мс':>12}"]
+    for phase in report['phases']:
+        lines.append(f"{phase['name']:<32} {phase['start_ms']:>12.1f} {phase['duration_ms']:>12.1f}")
+    previous = 0.0
+    lines.append('')
+    lines.append(f"{'Отметка':<32} {'время, мс':>12} {'+ мс':>12}")
+    for mark in report['marks']:
+        lines.append(f"{mark['name']:<32} {mark['at_ms']:>12.1f} {mark['at_ms'] - previous:>12.1f}")
+        previous = mark['at_ms']
+    if 'imports' in report:
+        lines.append('')
+        lines.append(f"{'Модуль':<32} {'всего, мс':>12} {'свое, мс':>12}")
+        for row in report['imports']:
+            lines.append(f"{row['module']:<32} {row['total_ms']:>12.1f} {row['self_ms']:>12.1f}")
+    return '\n'.join(lines)
+
+
+profile = None
+
+
+def configure(argv, environ=os.environ):
+    """Включает замер по флагам argv или переменным окружения; возвращает argv без флагов."""
+    global profile
+    report_path = environ.get(PROFILE_ENV) or None
+    imports = bool(environ.get(IMPORTS_ENV))
+    remaining = []
+    for arg in argv:
+        if arg == PROFILE_FLAG:
+            report_path = report_path or DEFAULT_REPORT
+        elif arg.startswith(PROFILE_FLAG + '='):
+            report_path = arg.split('=', 1)[1]
+        elif arg == IMPORTS_FLAG:
+            imports = True
+        else:
+            remaining.append(arg)
+    if report_path == '1':
+        report_path = DEFAULT_REPORT
+    if imports and not report_path:
+        report_path = DEFAULT_REPORT
+    if report_path and profile is None:
+        profile = StartupProfile(report_path, imports)
+    return remaining
+
+
+def enabled():
+    return profile is not None
+
+
+def mark(name):
+    if profile is not None:
+        profile.mark(name)
+
+
+@contextmanager
+def phase(name):
+    if profile is None:
+        yield
+        return
+    started = _elapsed_ms()
+    try:
+        yield
+    finally:
+        profile.add_phase(name, started, _elapsed_ms())
+
+
+def finish():
+    """Записывает отчёт, если замер включён и отчёт ещё не записан."""
+    if profile is not None:
+        profile.write()
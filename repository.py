@@ -0,0 +1,827 @@
+"""Доступ к данным кинотеатра.
+
+Весь SQL приложения собран здесь. Запросы хранятся константами, чтобы
+sqlite3 переиспользовал подготовленные выражения из кэша соединения,
+а строки возвращаются компактными объектами со __slots__ вместо кортежей.
+"""
+import datetime
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import db
+import scheduling
+import seating
+
+# Размер пачки id в одном запросе при массовых операциях
+BATCH_SIZE = 500
+
+# Сколько дней афиши держит DayCache
+DAY_CACHE_SIZE = 8
+
+# Повторы покупки, если база занята другой кассой дольше busy_timeout
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05
+
+
+class BookingError(Exception):
+    """Покупка невозможна: сеанса нет или мест не хватает."""
+
+
+class SeatsUnavailable(BookingError):
+    """Выбранные места уже заняты."""
+
+
+class Row:
+    """Базовый класс строк результата."""
+    __slots__ = ()
+
+    @classmethod
+    def factory(cls, cursor, row):
+        return cls(*row)
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+
+class User(Row):
+    __slots__ = ('id', 'username', 'role')
+
+    def __init__(self, id, username, role):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    @property
+    def is_admin(self):
+        return self.role == db.roles[1]
+
+
+class Movie(Row):
+    """Фильм в афише."""
+    __slots__ = ('id', 'title', 'poster_path', 'description')
+
+    def __init__(self, id, title, poster_path, description):
+        self.id = id
+        self.title = title
+        self.poster_path = poster_path
+        self.description = description
+
+
+class DayMovie(Row):
+    """Фильм в афише на день и времена его сеансов (ЧЧ:ММ:СС по возрастанию)."""
+    __slots__ = ('id', 'title', 'poster_path', 'description', 'times')
+
+    def __init__(self, id, title, poster_path, description, times):
+        self.id = id
+        self.title = title
+        self.poster_path = poster_path
+        self.description = description
+        self.times = times
+
+
+class MovieDetails(Row):
+    __slots__ = ('id', 'title', 'description', 'duration', 'poster_path', 'trailer_path')
+
+    def __init__(self, id, title, description, duration, poster_path, trailer_path):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.duration = duration
+        self.poster_path = poster_path
+        self.trailer_path = trailer_path
+
+
+class Session(Row):
+    """Сеанс фильма."""
+    __slots__ = ('id', 'movie_id', 'date', 'time', 'hall', 'price')
+
+    def __init__(self, id, movie_id, date, time, hall, price):
+        self.id = id
+        self.movie_id = movie_id
+        self.date = date
+        self.time = time
+        self.hall = hall
+        self.price = price
+
+
+class SessionOption(Row):
+    """Предстоящий сеанс фильма с числом свободных мест (None, если оно неизвестно)."""
+    __slots__ = ('id', 'date', 'time', 'hall', 'price', 'seats_left')
+
+    def __init__(self, id, date, time, hall, price, seats_left):
+        self.id = id
+        self.date = date
+        self.time = time
+        self.hall = hall
+        self.price = price
+        self.seats_left = seats_left
+
+    @property
+    def sold_out(self):
+        return self.seats_left is not None and self.seats_left <= 0
+
+
+class HallSession(Row):
+    """Сеанс в сетке расписания: зал, время, фильм и продано билетов."""
+    __slots__ = ('id', 'movie_id', 'title', 'date', 'time', 'hall', 'duration', 'sold')
+
+    def __init__(self, id, movie_id, title, date, time, hall, duration, sold):
+        self.id = id
+        self.movie_id = movie_id
+        self.title = title
+        self.date = date
+        self.time = time
+        self.hall = hall
+        self.duration = duration
+        self.sold = sold
+
+
+class ScheduleStats(Row):
+    """Заполненность сеанса из schedule_stats."""
+    __slots__ = ('schedule_id', 'sold', 'capacity', 'revenue')
+
+    def __init__(self, schedule_id, sold, capacity, revenue):
+        self.schedule_id = schedule_id
+        self.sold = sold
+        self.capacity = capacity
+        self.revenue = revenue
+
+    @property
+    def seats_left(self):
+        return max(self.capacity - self.sold, 0)
+
+    @property
+    def sold_out(self):
+        return self.sold >= self.capacity
+
+
+class SeatMap(Row):
+    """Размер зала сеанса и карта занятых мест."""
+    __slots__ = ('schedule_id', 'rows', 'seats_per_row', 'bitmap')
+
+    def __init__(self, schedule_id, rows, seats_per_row, bitmap):
+        self.schedule_id = schedule_id
+        self.rows = rows
+        self.seats_per_row = seats_per_row
+        self.bitmap = bytearray(bitmap) if bitmap else seating.empty_map(rows * seats_per_row)
+
+    @property
+    def capacity(self):
+        return self.rows * self.seats_per_row
+
+
+class Booking(Row):
+    """Результат покупки: билет и занятые им места."""
+    __slots__ = ('ticket_id', 'seats', 'seats_per_row')
+
+    def __init__(self, ticket_id, seats, seats_per_row):
+        self.ticket_id = ticket_id
+        self.seats = seats
+        self.seats_per_row = seats_per_row
+
+    def labels(self):
+        return [seating.label(seat, self.seats_per_row) for seat in self.seats]
+
+
+class MediaFile(Row):
+    """Файл медиахранилища."""
+    __slots__ = ('digest', 'path', 'size', 'kind')
+
+    def __init__(self, digest, path, size, kind):
+        self.digest = digest
+        self.path = path
+        self.size = size
+        self.kind = kind
+
+
+class Ticket(Row):
+    """Купленный билет вместе с данными сеанса."""
+    __slots__ = ('id', 'title', 'date', 'time', 'hall', 'quantity')
+
+    def __init__(self, id, title, date, time, hall, quantity):
+        self.id = id
+        self.title = title
+        self.date = date
+        self.time = time
+        self.hall = hall
+        self.quantity = quantity
+
+
+AUTHENTICATE = "SELECT id, username, role FROM users WHERE username = ? AND password = ?"
+FIND_USER = "SELECT id, username, role FROM users WHERE username = ?"
+INSERT_USER = "INSERT INTO users (username, password, role) VALUES (?, ?, ?)"
+
+# Карточкам афиши нужен уменьшенный вариант постера, если он есть
+LIST_MOVIES = """
+    SELECT id, title, COALESCE(poster_card_path, poster_path), description
+    FROM movies
+    ORDER BY id
+"""
+MOVIES_PAGE = """
+    SELECT id, title, COALESCE(poster_card_path, poster_path), description
+    FROM movies
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+PAGE_SIZE = 40
+SEARCH_MOVIES = """
+    SELECT movies.id, movies.title, COALESCE(movies.poster_card_path, movies.poster_path), movies.description
+    FROM movies_fts
+    JOIN movies ON movies.id = movies_fts.rowid
+    WHERE movies_fts MATCH ?
+    ORDER BY bm25(movies_fts, 10.0, 1.0)
+    LIMIT ?
+"""
+SEARCH_LIMIT = 200
+# Афиша на день: один диапазон по idx_schedules_date, строки — сеансы по времени
+MOVIES_ON_DAY = """
+    SELECT movies.id, movies.title, COALESCE(movies.poster_card_path, movies.poster_path), movies.description,
+           schedules.time
+    FROM schedules
+    JOIN movies ON movies.id = schedules.movie_id
+    WHERE schedules.date = ?
+    ORDER BY schedules.time, movies.id
+"""
+SCHEDULE_REVISION = "SELECT revision FROM schedule_revision WHERE id = 1"
+MOVIE_DETAILS = """
+    SELECT id, title, description, duration, COALESCE(poster_details_path, poster_path), trailer_path
+    FROM movies
+    WHERE id = ?
+"""
+INSERT_MOVIE = """
+    INSERT INTO movies (title, description, duration, poster_path, trailer_path, poster_card_path, poster_details_path)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+IMPORT_PROGRESS = "SELECT line, finished FROM import_progress WHERE source = ?"
+SAVE_IMPORT_PROGRESS = """
+    INSERT INTO import_progress (source, line, finished) VALUES (?, ?, ?)
+    ON CONFLICT (source) DO UPDATE SET line = excluded.line, finished = excluded.finished
+"""
+DELETE_IMPORT_PROGRESS = "DELETE FROM import_progress WHERE source = ?"
+SET_POSTER_VARIANTS = """
+    UPDATE movies
+    SET poster_path = ?, poster_card_path = ?, poster_details_path = ?
+    WHERE poster_path = ? AND poster_card_path IS NULL
+"""
+POSTERS_WITHOUT_VARIANTS = """
+    SELECT DISTINCT poster_path
+    FROM movies
+    WHERE poster_card_path IS NULL AND poster_path IS NOT NULL
+"""
+TRAILERS_OUTSIDE_STORE = """
+    SELECT DISTINCT movies.trailer_path
+    FROM movies
+    LEFT JOIN media_files ON media_files.path = movies.trailer_path
+    WHERE movies.trailer_path IS NOT NULL AND media_files.digest IS NULL
+"""
+SET_TRAILER = "UPDATE movies SET trailer_path = ? WHERE trailer_path = ?"
+
+FIND_MEDIA_FILE = "SELECT digest, path, size, kind FROM media_files WHERE digest = ?"
+LIST_MEDIA_FILES = "SELECT digest, path, size, kind FROM media_files ORDER BY path"
+INSERT_MEDIA_FILE = "INSERT OR REPLACE INTO media_files (digest, path, size, kind) VALUES (?, ?, ?, ?)"
+
+SESSIONS_FOR_MOVIE = """
+    SELECT id, movie_id, date, time, hall, price
+    FROM schedules
+    WHERE movie_id = ?
+    ORDER BY date, time
+"""
+# Выбор сеанса в окне фильма: диапазон по индексу (movie_id, date, time),
+# свободные места — из schedule_stats, без подсчёта билетов по каждому сеансу
+UPCOMING_SESSIONS = """
+    SELECT schedules.id, schedules.date, schedules.time, schedules.hall, schedules.price,
+           MAX(schedule_stats.capacity - schedule_stats.sold, 0)
+    FROM schedules
+    LEFT JOIN schedule_stats ON schedule_stats.schedule_id = schedules.id
+    WHERE schedules.movie_id = ? AND (schedules.date, schedules.time) >= (?, ?)
+    ORDER BY schedules.date, schedules.time
+    LIMIT ?
+"""
+SESSIONS_LIMIT = 200
+# Занятость зала по дням для проверки пересечений (idx_schedules_hall_date)
+HALL_SESSIONS = """
+    SELECT schedules.id, schedules.date, schedules.time, movies.duration
+    FROM schedules
+    JOIN movies ON movies.id = schedules.movie_id
+    WHERE schedules.hall = ? AND schedules.date BETWEEN ? AND ?
+"""
+# Сетка расписания: все залы за диапазон дат по idx_schedules_date
+SCHEDULE_RANGE = """
+    SELECT schedules.id, schedules.movie_id, movies.title, schedules.date, schedules.time, schedules.hall,
+           movies.duration, COALESCE(schedule_stats.sold, 0)
+    FROM schedules
+    JOIN movies ON movies.id = schedules.movie_id
+    LEFT JOIN schedule_stats ON schedule_stats.schedule_id = schedules.id
+    WHERE schedules.date BETWEEN ? AND ?
+    ORDER BY schedules.date, schedules.hall, schedules.time
+"""
+SCHEDULE_FOR_MOVE = """
+    SELECT schedules.hall, movies.duration, COALESCE(schedule_stats.sold, 0)
+    FROM schedules
+    JOIN movies ON movies.id = schedules.movie_id
+    LEFT JOIN schedule_stats ON schedule_stats.schedule_id = schedules.id
+    WHERE schedules.id = ?
+"""
+MOVE_SCHEDULE = "UPDATE schedules SET date = ?, time = ?, hall = ? WHERE id = ?"
+MOVIE_DURATION = "SELECT duration FROM movies WHERE id = ?"
+# Длительности пачки фильмов одним запросом: id передаются JSON-массивом
+MOVIE_DURATIONS = "SELECT id, duration FROM movies WHERE id IN (SELECT value FROM json_each(?))"
+HALL_EXISTS = "SELECT 1 FROM halls WHERE id = ?"
+HALL_IDS = "SELECT id FROM halls ORDER BY id"
+INSERT_SCHEDULE = "INSERT INTO schedules (movie_id, date, time, hall, price) VALUES (?, ?, ?, ?, ?)"
+SCHEDULE_STATS = "SELECT schedule_id, sold, capacity, revenue FROM schedule_stats WHERE schedule_id = ?"
+
+# Билеты пользователя страницами по ключу (дата, время, id): предстоящие
+# сеансы по возрастанию от текущего момента, прошедшие — по убыванию
+UPCOMING_TICKETS = """
+    SELECT tickets.id, movies.title, schedules.date, schedules.time, schedules.hall, tickets.quantity
+    FROM tickets
+    JOIN schedules ON tickets.schedule_id = schedules.id
+    JOIN movies ON schedules.movie_id = movies.id
+    WHERE tickets.user_id = ?
+      AND (schedules.date, schedules.time) >= (?, ?)
+      AND (schedules.date, schedules.time, tickets.id) > (?, ?, ?)
+    ORDER BY schedules.date, schedules.time, tickets.id
+    LIMIT ?
+"""
+PAST_TICKETS = """
+    SELECT tickets.id, movies.title, schedules.date, schedules.time, schedules.hall, tickets.quantity
+    FROM tickets
+    JOIN schedules ON tickets.schedule_id = schedules.id
+    JOIN movies ON schedules.movie_id = movies.id
+    WHERE tickets.user_id = ?
+      AND (schedules.date, schedules.time) < (?, ?)
+      AND (schedules.date, schedules.time, tickets.id) < (?, ?, ?)
+    ORDER BY schedules.date DESC, schedules.time DESC, tickets.id DESC
+    LIMIT ?
+"""
+TICKETS_PAGE_SIZE = 50
+INSERT_TICKET = "INSERT INTO tickets (user_id, schedule_id, quantity, seats) VALUES (?, ?, ?, ?)"
+TICKET_FOR_CANCEL = "SELECT schedule_id, quantity, seats FROM tickets WHERE id = ? AND user_id = ?"
+SEATED_TICKETS = "SELECT seats FROM tickets WHERE schedule_id = ? AND seats IS NOT NULL"
+DELETE_TICKET = "DELETE FROM tickets WHERE id = ?"
+
+SEAT_MAP = """
+    SELECT schedules.id, halls.rows, halls.seats_per_row, schedule_seats.seats
+    FROM schedules
+    JOIN halls ON schedules.hall = halls.id
+    LEFT JOIN schedule_seats ON schedule_seats.schedule_id = schedules.id
+    WHERE schedules.id = ?
+"""
+SAVE_SEAT_MAP = """
+    INSERT INTO schedule_seats (schedule_id, seats) VALUES (?, ?)
+    ON CONFLICT (schedule_id) DO UPDATE SET seats = excluded.seats
+"""
+
+
+def current_time():
+    """Текущие дата и время в формате столбцов schedules."""
+    moment = datetime.datetime.now()
+    return moment.strftime('%Y-%m-%d'), moment.strftime('%H:%M:%S')
+
+
+def fts_query(text):
+    """Запрос FTS5 из пользовательского ввода: все слова как префиксы, без операторов."""
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words) or None
+
+
+def _is_busy(error):
+    return getattr(error, 'sqlite_errorcode', None) in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED) \
+        or 'locked' in str(error)
+
+
+class CinemaRepository:
+    """Операции над базой кинотеатра.
+
+    Соединение берётся у менеджера для текущего потока при каждом вызове,
+    поэтому один экземпляр можно использовать из любых потоков.
+    """
+
+    def __init__(self, manager=None):
+        self.manager = manager or db.manager
+
+    def _cursor(self, row_class):
+        cursor = self.manager.get().cursor()
+        cursor.row_factory = row_class.factory
+        return cursor
+
+    def _fetchall(self, row_class, sql, params=()):
+        return self._cursor(row_class).execute(sql, params).fetchall()
+
+    def _fetchone(self, row_class, sql, params=()):
+        return self._cursor(row_class).execute(sql, params).fetchone()
+
+    def _insert(self, sql, params):
+        with self.manager.connection() as conn:
+            return conn.execute(sql, params).lastrowid
+
+    def _write_transaction(self, fn, *args):
+        """Выполняет fn(conn, *args) в транзакции BEGIN IMMEDIATE с повтором при SQLITE_BUSY.
+
+        Блокировка записи берётся сразу, поэтому две кассы не могут прочитать
+        одну и ту же карту мест и затем перезаписать изменения друг друга.
+        """
+        conn = self.manager.get()
+        for attempt in range(BUSY_RETRIES):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or attempt == BUSY_RETRIES - 1:
+                    raise
+                time.sleep(BUSY_BACKOFF * (2 ** attempt) * (1 + random.random()))
+                continue
+            try:
+                result = fn(conn, *args)
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            return result
+
+    # Пользователи
+
+    def authenticate(self, username, password):
+        """Пользователь с указанными логином и паролем или None."""
+        return self._fetchone(User, AUTHENTICATE, (username, password))
+
+    def find_user(self, username):
+        return self._fetchone(User, FIND_USER, (username,))
+
+    def register(self, username, password, role):
+        """Создание пользователя; возвращает его id."""
+        return self._insert(INSERT_USER, (username, password, role))
+
+    # Фильмы
+
+    def list_movies(self):
+        return self._fetchall(Movie, LIST_MOVIES)
+
+    def movies_page(self, after_id=0, limit=PAGE_SIZE):
+        """Страница афиши после фильма after_id (пагинация по ключу, без OFFSET)."""
+        return self._fetchall(Movie, MOVIES_PAGE, (after_id, limit))
+
+    def search_movies(self, text, limit=SEARCH_LIMIT):
+        """Фильмы по словам из названия и описания, лучшие совпадения первыми (bm25)."""
+        query = fts_query(text)
+        if query is None:
+            return []
+        return self._fetchall(Movie, SEARCH_MOVIES, (query, limit))
+
+    def movies_on(self, date):
+        """Фильмы с сеансами в день date (ГГГГ-ММ-ДД) по времени первого сеанса."""
+        movies = {}
+        for movie_id, title, poster_path, description, time in self.manager.get().execute(MOVIES_ON_DAY, (date,)):
+            movie = movies.get(movie_id)
+            if movie is None:
+                movie = movies[movie_id] = DayMovie(movie_id, title, poster_path, description, [])
+            movie.times.append(time)
+        return list(movies.values())
+
+    def schedule_revision(self):
+        """Номер изменения расписания; растёт при любой правке сеансов и фильмов."""
+        return self.manager.get().execute(SCHEDULE_REVISION).fetchone()[0]
+
+    def movie_details(self, movie_id):
+        return self._fetchone(MovieDetails, MOVIE_DETAILS, (movie_id,))
+
+    def add_movie(self, title, description, duration, poster_path, trailer_path, card_path=None, details_path=None):
+        """Добавляет фильм; card_path и details_path — готовые варианты постера из медиахранилища."""
+        return self._insert(
+            INSERT_MOVIE, (title, description, duration, poster_path, trailer_path, card_path, details_path))
+
+    def add_movie_with_schedule(self, movie, date, time, hall, price, buffer=scheduling.CLEANING_MINUTES):
+        """Добавляет фильм (кортеж полей как у add_movies) с первым сеансом; возвращает (id фильма, id сеанса).
+
+        Фильм и сеанс пишутся одной транзакцией: если сеанс не проходит
+        проверку расписания, ScheduleError отменяет и вставку фильма.
+        """
+        return self._write_transaction(self._add_movie_with_schedule, movie, date, time, hall, price, buffer)
+
+    def _add_movie_with_schedule(self, conn, movie, date, time, hall, price, buffer):
+        movie_id = conn.execute(INSERT_MOVIE, movie).lastrowid
+        return movie_id, self._add_schedule(conn, movie_id, date, time, hall, price, buffer)
+
+    def add_movies(self, movies, source, line, finished=False):
+        """Пачка фильмов из файла импорта source и отметка о записи строк до line.
+
+        movies — кортежи полей как у add_movie. Фильмы и отметка пишутся
+        одной транзакцией, поэтому после сбоя импорт продолжается со
+        следующей строки без дублей.
+        """
+        with self.manager.connection() as conn:
+            conn.executemany(INSERT_MOVIE, movies)
+            conn.execute(SAVE_IMPORT_PROGRESS, (source, line, int(finished)))
+
+    def import_progress(self, source):
+        """(последняя записанная строка, импорт завершён) для файла source."""
+        row = self.manager.get().execute(IMPORT_PROGRESS, (source,)).fetchone()
+        return (row[0], bool(row[1])) if row else (0, False)
+
+    def reset_import_progress(self, source):
+        with self.manager.connection() as conn:
+            conn.execute(DELETE_IMPORT_PROGRESS, (source,))
+
+    def posters_without_variants(self):
+        """Исходные пути постеров фильмов, добавленных до появления медиахранилища."""
+        return [row[0] for row in self.manager.get().execute(POSTERS_WITHOUT_VARIANTS)]
+
+    def set_poster_variants(self, assets):
+        """Записывает варианты постеров: assets — пары (исходный путь, media.PosterAsset)."""
+        with self.manager.connection() as conn:
+            conn.executemany(SET_POSTER_VARIANTS, [
+                (asset.original, asset.card, asset.details, source) for source, asset in assets])
+
+    def trailers_outside_store(self):
+        """Пути трейлеров, ещё не импортированных в медиахранилище."""
+        return [row[0] for row in self.manager.get().execute(TRAILERS_OUTSIDE_STORE)]
+
+    def set_trailers(self, paths):
+        """Заменяет пути трейлеров: paths — пары (старый путь, путь в хранилище)."""
+        with self.manager.connection() as conn:
+            conn.executemany(SET_TRAILER, [(new, old) for old, new in paths])
+
+    # Медиахранилище
+
+    def find_media_file(self, digest):
+        return self._fetchone(MediaFile, FIND_MEDIA_FILE, (digest,))
+
+    def list_media_files(self):
+        return self._fetchall(MediaFile, LIST_MEDIA_FILES)
+
+    def add_media_file(self, digest, path, size, kind):
+        with self.manager.connection() as conn:
+            conn.execute(INSERT_MEDIA_FILE, (digest, path, size, kind))
+
+    # Расписание
+
+    def sessions_for_movie(self, movie_id):
+        return self._fetchall(Session, SESSIONS_FOR_MOVIE, (movie_id,))
+
+    def upcoming_sessions(self, movie_id, now=None, limit=SESSIONS_LIMIT):
+        """Сеансы фильма не раньше now (дата, время) со свободными местами, по порядку показа."""
+        return self._fetchall(SessionOption, UPCOMING_SESSIONS, (movie_id, *(now or current_time()), limit))
+
+    def add_schedule(self, movie_id, date, time, hall, price, buffer=scheduling.CLEANING_MINUTES):
+        """Добавляет сеанс и возвращает его id.
+
+        Сеанс занимает зал на длительность фильма и уборку buffer минут.
+        Проверка и вставка идут в одной транзакции записи, поэтому два
+        администратора не поставят пересекающиеся сеансы одновременно.
+        При неверных данных или пересечении бросает scheduling.ScheduleError.
+        """
+        return self._write_transaction(self._add_schedule, movie_id, date, time, hall, price, buffer)
+
+    def _add_schedule(self, conn, movie_id, date, time, hall, price, buffer):
+        day, time = scheduling.parse_date(date), scheduling.parse_time(time)
+        movie = conn.execute(MOVIE_DURATION, (movie_id,)).fetchone()
+        if movie is None:
+            raise scheduling.ScheduleError("Фильм не найден")
+        self._check_slot(conn, day, time, hall, movie[0], buffer)
+        return conn.execute(INSERT_SCHEDULE, (movie_id, day.isoformat(), time, hall, price)).lastrowid
+
+    def _check_slot(self, conn, day, time, hall, duration, buffer, ignore=None):
+        """ScheduleError, если зала нет или он занят в это время другим сеансом."""
+        if conn.execute(HALL_EXISTS, (hall,)).fetchone() is None:
+            raise scheduling.ScheduleError(f"Зал {hall} не найден")
+        start, end = scheduling.interval(day, time, duration, buffer)
+        index = self._hall_index(conn, (hall,), day, day, buffer)
+        index.check(hall, start, end, ignore)
+
+    def move_schedule(self, schedule_id, date, time, hall, buffer=scheduling.CLEANING_MINUTES):
+        """Переносит сеанс на другие дату, время или зал с проверкой пересечений.
+
+        Зал сеанса с проданными билетами не меняется: места билетов
+        относятся к схеме зала. Бросает scheduling.ScheduleError.
+        """
+        return self._write_transaction(self._move_schedule, schedule_id, date, time, hall, buffer)
+
+    def _move_schedule(self, conn, schedule_id, date, time, hall, buffer):
+        day, time = scheduling.parse_date(date), scheduling.parse_time(time)
+        current = conn.execute(SCHEDULE_FOR_MOVE, (schedule_id,)).fetchone()
+        if current is None:
+            raise scheduling.ScheduleError("Сеанс не найден")
+        current_hall, duration, sold = current
+        if sold and hall != current_hall:
+            raise scheduling.ScheduleError("На сеанс проданы билеты: зал менять нельзя")
+        self._check_slot(conn, day, time, hall, duration, buffer, ignore=schedule_id)
+        conn.execute(MOVE_SCHEDULE, (day.isoformat(), time, hall, schedule_id))
+
+    def schedule_range(self, first_day, last_day):
+        """Сеансы всех залов с first_day по last_day включительно (даты в формате ГГГГ-ММ-ДД)."""
+        return self._fetchall(HallSession, SCHEDULE_RANGE, (first_day, last_day))
+
+    def halls(self):
+        return [hall for (hall,) in self.manager.get().execute(HALL_IDS)]
+
+    def add_schedules(self, rows, buffer=scheduling.CLEANING_MINUTES, dry_run=False, placed=None):
+        """Массовое добавление сеансов одной транзакцией.
+
+        rows — кортежи (ключ, movie_id, date, time, hall, price) с уже
+        разобранными датой и временем; ключ (например, номер строки файла)
+        возвращается в ошибках. Сеансы проверяются на известные фильмы и
+        залы и на пересечения с расписанием и друг с другом. Возвращает
+        (число добавленных, [(ключ, сообщение)]); при dry_run ничего не пишет.
+
+        placed — IntervalIndex сеансов, принятых прежними вызовами без
+        записи в базу (пробный импорт по пачкам): строки проверяются и на
+        пересечения с ними, а принятые сеансы добавляются в него.
+        """
+        return self._write_transaction(self._add_schedules, rows, buffer, dry_run, placed)
+
+    def _add_schedules(self, conn, rows, buffer, dry_run, placed=None):
+        rows = list(rows)
+        halls = {hall for (hall,) in conn.execute(HALL_IDS)}
+        durations = {}
+        for start in range(0, len(rows), BATCH_SIZE):
+            movie_ids = sorted({row[1] for row in rows[start:start + BATCH_SIZE]} - durations.keys())
+            durations.update(conn.execute(MOVIE_DURATIONS, (json.dumps(movie_ids),)))
+
+        valid = [row for row in rows if row[1] in durations and row[4] in halls]
+        index = scheduling.IntervalIndex()
+        for hall in {row[4] for row in valid}:
+            days = [row[2] for row in valid if row[4] == hall]
+            index = self._hall_index(conn, (hall,), min(days), max(days), buffer, index)
+
+        errors, inserts = [], []
+        for key, movie_id, day, time, hall, price in rows:
+            if movie_id not in durations:
+                errors.append((key, f"Фильм {movie_id} не найден"))
+                continue
+            if hall not in halls:
+                errors.append((key, f"Зал {hall} не найден"))
+                continue
+            start, end = scheduling.interval(day, time, durations[movie_id], buffer)
+            try:
+                index.check(hall, start, end)
+                if placed is not None:
+                    placed.check(hall, start, end)
+            except scheduling.HallConflict as e:
+                errors.append((key, str(e)))
+                continue
+            # Принятый сеанс занимает зал и для следующих строк файла
+            index.add(hall, start, end, -len(inserts) - 1)
+            if placed is not None:
+                placed.add(hall, start, end, key)
+            inserts.append((movie_id, day.isoformat(), time, hall, price))
+        if not dry_run:
+            conn.executemany(INSERT_SCHEDULE, inserts)
+        return len(inserts), errors
+
+    def hall_index(self, halls, first_day, last_day, buffer=scheduling.CLEANING_MINUTES):
+        """IntervalIndex занятости залов halls для сеансов с first_day по last_day."""
+        return self._hall_index(self.manager.get(), halls, first_day, last_day, buffer)
+
+    @staticmethod
+    def _hall_index(conn, halls, first_day, last_day, buffer, index=None):
+        # Соседние дни нужны для сеансов, переходящих через полночь
+        since = (first_day - datetime.timedelta(days=1)).isoformat()
+        until = (last_day + datetime.timedelta(days=1)).isoformat()
+        index = index if index is not None else scheduling.IntervalIndex()
+        for hall in halls:
+            for schedule_id, date, time, duration in conn.execute(HALL_SESSIONS, (hall, since, until)):
+                start, end = scheduling.interval(date, time, duration, buffer)
+                index.add(hall, start, end, schedule_id)
+        return index
+
+    def schedule_stats(self, schedule_id):
+        """Продано, вместимость и выручка сеанса одним чтением по ключу."""
+        return self._fetchone(ScheduleStats, SCHEDULE_STATS, (schedule_id,))
+
+    def rebuild_schedule_stats(self):
+        with self.manager.connection() as conn:
+            db.rebuild_schedule_stats(conn.cursor())
+
+    # Билеты
+
+    def upcoming_tickets(self, user_id, now, after=None, limit=TICKETS_PAGE_SIZE):
+        """Билеты на сеансы не раньше now (дата, время) после ключа after (дата, время, id)."""
+        after = after or ('', '', 0)
+        return self._fetchall(Ticket, UPCOMING_TICKETS, (user_id, *now, *after, limit))
+
+    def past_tickets(self, user_id, now, before=None, limit=TICKETS_PAGE_SIZE):
+        """Билеты на прошедшие сеансы, от последних к старым, до ключа before (дата, время, id)."""
+        before = before or ('\uffff', '', 0)
+        return self._fetchall(Ticket, PAST_TICKETS, (user_id, *now, *before, limit))
+
+    def seat_map(self, schedule_id):
+        return self._fetchone(SeatMap, SEAT_MAP, (schedule_id,))
+
+    def purchase(self, user_id, schedule_id, quantity=1, seats=None):
+        """Покупка билетов на сеанс.
+
+        Занимает указанные места seats либо quantity лучших свободных.
+        Возвращает Booking; при нехватке мест бросает BookingError.
+        """
+        return self._write_transaction(self._purchase, user_id, schedule_id, quantity, seats)
+
+    def _purchase(self, conn, user_id, schedule_id, quantity, seats):
+        cursor = conn.cursor()
+        cursor.row_factory = SeatMap.factory
+        seat_map = cursor.execute(SEAT_MAP, (schedule_id,)).fetchone()
+        if seat_map is None:
+            raise BookingError("Сеанс не найден")
+
+        if seats:
+            seats = sorted(seats)
+            if not seating.claim(seat_map.bitmap, seats, seat_map.capacity):
+                raise SeatsUnavailable("Выбранные места уже заняты")
+        else:
+            seats = seating.best_available(seat_map.bitmap, seat_map.rows, seat_map.seats_per_row, quantity)
+            if seats is None:
+                raise BookingError("Недостаточно свободных мест")
+            seating.claim(seat_map.bitmap, seats, seat_map.capacity)
+
+        conn.execute(SAVE_SEAT_MAP, (schedule_id, bytes(seat_map.bitmap)))
+        ticket_id = conn.execute(INSERT_TICKET, (user_id, schedule_id, len(seats), seating.to_text(seats))).lastrowid
+        return Booking(ticket_id, seats, seat_map.seats_per_row)
+
+    def cancel_ticket(self, ticket_id, user_id):
+        """Возврат билета: места освобождаются. Возвращает False, если билета нет."""
+        return self._write_transaction(self._cancel_ticket, ticket_id, user_id)
+
+    def _cancel_ticket(self, conn, ticket_id, user_id):
+        ticket = conn.execute(TICKET_FOR_CANCEL, (ticket_id, user_id)).fetchone()
+        if ticket is None:
+            return False
+        schedule_id, quantity, seats = ticket
+
+        cursor = conn.cursor()
+        cursor.row_factory = SeatMap.factory
+        seat_map = cursor.execute(SEAT_MAP, (schedule_id,)).fetchone()
+        if seat_map is not None:
+            if seats:
+                released = seating.from_text(seats)
+            else:
+                # Билет без мест (куплен до их учёта) занимал часть мест, не принадлежащих другим билетам
+                seated = set()
+                for (other,) in conn.execute(SEATED_TICKETS, (schedule_id,)):
+                    seated.update(seating.from_text(other))
+                legacy = (seat for seat in range(seat_map.capacity)
+                          if seating.is_taken(seat_map.bitmap, seat) and seat not in seated)
+                released = [seat for seat, _ in zip(legacy, range(quantity))]
+            seating.release(seat_map.bitmap, released)
+            conn.execute(SAVE_SEAT_MAP, (schedule_id, bytes(seat_map.bitmap)))
+
+        conn.execute(DELETE_TICKET, (ticket_id,))
+        return True
+
+
+class DayCache:
+    """Афиша по дням для нескольких последних дат.
+
+    Перед выдачей из кэша читается счётчик schedule_revision: если
+    расписание или фильмы менялись, кэш сбрасывается. Сеансы, уже
+    начавшиеся к моменту now, отбрасываются при выдаче, поэтому запись
+    дня не устаревает со временем. Может использоваться из разных потоков.
+    """
+
+    def __init__(self, repo, size=DAY_CACHE_SIZE):
+        self.repo = repo
+        self.size = size
+        self.revision = None
+        self._days = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def movies_on(self, date, now=None):
+        """Фильмы дня date с сеансами не раньше now (дата, время); без now — все сеансы дня."""
+        revision = self.repo.schedule_revision()
+        with self._lock:
+            if revision != self.revision:
+                self._days.clear()
+                self.revision = revision
+            movies = self._days.get(date)
+            if movies is not None:
+                self._days.move_to_end(date)
+                self.hits += 1
+        if movies is None:
+            movies = self.repo.movies_on(date)
+            with self._lock:
+                self.misses += 1
+                if revision == self.revision:
+                    self._days[date] = movies
+                    while len(self._days) > self.size:
+                        self._days.popitem(last=False)
+        if now is None or now[0] < date:
+            return movies
+        if now[0] > date:
+            return []
+        upcoming = []
+        for movie in movies:
+            times = [time for time in movie.times if time >= now[1]]
+            if times:
+                upcoming.append(DayMovie(movie.id, movie.title, movie.poster_path, movie.description, times))
+        return upcoming
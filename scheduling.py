@@ -0,0 +1,111 @@
+"""Проверка расписания: сеансы одного зала не должны пересекаться.
+
+Сеанс занимает зал на время фильма (movies.duration) и уборку после него.
+Занятость хранится в IntervalIndex: для каждой пары (зал, день) — список
+интервалов, упорядоченный по началу. Проверка нового сеанса — двоичный
+поиск в списках его дня и соседних (сеанс может закончиться после
+полуночи), поэтому и одиночная вставка, и проверка недели сеансов при
+массовом импорте не просматривают всё расписание.
+
+Время в индексе — минуты от начала эпохи дат (date.toordinal() * 1440),
+так что интервалы соседних дней сравниваются напрямую.
+"""
+import bisect
+import datetime
+
+CLEANING_MINUTES = 15
+MINUTES_PER_DAY = 24 * 60
+
+
+class ScheduleError(Exception):
+    """Сеанс нельзя добавить в расписание."""
+
+
+class HallConflict(ScheduleError):
+    """Сеанс пересекается с другими сеансами того же зала."""
+
+    def __init__(self, message, conflicts):
+        super().__init__(message)
+        self.conflicts = conflicts
+
+
+def parse_date(text):
+    """Дата в формате ГГГГ-ММ-ДД; ScheduleError, если она неверна."""
+    try:
+        return datetime.date.fromisoformat(text.strip())
+    except (AttributeError, ValueError):
+        raise ScheduleError(f"Неверная дата: {text!r}, ожидается ГГГГ-ММ-ДД") from None
+
+
+def parse_time(text):
+    """Время ЧЧ:ММ или ЧЧ:ММ:СС в виде строки ЧЧ:ММ:СС, как в таблице schedules."""
+    try:
+        moment = datetime.time.fromisoformat(text.strip())
+    except (AttributeError, ValueError):
+        raise ScheduleError(f"Неверное время: {text!r}, ожидается ЧЧ:ММ") from None
+    return moment.strftime('%H:%M:%S')
+
+
+def interval(date, time, duration, buffer=CLEANING_MINUTES):
+    """Занятость зала сеансом: (начало, конец) в минутах, конец не включается."""
+    day = datetime.date.fromisoformat(date) if isinstance(date, str) else date
+    hours, minutes = int(time[0:2]), int(time[3:5])
+    start = day.toordinal() * MINUTES_PER_DAY + hours * 60 + minutes
+    return start, start + duration + buffer
+
+
+def day_of(minute):
+    return minute // MINUTES_PER_DAY
+
+
+def format_minute(minute):
+    day = datetime.date.fromordinal(day_of(minute))
+    return f"{day.isoformat()} {minute % MINUTES_PER_DAY // 60:02d}:{minute % 60:02d}"
+
+
+class IntervalIndex:
+    """Занятость залов: интервалы сеансов по залам и дням.
+
+    Интервал относится к дню своего начала. Сеанс короче суток, поэтому
+    пересечься с ним могут только сеансы того же дня и двух соседних.
+    """
+
+    def __init__(self):
+        # (зал, день) -> [(начало, конец, id сеанса)] по возрастанию начала
+        self._days = {}
+        self._longest = 0
+
+    def __len__(self):
+        return sum(len(intervals) for intervals in self._days.values())
+
+    def add(self, hall, start, end, schedule_id):
+        bisect.insort(self._days.setdefault((hall, day_of(start)), []), (start, end, schedule_id))
+        self._longest = max(self._longest, end - start)
+
+    def remove(self, hall, start, end, schedule_id):
+        intervals = self._days.get((hall, day_of(start)))
+        if intervals:
+            position = bisect.bisect_left(intervals, (start, end, schedule_id))
+            if position < len(intervals) and intervals[position] == (start, end, schedule_id):
+                del intervals[position]
+
+    def conflicts(self, hall, start, end, ignore=None):
+        """Сеансы зала, пересекающиеся с [start, end): список (начало, конец, id)."""
+        found = []
+        for day in range(day_of(start) - 1, day_of(end - 1) + 1):
+            intervals = self._days.get((hall, day))
+            if not intervals:
+                continue
+            # Кандидаты начинаются раньше end и не раньше start - самый длинный сеанс
+            first = bisect.bisect_left(intervals, (start - self._longest,))
+            last = bisect.bisect_left(intervals, (end,))
+            found.extend(entry for entry in intervals[first:last]
+                         if entry[1] > start and (ignore is None or entry[2] != ignore))
+        return found
+
+    def check(self, hall, start, end, ignore=None):
+        """HallConflict, если зал в [start, end) занят другим сеансом."""
+        found = self.conflicts(hall, start, end, ignore)
+        if found:
+            times = ', '.join(format_minute(entry[0]) for entry in found)
+            raise HallConflict(f"Зал {hall} занят в это время: сеанс {times}", found)
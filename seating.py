@@ -0,0 +1,91 @@
+"""Карта мест сеанса в виде битовой маски.
+
+Место с номером n (ряд * мест_в_ряду + место, с нуля) занято,
+если установлен бит n % 8 байта n // 8. Для зала на 150 мест
+карта занимает 19 байт и хранится одним BLOB в schedule_seats.
+"""
+
+
+def empty_map(capacity) -> bytearray:
+    return bytearray((capacity + 7) // 8)
+
+
+def filled_map(capacity, taken) -> bytearray:
+    """Карта, в которой заняты первые taken мест."""
+    bitmap = empty_map(capacity)
+    full, rest = divmod(min(taken, capacity), 8)
+    bitmap[:full] = b'\xff' * full
+    if rest:
+        bitmap[full] = (1 << rest) - 1
+    return bitmap
+
+
+def is_taken(bitmap, seat) -> bool:
+    return bool(bitmap[seat >> 3] & (1 << (seat & 7)))
+
+
+def taken_count(bitmap) -> int:
+    return int.from_bytes(bitmap, 'little').bit_count()
+
+
+def claim(bitmap, seats, capacity):
+    """Занимает места; возвращает False и не меняет карту, если хоть одно занято или вне зала."""
+    if len(set(seats)) != len(seats):
+        return False
+    if any(seat < 0 or seat >= capacity or is_taken(bitmap, seat) for seat in seats):
+        return False
+    for seat in seats:
+        bitmap[seat >> 3] |= 1 << (seat & 7)
+    return True
+
+
+def release(bitmap, seats):
+    for seat in seats:
+        bitmap[seat >> 3] &= ~(1 << (seat & 7)) & 0xff
+
+
+def best_available(bitmap, rows, seats_per_row, quantity):
+    """Лучшие свободные места: рядом друг с другом, ближе к центру зала.
+
+    Предпочтение отдаётся рядам на расстоянии двух третей от экрана.
+    Если ни в одном ряду нет quantity свободных мест подряд, выбираются
+    лучшие одиночные места. Возвращает список номеров или None.
+    """
+    capacity = rows * seats_per_row
+    if quantity <= 0 or capacity - taken_count(bitmap) < quantity:
+        return None
+
+    preferred_row = rows * 2 // 3
+    center = (seats_per_row - 1) / 2
+    row_order = sorted(range(rows), key=lambda row: (abs(row - preferred_row), row))
+
+    for row in row_order:
+        base = row * seats_per_row
+        best_start, best_score = None, None
+        run = 0
+        for seat in range(seats_per_row):
+            run = 0 if is_taken(bitmap, base + seat) else run + 1
+            if run >= quantity:
+                start = seat - quantity + 1
+                score = abs(start + (quantity - 1) / 2 - center)
+                if best_score is None or score < best_score:
+                    best_start, best_score = start, score
+        if best_start is not None:
+            return [base + best_start + i for i in range(quantity)]
+
+    free = [seat for seat in range(capacity) if not is_taken(bitmap, seat)]
+    free.sort(key=lambda seat: (abs(seat // seats_per_row - preferred_row), abs(seat % seats_per_row - center)))
+    return sorted(free[:quantity])
+
+
+def to_text(seats) -> str:
+    return ','.join(map(str, seats))
+
+
+def from_text(text):
+    return [int(seat) for seat in text.split(',')] if text else []
+
+
+def label(seat, seats_per_row) -> str:
+    row, place = divmod(seat, seats_per_row)
+    return f"ряд {row + 1}, место {place + 1}"
@@ -0,0 +1,83 @@
+"""Основные операции кинотеатра без интерфейса.
+
+Окна main.py вызывают эти функции в рабочих потоках и только показывают
+результат, поэтому те же операции доступны из скриптов и bench.py без
+Qt и без дисплея. Функции принимают репозиторий первым аргументом, как
+importers; ошибки данных сообщаются исключениями repository.BookingError
+и scheduling.ScheduleError, текст которых можно показать пользователю.
+
+Пример:
+    import db, repository, services
+    db.setup_database()
+    repo = repository.CinemaRepository()
+    user = services.authenticate(repo, 'user1', 'user1')
+    movie, sessions = services.movie_details(repo, 1)
+"""
+import sqlite3
+
+import repository
+import scheduling
+
+
+def authenticate(repo, username, password):
+    """Пользователь с указанными логином и паролем или None."""
+    if not username or not password:
+        return None
+    return repo.authenticate(username, password)
+
+
+def register(repo, username, password, role):
+    """id нового пользователя или None, если имя уже занято."""
+    if repo.find_user(username):
+        return None
+    try:
+        return repo.register(username, password, role)
+    except sqlite3.IntegrityError:
+        return None
+
+
+def afisha(repo, after_id=0, text=""):
+    """Страница афиши после фильма after_id или лучшие совпадения поиска text."""
+    if text:
+        return repo.search_movies(text)
+    return repo.movies_page(after_id)
+
+
+def afisha_on(day_cache, date, text="", now=None):
+    """Фильмы с ещё не начавшимися сеансами дня date (ГГГГ-ММ-ДД), по названию text."""
+    movies = day_cache.movies_on(date, now or repository.current_time())
+    if text:
+        text = text.casefold()
+        movies = [movie for movie in movies if text in movie.title.casefold()]
+    return movies
+
+
+def movie_details(repo, movie_id, now=None):
+    """Данные фильма и его предстоящие сеансы: (MovieDetails или None, [SessionOption])."""
+    return repo.movie_details(movie_id), sessions(repo, movie_id, now)
+
+
+def sessions(repo, movie_id, now=None):
+    """Предстоящие сеансы фильма по порядку показа."""
+    return repo.upcoming_sessions(movie_id, now)
+
+
+def purchase(repo, user_id, schedule_id, quantity=1, seats=None):
+    """Покупка билетов; Booking или BookingError, если купить нельзя."""
+    if not seats and quantity < 1:
+        raise repository.BookingError("Укажите количество билетов")
+    return repo.purchase(user_id, schedule_id, quantity, seats)
+
+
+def tickets(repo, user_id, now=None, after=None, limit=repository.TICKETS_PAGE_SIZE):
+    """Страница билетов пользователя на предстоящие сеансы после ключа after (дата, время, id)."""
+    return repo.upcoming_tickets(user_id, now or repository.current_time(), after, limit)
+
+
+def add_schedule(repo, movie_id, date, time, hall, price, buffer=scheduling.CLEANING_MINUTES):
+    """Новый сеанс; возвращает его id или бросает ScheduleError."""
+    if not movie_id or not date or not time:
+        raise scheduling.ScheduleError("Заполните все поля!")
+    if price <= 0:
+        raise scheduling.ScheduleError("Цена должна быть больше нуля")
+    return repo.add_schedule(movie_id, date, time, hall, price, buffer)
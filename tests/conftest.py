@@ -0,0 +1,37 @@
+"""Общие фикстуры: временная база с актуальной схемой."""
+import pytest
+
+import db
+import repository
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """db.manager на пустой базе во временном каталоге."""
+    manager = db.ConnectionManager(str(tmp_path / 'cinema.db'))
+    monkeypatch.setattr(db, 'manager', manager)
+    yield manager
+    manager.close_all()
+
+
+@pytest.fixture
+def repo(manager):
+    db.migrate(manager.get())
+    return repository.CinemaRepository(manager)
+
+
+@pytest.fixture
+def movie(repo):
+    """id фильма длительностью 120 минут."""
+    return repo.add_movie("Фильм", "Описание", 120, '', '')
+
+
+@pytest.fixture
+def user(repo):
+    return repo.register('user1', 'user1', db.roles[0])
+
+
+@pytest.fixture
+def session(repo, movie):
+    """id сеанса фильма movie в зале 1 (10 рядов по 15 мест)."""
+    return repo.add_schedule(movie, '2030-01-01', '10:00', 1, 300)
@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+
+import pytest
+
+import db
+import seating
+
+
+def _in_thread(fn):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_connection_per_thread(manager):
+    conn = manager.get()
+    assert manager.get() is conn
+    assert _in_thread(manager.get) is not conn
+
+
+def test_wal_mode(manager):
+    assert manager.get().execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_connection_commits_and_rolls_back(manager):
+    with manager.connection() as conn:
+        conn.execute("CREATE TABLE items (value INTEGER)")
+        conn.execute("INSERT INTO items VALUES (1)")
+    with pytest.raises(RuntimeError):
+        with manager.connection() as conn:
+            conn.execute("INSERT INTO items VALUES (2)")
+            raise RuntimeError
+    assert manager.get().execute("SELECT value FROM items").fetchall() == [(1,)]
+
+
+def test_close_all_closes_every_thread(manager):
+    conn = manager.get()
+    other = _in_thread(manager.get)
+    manager.close_all()
+    for closed in (conn, other):
+        with pytest.raises(sqlite3.ProgrammingError):
+            closed.execute("SELECT 1")
+    assert manager.get() is not conn
+
+
+def _schema(conn):
+    return conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+
+
+def test_migrate_fresh_database(manager):
+    conn = manager.get()
+    assert db.migrate(conn) == db.SCHEMA_VERSION
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == db.SCHEMA_VERSION
+    indexes = {name for _type, name, _sql in _schema(conn) if _type == 'index'}
+    assert {'idx_tickets_user_schedule', 'idx_schedules_movie_date_time', 'idx_schedules_hall_date'} <= indexes
+    assert conn.execute("SELECT COUNT(*) FROM halls").fetchone()[0] == db.DEFAULT_HALLS
+
+
+def test_migrate_is_idempotent(manager):
+    conn = manager.get()
+    db.migrate(conn)
+    schema = _schema(conn)
+    assert db.migrate(conn) == db.SCHEMA_VERSION
+    assert _schema(conn) == schema
+    assert conn.execute("SELECT COUNT(*) FROM halls").fetchone()[0] == db.DEFAULT_HALLS
+
+
+def test_migrate_in_steps_matches_fresh(manager, tmp_path):
+    conn = manager.get()
+    for target in range(1, db.SCHEMA_VERSION + 1):
+        assert db.migrate(conn, target) == target
+    fresh = sqlite3.connect(str(tmp_path / 'fresh.db'))
+    try:
+        db.migrate(fresh)
+        assert _schema(conn) == _schema(fresh)
+    finally:
+        fresh.close()
+
+
+def test_migrate_upgrades_existing_data(manager):
+    conn = manager.get()
+    db.migrate(conn, target=2)
+    conn.execute("INSERT INTO users (username, password, role) VALUES ('user1', 'user1', ?)", (db.roles[0],))
+    conn.execute("INSERT INTO movies (title, description, duration, poster_path, trailer_path) VALUES ('Фильм', '', 90, '', '')")
+    conn.execute("INSERT INTO schedules (movie_id, date, time, hall, price) VALUES (1, '2030-01-01', '10:00:00', 3, 250)")
+    conn.execute("INSERT INTO tickets (user_id, schedule_id, quantity) VALUES (1, 1, 3)")
+    conn.commit()
+
+    db.migrate(conn)
+    sold, capacity, revenue = conn.execute(
+        "SELECT sold, capacity, revenue FROM schedule_stats WHERE schedule_id = 1").fetchone()
+    assert (sold, capacity, revenue) == (3, db.DEFAULT_HALL_ROWS * db.DEFAULT_SEATS_PER_ROW, 750)
+    seats = conn.execute("SELECT seats FROM schedule_seats WHERE schedule_id = 1").fetchone()[0]
+    assert seating.taken_count(seats) == 3
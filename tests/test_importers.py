@@ -0,0 +1,75 @@
+import datetime
+import json
+
+import pytest
+
+import importers
+
+
+def _row(key, movie, date, time, hall=1, price=300):
+    return key, movie, datetime.date.fromisoformat(date), time, hall, price
+
+
+def _count_schedules(manager):
+    return manager.get().execute("SELECT COUNT(*) FROM schedules").fetchone()[0]
+
+
+def test_add_schedules_rejections(repo, manager, movie):
+    repo.add_schedule(movie, '2030-01-01', '10:00', 1, 300)
+    inserted, errors = repo.add_schedules([
+        _row(1, movie, '2030-01-01', '11:00:00'),
+        _row(2, movie + 1, '2030-01-01', '15:00:00'),
+        _row(3, movie, '2030-01-01', '15:00:00', hall=42),
+        _row(4, movie, '2030-01-01', '15:00:00'),
+        _row(5, movie, '2030-01-01', '16:00:00'),
+        _row(6, movie, '2030-01-01', '23:30:00'),
+        _row(7, movie, '2030-01-02', '01:00:00'),
+    ])
+    assert inserted == 2
+    assert [key for key, _message in errors] == [1, 2, 3, 5, 7]
+    messages = dict(errors)
+    assert messages[2] == f"Фильм {movie + 1} не найден"
+    assert messages[3] == "Зал 42 не найден"
+    assert "2030-01-01 10:00" in messages[1]
+    assert "2030-01-01 15:00" in messages[5]
+    assert "2030-01-01 23:30" in messages[7]
+    assert _count_schedules(manager) == 3
+
+
+def test_add_schedules_dry_run_writes_nothing(repo, manager, movie):
+    inserted, errors = repo.add_schedules([_row(1, movie, '2030-01-01', '10:00:00')], dry_run=True)
+    assert (inserted, errors) == (1, [])
+    assert _count_schedules(manager) == 0
+
+
+def _write(path, rows):
+    path.write_text(''.join(json.dumps(row) + '\n' for row in rows), encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('dry_run', [False, True])
+def test_import_schedules_in_batches(repo, manager, movie, tmp_path, dry_run):
+    rows = [{'movie_id': movie, 'date': f'2030-01-{day:02d}', 'time': '10:00', 'hall': 1, 'price': 300}
+            for day in range(1, 8)]
+    # Пересекается с первой строкой, но попадает в другую пачку
+    rows.append({'movie_id': movie, 'date': '2030-01-01', 'time': '11:00', 'hall': 1, 'price': 300})
+    rows.append({'movie_id': movie, 'date': '2030-01-01', 'time': '9:99', 'hall': 1, 'price': 300})
+    path = _write(tmp_path / 'schedule.jsonl', rows)
+
+    result = importers.import_schedules(repo, path, dry_run=dry_run, batch_size=3)
+    assert result.inserted == 7
+    assert [error.line for error in result.errors] == [8, 9]
+    assert "2030-01-01 10:00" in result.errors[0].message
+    assert _count_schedules(manager) == (0 if dry_run else 7)
+
+
+def test_import_schedules_csv_errors(repo, movie, tmp_path):
+    path = tmp_path / 'schedule.csv'
+    path.write_text(
+        "movie_id,date,time,hall,price\n"
+        f"{movie},2030-01-01,10:00,1,300\n"
+        f"{movie},2030-02-30,10:00,1,300\n"
+        f"{movie},2030-01-02,10:00,1,abc\n", encoding='utf-8')
+    result = importers.import_schedules(repo, str(path))
+    assert result.inserted == 1
+    assert [error.line for error in result.errors] == [3, 4]
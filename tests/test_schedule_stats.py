@@ -0,0 +1,48 @@
+import db
+
+CAPACITY = db.DEFAULT_HALL_ROWS * db.DEFAULT_SEATS_PER_ROW
+
+
+def _stats(repo, schedule_id):
+    stats = repo.schedule_stats(schedule_id)
+    return stats.sold, stats.capacity, stats.revenue
+
+
+def test_new_session_starts_empty(repo, session):
+    assert _stats(repo, session) == (0, CAPACITY, 0)
+
+
+def test_purchase_and_cancel_update_stats(repo, user, session):
+    first = repo.purchase(user, session, 3)
+    repo.purchase(user, session, 2)
+    assert _stats(repo, session) == (5, CAPACITY, 1500)
+
+    repo.cancel_ticket(first.ticket_id, user)
+    assert _stats(repo, session) == (2, CAPACITY, 600)
+    assert not repo.schedule_stats(session).sold_out
+
+
+def test_hall_change_updates_capacity(repo, manager, session):
+    with manager.connection() as conn:
+        conn.execute("INSERT INTO halls (id, rows, seats_per_row) VALUES (11, 5, 10)")
+        conn.execute("UPDATE schedules SET hall = 11 WHERE id = ?", (session,))
+    assert _stats(repo, session) == (0, 50, 0)
+
+
+def test_deleted_session_loses_stats(repo, manager, session):
+    with manager.connection() as conn:
+        conn.execute("DELETE FROM schedules WHERE id = ?", (session,))
+    assert repo.schedule_stats(session) is None
+
+
+def test_rebuild_matches_triggers(repo, manager, movie, user, session):
+    other = repo.add_schedule(movie, '2030-01-01', '10:00', 2, 450)
+    repo.purchase(user, session, 4)
+    repo.purchase(user, other, 1)
+    with manager.connection() as conn:
+        conn.execute("UPDATE tickets SET quantity = 2 WHERE schedule_id = ?", (other,))
+    incremental = [_stats(repo, schedule_id) for schedule_id in (session, other)]
+    assert incremental == [(4, CAPACITY, 1200), (2, CAPACITY, 900)]
+
+    repo.rebuild_schedule_stats()
+    assert [_stats(repo, schedule_id) for schedule_id in (session, other)] == incremental
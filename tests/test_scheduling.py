@@ -0,0 +1,83 @@
+import pytest
+
+import scheduling
+
+
+def _index(*sessions):
+    index = scheduling.IntervalIndex()
+    for schedule_id, (date, time, duration) in enumerate(sessions, start=1):
+        index.add(1, *scheduling.interval(date, time, duration), schedule_id)
+    return index
+
+
+def test_interval_includes_cleaning():
+    start, end = scheduling.interval('2030-01-01', '23:30:00', 120)
+    assert end - start == 120 + scheduling.CLEANING_MINUTES
+    assert scheduling.day_of(end) == scheduling.day_of(start) + 1
+
+
+def test_conflict_with_previous_day_after_midnight():
+    # 23:30 + 120 мин + уборка = 01:45 следующего дня
+    index = _index(('2030-01-01', '23:30:00', 120))
+    with pytest.raises(scheduling.HallConflict) as error:
+        index.check(1, *scheduling.interval('2030-01-02', '01:00:00', 90))
+    assert [entry[2] for entry in error.value.conflicts] == [1]
+    assert '2030-01-01 23:30' in str(error.value)
+    index.check(1, *scheduling.interval('2030-01-02', '01:45:00', 90))
+
+
+def test_conflict_with_next_day_before_midnight():
+    index = _index(('2030-01-02', '00:30:00', 90))
+    with pytest.raises(scheduling.HallConflict):
+        index.check(1, *scheduling.interval('2030-01-01', '23:00:00', 90))
+    index.check(1, *scheduling.interval('2030-01-01', '23:00:00', 75))
+
+
+def test_other_halls_and_ignore():
+    index = _index(('2030-01-01', '10:00:00', 120))
+    start, end = scheduling.interval('2030-01-01', '11:00:00', 60)
+    assert index.conflicts(2, start, end) == []
+    assert index.conflicts(1, start, end, ignore=1) == []
+    index.remove(1, *scheduling.interval('2030-01-01', '10:00:00', 120), 1)
+    assert len(index) == 0
+
+
+@pytest.mark.parametrize('parse, text', [
+    (scheduling.parse_date, '2030-13-01'),
+    (scheduling.parse_date, ''),
+    (scheduling.parse_time, '25:00'),
+    (scheduling.parse_time, None),
+])
+def test_parse_errors(parse, text):
+    with pytest.raises(scheduling.ScheduleError):
+        parse(text)
+
+
+def test_add_schedule_across_midnight(repo, movie):
+    repo.add_schedule(movie, '2030-01-01', '23:30', 1, 300)
+    with pytest.raises(scheduling.HallConflict):
+        repo.add_schedule(movie, '2030-01-02', '01:00', 1, 300)
+    repo.add_schedule(movie, '2030-01-02', '01:00', 2, 300)
+    repo.add_schedule(movie, '2030-01-02', '01:45', 1, 300)
+
+
+def test_add_schedule_unknown_movie_or_hall(repo, movie):
+    with pytest.raises(scheduling.ScheduleError, match="Фильм не найден"):
+        repo.add_schedule(movie + 1, '2030-01-01', '10:00', 1, 300)
+    with pytest.raises(scheduling.ScheduleError, match="Зал 99 не найден"):
+        repo.add_schedule(movie, '2030-01-01', '10:00', 99, 300)
+
+
+def test_move_schedule_ignores_itself(repo, movie):
+    schedule_id = repo.add_schedule(movie, '2030-01-01', '10:00', 1, 300)
+    repo.move_schedule(schedule_id, '2030-01-01', '10:30', 1)
+    repo.add_schedule(movie, '2030-01-01', '13:00', 1, 300)
+    with pytest.raises(scheduling.HallConflict):
+        repo.move_schedule(schedule_id, '2030-01-01', '12:00', 1)
+
+
+def test_movie_with_conflicting_schedule_is_not_added(repo, movie):
+    repo.add_schedule(movie, '2030-01-01', '10:00', 1, 300)
+    with pytest.raises(scheduling.HallConflict):
+        repo.add_movie_with_schedule(("Новый", "", 90, '', '', None, None), '2030-01-01', '11:00', 1, 300)
+    assert [m.id for m in repo.list_movies()] == [movie]
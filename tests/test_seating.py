@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+import repository
+import seating
+
+CAPACITY = 150
+
+
+def test_claim_and_release():
+    bitmap = seating.empty_map(CAPACITY)
+    assert seating.claim(bitmap, [0, 7, 8, 149], CAPACITY)
+    assert [seat for seat in range(CAPACITY) if seating.is_taken(bitmap, seat)] == [0, 7, 8, 149]
+    assert seating.taken_count(bitmap) == 4
+
+    seating.release(bitmap, [7, 149])
+    assert seating.taken_count(bitmap) == 2
+    assert not seating.is_taken(bitmap, 7)
+    assert seating.is_taken(bitmap, 8)
+
+
+@pytest.mark.parametrize('seats', [[3, 5], [5, 5], [-1], [CAPACITY]])
+def test_claim_is_all_or_nothing(seats):
+    bitmap = seating.empty_map(CAPACITY)
+    seating.claim(bitmap, [5], CAPACITY)
+    before = bytes(bitmap)
+    assert not seating.claim(bitmap, seats, CAPACITY)
+    assert bytes(bitmap) == before
+
+
+def test_filled_map():
+    bitmap = seating.filled_map(CAPACITY, 13)
+    assert len(bitmap) == 19
+    assert seating.taken_count(bitmap) == 13
+    assert seating.is_taken(bitmap, 12) and not seating.is_taken(bitmap, 13)
+
+
+def test_best_available_keeps_group_together():
+    bitmap = seating.empty_map(CAPACITY)
+    seats = seating.best_available(bitmap, 10, 15, 3)
+    assert seats == [6 * 15 + 6, 6 * 15 + 7, 6 * 15 + 8]
+
+
+def test_best_available_when_full():
+    assert seating.best_available(seating.filled_map(CAPACITY, CAPACITY - 1), 10, 15, 2) is None
+    assert seating.best_available(seating.filled_map(CAPACITY, CAPACITY - 1), 10, 15, 1) == [CAPACITY - 1]
+
+
+def test_purchase_claims_and_cancel_releases(repo, user, session):
+    booking = repo.purchase(user, session, seats=[10, 11])
+    assert booking.seats == [10, 11]
+    with pytest.raises(repository.SeatsUnavailable):
+        repo.purchase(user, session, seats=[11, 12])
+    assert seating.taken_count(repo.seat_map(session).bitmap) == 2
+
+    assert repo.cancel_ticket(booking.ticket_id, user)
+    assert seating.taken_count(repo.seat_map(session).bitmap) == 0
+    repo.purchase(user, session, seats=[11, 12])
+
+
+def test_purchase_fails_when_not_enough_seats(repo, user, session):
+    repo.purchase(user, session, seats=list(range(CAPACITY - 1)))
+    with pytest.raises(repository.BookingError):
+        repo.purchase(user, session, 2)
+    assert repo.purchase(user, session, 1).seats == [CAPACITY - 1]
+
+
+def test_concurrent_purchases_never_share_seats(repo, user, session):
+    bookings, errors = [], []
+
+    def buy():
+        for _ in range(10):
+            try:
+                bookings.append(repo.purchase(user, session, 4))
+            except repository.BookingError as e:
+                errors.append(e)
+        repo.manager.close()
+
+    threads = [threading.Thread(target=buy) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    seats = [seat for booking in bookings for seat in booking.seats]
+    assert len(seats) == len(set(seats))
+    assert seating.taken_count(repo.seat_map(session).bitmap) == len(seats)
+    assert len(bookings) == CAPACITY // 4
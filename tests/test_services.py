@@ -0,0 +1,49 @@
+import pytest
+
+import db
+import repository
+import scheduling
+import services
+
+
+@pytest.mark.parametrize('movie_id, date, time', [
+    (None, '2030-01-01', '10:00'),
+    (1, '', '10:00'),
+    (1, '2030-01-01', ''),
+])
+def test_add_schedule_requires_fields(repo, movie, movie_id, date, time):
+    with pytest.raises(scheduling.ScheduleError, match="Заполните все поля!"):
+        services.add_schedule(repo, movie_id, date, time, 1, 300)
+
+
+@pytest.mark.parametrize('price', [0, -100])
+def test_add_schedule_rejects_price(repo, movie, price):
+    with pytest.raises(scheduling.ScheduleError, match="Цена должна быть больше нуля"):
+        services.add_schedule(repo, movie, '2030-01-01', '10:00', 1, price)
+
+
+def test_add_schedule_checks_date_and_hall(repo, movie):
+    with pytest.raises(scheduling.ScheduleError, match="Неверная дата"):
+        services.add_schedule(repo, movie, '01.01.2030', '10:00', 1, 300)
+    schedule_id = services.add_schedule(repo, movie, '2030-01-01', '10:00', 1, 300)
+    with pytest.raises(scheduling.HallConflict):
+        services.add_schedule(repo, movie, '2030-01-01', '11:00', 1, 300)
+    movie_sessions = services.sessions(repo, movie, now=('2030-01-01', '00:00:00'))
+    assert [session.id for session in movie_sessions] == [schedule_id]
+
+
+def test_register_and_authenticate(repo):
+    user_id = services.register(repo, 'user1', 'secret', db.roles[0])
+    assert user_id is not None
+    assert services.register(repo, 'user1', 'other', db.roles[0]) is None
+    assert services.authenticate(repo, 'user1', 'secret').id == user_id
+    assert services.authenticate(repo, 'user1', 'wrong') is None
+    assert services.authenticate(repo, '', '') is None
+
+
+def test_purchase_validates_quantity(repo, user, session):
+    with pytest.raises(repository.BookingError, match="Укажите количество билетов"):
+        services.purchase(repo, user, session, 0)
+    with pytest.raises(repository.BookingError, match="Сеанс не найден"):
+        services.purchase(repo, user, session + 1, 1)
+    assert len(services.purchase(repo, user, session, 2).seats) == 2
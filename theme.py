@@ -0,0 +1,359 @@
+"""Оформление приложения одной таблицей стилей.
+
+Таблица устанавливается один раз на QApplication, а окна и виджеты
+выбираются в ней по objectName и свойствам. Виджеты не вызывают
+setStyleSheet сами, поэтому создание окна или карточки не приводит к
+разбору CSS, а только к полировке по уже разобранным правилам.
+
+При CINEMA_THEME_METRICS=1 считается число и время полировок виджетов
+и виджетов с собственными таблицами; main печатает отчёт при выходе.
+"""
+import os
+import time
+
+from PyQt6.QtCore import QCoreApplication, QEvent, QObject
+from PyQt6.QtWidgets import QApplication
+
+METRICS_ENV = 'CINEMA_THEME_METRICS'
+
+BASE = """
+    QWidget {
+        background-color: white;
+        color: black;
+        font-size: 14px;
+        font-family: Arial, sans-serif;
+    }
+    QPushButton {
+        background-color: yellow;
+        border: none;
+        color: black;
+        outline: none;
+        padding: 10px;
+        border-radius: 5px;
+        font-size: 14px;
+        font-weight: bold;
+    }
+    QPushButton:hover {
+        background-color: #FFB02E;
+    }
+    QPushButton:pressed {
+        background-color: #FFB02E;
+    }
+    QPushButton:focus {
+        background-color: #FFB02E;
+    }
+    QPushButton:checked {
+        background-color: #FFB02E;
+    }
+    QPushButton#destructive_button {
+        background-color: transparent;
+        color: red;
+    }
+    QPushButton#destructive_button:hover {
+        background-color: white;
+    }
+    QLineEdit {
+        padding: 5px;
+        border: 1px solid #888;
+        border-radius: 5px;
+    }
+    QComboBox {
+        padding: 5px;
+        border: 1px solid #888;
+        border-radius: 5px;
+    }
+    QTableWidget {
+        background-color: white;
+        color: white;
+        font-size: 14px;
+    }
+    QAbstractItemView {
+        background: black;
+        outline: none;
+        border-radius: 5px;
+    }
+    QAbstractItemView::item {
+        padding: 5px;
+        outline: none;
+        color: white;
+        background-color: transparent;
+    }
+    QAbstractItemView::item:selected {
+        background-color: #FFB02E;
+        color: black;
+    }
+    QScrollBar {
+        border: none;
+        outline: none;
+    }
+    QScrollBar:horizontal {
+        background-color: gray;
+        height: 10px;
+        border-radius: 5px;
+    }
+    QScrollBar:vertical {
+        background-color: gray;
+        width: 10px;
+        border-radius: 5px;
+    }
+    QSpinBox {
+        padding: 5px;
+        border: 1px solid #888;
+        border-radius: 5px;
+    }
+    #logo {
+        font-size: 24px;
+        margin-bottom: 30px;
+        font-style: italic;
+        font-weight: bold;
+    }
+    #caption {
+        color: #eee;
+    }
+"""
+
+AUTH = """
+    #authWindow #submit_button {
+        background-color: yellow;
+        margin-top: 10px;
+    }
+    #authWindow #submit_button:hover {
+        background-color: #FF8C00;
+    }
+    #authWindow #submit_button:pressed {
+        background-color: #FF8C00;
+    }
+    #authWindow #switch_button {
+        background-color: white;
+        color: black;
+    }
+"""
+
+ADMIN = """
+    #adminWindow, #adminWindow QWidget {
+        background-color: #111;
+        color: #fff;
+        font-family: Arial, sans-serif;
+    }
+    #adminWindow QLabel {
+        font-size: 16px;
+        margin-bottom: 15px;
+        color: #fff;
+    }
+    #adminWindow QPushButton {
+        background-color: #FFD700;
+        color: #111;
+        border: none;
+        padding: 15px 30px;
+        font-size: 18px;
+        font-weight: bold;
+        border-radius: 8px;
+        margin: 10px 0;
+    }
+    #adminWindow QPushButton:hover {
+        background-color: #E6C200;
+    }
+    #adminWindow QPushButton#destructive_button {
+        background-color: #FF6347;
+        color: white;
+    }
+    #adminWindow QPushButton#destructive_button:hover {
+        background-color: #E5533E;
+    }
+"""
+
+USER = """
+    #userWindow QPushButton {
+        border-radius: 0;
+    }
+    #navbar, #navbar QFrame {
+        background-color: black;
+        padding: 0;
+        color: #ffffff;
+    }
+    #navbar QPushButton {
+        background-color: black;
+        color: #ffffff;
+        border: none;
+        padding: 10px;
+    }
+    #navbar QPushButton:checked {
+        background-color: #333333;
+    }
+    #navbar QPushButton:hover {
+        background-color: #333333;
+    }
+    #navbar QPushButton#destructive_button {
+        background-color: transparent;
+        color: red;
+    }
+    #navbar QPushButton#destructive_button:hover {
+        background-color: red;
+        color: #ffffff;
+    }
+    #afisha, #afisha QFrame {
+        background-color: white;
+        color: black;
+    }
+    #afisha QPushButton#date_button {
+        background-color: #eee;
+        border-radius: 5px;
+        padding: 6px 10px;
+        font-weight: normal;
+    }
+    #afisha QPushButton#date_button:hover {
+        background-color: #ddd;
+    }
+    #afisha QPushButton#date_button:checked {
+        background-color: #FFD700;
+    }
+    #myTickets QListView {
+        background-color: white;
+        border: none;
+        border-radius: 0;
+    }
+    #myTickets #ticket-info {
+        font-size: 14px;
+        padding: 10px;
+    }
+"""
+
+MOVIE_INFO = """
+    #movieInfo, #movieInfo QWidget {
+        background-color: #f9f9f9;
+        font-family: Arial, sans-serif;
+        color: #333;
+    }
+    #movieInfo QLabel#title {
+        font-size: 24px;
+        font-weight: bold;
+        color: #111;
+        margin-bottom: 10px;
+    }
+    #movieInfo QLabel#description {
+        font-size: 16px;
+        margin-bottom: 15px;
+        color: #555;
+    }
+    #movieInfo QLabel#info {
+        font-size: 14px;
+        color: #777;
+        margin-bottom: 5px;
+    }
+    #movieInfo QLabel#poster {
+        border-radius: 8px;
+    }
+    #movieInfo QPushButton {
+        font-size: 14px;
+        padding: 8px 15px;
+        background-color: #FFD700;
+        color: #111;
+        border: none;
+        border-radius: 5px;
+    }
+    #movieInfo QPushButton:hover {
+        background-color: #FFC107;
+    }
+    #movieInfo QPushButton:pressed {
+        background-color: #E6AC00;
+    }
+    #movieInfo QListWidget#sessions {
+        background-color: #fff;
+        border: 1px solid #ddd;
+        border-radius: 5px;
+    }
+    #movieInfo QListWidget#sessions::item {
+        color: #333;
+    }
+    #movieInfo QListWidget#sessions::item:selected {
+        background-color: #FFD700;
+        color: #111;
+    }
+    #movieInfo QListWidget#sessions::item:disabled {
+        color: #aaa;
+    }
+    #movieInfo QSpinBox {
+        padding: 5px;
+        border: 1px solid #888;
+        border-radius: 5px;
+        background-color: #fff;
+        color: #333;
+        font-size: 14px;
+    }
+"""
+
+STYLESHEET = BASE + AUTH + ADMIN + USER + MOVIE_INFO
+
+
+class StyleMetrics(QObject):
+    """Фильтр событий приложения: число и время полировок виджетов.
+
+    local_sheet_polishes — полировки виджетов с собственной таблицей стилей,
+    для которых Qt разбирает CSS заново.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.polished = 0
+        self.polish_seconds = 0.0
+        self.local_sheet_polishes = 0
+        self._measuring = set()
+
+    def eventFilter(self, watched, event):
+        kind = event.type()
+        if kind == QEvent.Type.Polish and watched.isWidgetType() and watched not in self._measuring:
+            # Полировка выполняется обработчиком события: доставляем его сами и
+            # замеряем; повторный вход в фильтр для того же виджета пропускаем
+            self._measuring.add(watched)
+            started = time.perf_counter()
+            try:
+                QCoreApplication.sendEvent(watched, event)
+            finally:
+                self._measuring.discard(watched)
+            self.polish_seconds += time.perf_counter() - started
+            self.polished += 1
+            if watched.styleSheet():
+                self.local_sheet_polishes += 1
+            return True
+        return False
+
+    def stats(self):
+        return {
+            'polished': self.polished,
+            'polish_ms': round(self.polish_seconds * 1000, 1),
+            'local_sheet_polishes': self.local_sheet_polishes,
+            'local_stylesheets': len(local_stylesheets()),
+        }
+
+
+metrics = None
+_apply_seconds = 0.0
+
+
+def local_stylesheets():
+    """Виджеты с собственной таблицей стилей: каждый из них разбирает CSS отдельно."""
+    return [widget for widget in QApplication.allWidgets() if widget.styleSheet()]
+
+
+def apply(app):
+    """Устанавливает таблицу стилей приложения и, если нужно, включает замеры."""
+    global metrics, _apply_seconds
+    started = time.perf_counter()
+    app.setStyleSheet(STYLESHEET)
+    _apply_seconds = time.perf_counter() - started
+    if os.environ.get(METRICS_ENV) and metrics is None:
+        metrics = StyleMetrics(app)
+        app.installEventFilter(metrics)
+
+
+def stats():
+    """Замеры оформления; без CINEMA_THEME_METRICS только время установки таблицы."""
+    result = {'apply_ms': round(_apply_seconds * 1000, 1)}
+    if metrics is not None:
+        result.update(metrics.stats())
+    return result
+
+
+def print_report():
+    for name, value in stats().items():
+        print(f"{name:<18} {value:>10}")
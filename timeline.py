@@ -0,0 +1,368 @@
+"""Сетка расписания: залы по строкам, время по столбцам.
+
+ScheduleGrid рисует сеансы диапазона дат (день или неделя) сам, без
+виджета на сеанс, и только в видимой части: сеансы каждого зала лежат
+по возрастанию начала, видимые находятся двоичным поиском. Сеанс можно
+перетащить на другое время или в другой зал; занятость проверяется по
+scheduling.IntervalIndex загруженного диапазона ещё во время
+перетаскивания, а окончательно — в repository.move_schedule.
+"""
+import bisect
+import datetime
+
+from PyQt6.QtCore import QRect, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QPainter, QPen
+from PyQt6.QtWidgets import QAbstractScrollArea
+
+import scheduling
+
+DAY = 'day'
+WEEK = 'week'
+
+# Пикселей на минуту и шаг подписей времени в минутах
+SCALES = {
+    DAY: (2.0, 60),
+    WEEK: (0.25, 6 * 60),
+}
+DAYS = {DAY: 1, WEEK: 7}
+SNAP_MINUTES = 5
+
+
+class GridItem:
+    """Сеанс в сетке: интервал в минутах от начала эпохи дат (см. scheduling.interval)."""
+    __slots__ = ('session', 'start', 'end')
+
+    def __init__(self, session, start, end):
+        self.session = session
+        self.start = start
+        self.end = end
+
+    def __lt__(self, other):
+        return self.start < other.start
+
+
+class ScheduleGrid(QAbstractScrollArea):
+    """Сеансы залов за день или неделю с перетаскиванием."""
+
+    # Сеанс перенесён мышью: (сеанс, дата, время, зал)
+    move_requested = pyqtSignal(object, str, str, int)
+
+    HEADER_HEIGHT = 28
+    LABEL_WIDTH = 64
+    ROW_HEIGHT = 48
+    ROW_PADDING = 4
+
+    BACKGROUND = QColor('#1a1a1a')
+    ROW_ALTERNATE = QColor('#202020')
+    GRID_LINE = QColor('#333')
+    DAY_LINE = QColor('#666')
+    TEXT = QColor('#fff')
+    TEXT_DIM = QColor('#aaa')
+    CONFLICT = QColor('#FF6347')
+    NOW_LINE = QColor('#FFD700')
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMouseTracking(True)
+        self.viewport().setMouseTracking(True)
+        self.horizontalScrollBar().setSingleStep(40)
+        self.verticalScrollBar().setSingleStep(self.ROW_HEIGHT // 2)
+        self.text_font = QFont('Arial')
+        self.text_font.setPixelSize(12)
+        self.bold_font = QFont(self.text_font)
+        self.bold_font.setWeight(QFont.Weight.DemiBold)
+
+        self.mode = DAY
+        self.first_day = datetime.date.today()
+        self.buffer = scheduling.CLEANING_MINUTES
+        self.halls = []
+        self.rows = {}
+        self.items = {}
+        self.index = scheduling.IntervalIndex()
+        self.longest = 0
+
+        self.drag = None
+        self.drag_offset = 0
+        self.drag_start = 0
+        self.drag_hall = 0
+        self.drag_conflict = False
+
+    # Данные
+
+    @property
+    def days(self):
+        return DAYS[self.mode]
+
+    @property
+    def origin(self):
+        """Начало диапазона в минутах эпохи дат."""
+        return self.first_day.toordinal() * scheduling.MINUTES_PER_DAY
+
+    @property
+    def last_day(self):
+        return self.first_day + datetime.timedelta(days=self.days - 1)
+
+    def set_range(self, first_day, mode):
+        self.first_day = first_day
+        self.mode = mode
+        self.update_scrollbars()
+
+    def set_sessions(self, halls, sessions):
+        """Сеансы диапазона; по каждому залу — список по возрастанию начала."""
+        self.halls = list(halls)
+        self.rows = {hall: row for row, hall in enumerate(self.halls)}
+        self.items = {hall: [] for hall in self.halls}
+        self.index = scheduling.IntervalIndex()
+        self.longest = 0
+        for session in sessions:
+            start, end = scheduling.interval(session.date, session.time, session.duration, self.buffer)
+            self.items.setdefault(session.hall, []).append(GridItem(session, start, end))
+            self.index.add(session.hall, start, end, session.id)
+            self.longest = max(self.longest, end - start)
+        for items in self.items.values():
+            items.sort()
+        self.drag = None
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def __len__(self):
+        return sum(len(items) for items in self.items.values())
+
+    # Геометрия
+
+    @property
+    def scale(self):
+        return SCALES[self.mode][0]
+
+    def content_width(self):
+        return int(self.days * scheduling.MINUTES_PER_DAY * self.scale)
+
+    def content_height(self):
+        return len(self.halls) * self.ROW_HEIGHT
+
+    def update_scrollbars(self):
+        area = self.viewport().size()
+        horizontal = self.horizontalScrollBar()
+        horizontal.setPageStep(area.width() - self.LABEL_WIDTH)
+        horizontal.setRange(0, max(0, self.content_width() - area.width() + self.LABEL_WIDTH))
+        vertical = self.verticalScrollBar()
+        vertical.setPageStep(area.height() - self.HEADER_HEIGHT)
+        vertical.setRange(0, max(0, self.content_height() - area.height() + self.HEADER_HEIGHT))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def scroll_to_minute(self, minute):
+        """Прокрутка так, чтобы минута от начала диапазона была у левого края."""
+        self.horizontalScrollBar().setValue(int(minute * self.scale))
+
+    def x_of(self, minute):
+        return self.LABEL_WIDTH + int((minute - self.origin) * self.scale) - self.horizontalScrollBar().value()
+
+    def minute_at(self, x):
+        return self.origin + (x - self.LABEL_WIDTH + self.horizontalScrollBar().value()) / self.scale
+
+    def y_of(self, row):
+        return self.HEADER_HEIGHT + row * self.ROW_HEIGHT - self.verticalScrollBar().value()
+
+    def row_at(self, y):
+        row = (y - self.HEADER_HEIGHT + self.verticalScrollBar().value()) // self.ROW_HEIGHT
+        return row if 0 <= row < len(self.halls) else None
+
+    def item_rect(self, row, start, end):
+        left, right = self.x_of(start), self.x_of(end)
+        return QRect(left, self.y_of(row) + self.ROW_PADDING, max(right - left, 2),
+                     self.ROW_HEIGHT - 2 * self.ROW_PADDING)
+
+    def visible_items(self, hall, first, last):
+        """Сеансы зала, пересекающие минуты [first, last)."""
+        items = self.items.get(hall, ())
+        low = bisect.bisect_left(items, GridItem(None, first - self.longest, 0))
+        high = bisect.bisect_left(items, GridItem(None, last, 0))
+        return [item for item in items[low:high] if item.end > first]
+
+    def item_at(self, pos):
+        row = self.row_at(pos.y())
+        if row is None or pos.x() < self.LABEL_WIDTH:
+            return None
+        minute = self.minute_at(pos.x())
+        for item in self.visible_items(self.halls[row], minute, minute + 1):
+            if self.item_rect(row, item.start, item.end).contains(pos):
+                return item
+        return None
+
+    # Рисование
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.text_font)
+        width, height = self.viewport().width(), self.viewport().height()
+        painter.fillRect(0, 0, width, height, self.BACKGROUND)
+        first = int(self.minute_at(self.LABEL_WIDTH))
+        last = int(self.minute_at(width)) + 1
+
+        rows = range(len(self.halls))
+        for row in rows:
+            if row % 2:
+                painter.fillRect(0, self.y_of(row), width, self.ROW_HEIGHT, self.ROW_ALTERNATE)
+        self.paint_time_lines(painter, first, last, height)
+
+        painter.setClipRect(self.LABEL_WIDTH, self.HEADER_HEIGHT, width - self.LABEL_WIDTH, height - self.HEADER_HEIGHT)
+        for row in rows:
+            if self.y_of(row) + self.ROW_HEIGHT < self.HEADER_HEIGHT or self.y_of(row) > height:
+                continue
+            for item in self.visible_items(self.halls[row], first, last):
+                if item is not self.drag:
+                    self.paint_item(painter, row, item.start, item)
+        if self.drag is not None and self.drag_hall in self.rows:
+            self.paint_item(painter, self.rows[self.drag_hall], self.drag_start, self.drag, dragging=True)
+        painter.setClipping(False)
+
+        # Подписи залов поверх сеансов, прокрученных влево
+        painter.fillRect(0, self.HEADER_HEIGHT, self.LABEL_WIDTH, height, self.BACKGROUND)
+        painter.setPen(self.TEXT)
+        painter.setFont(self.bold_font)
+        for row in rows:
+            painter.drawText(QRect(0, self.y_of(row), self.LABEL_WIDTH, self.ROW_HEIGHT),
+                             Qt.AlignmentFlag.AlignCenter, f"Зал {self.halls[row]}")
+        painter.fillRect(0, 0, self.LABEL_WIDTH, self.HEADER_HEIGHT, self.BACKGROUND)
+
+    def paint_time_lines(self, painter, first, last, height):
+        step = SCALES[self.mode][1]
+        minute = first - first % step
+        while minute <= last:
+            x = self.x_of(minute)
+            day_start = minute % scheduling.MINUTES_PER_DAY == 0
+            painter.setPen(self.DAY_LINE if day_start else self.GRID_LINE)
+            painter.drawLine(x, self.HEADER_HEIGHT, x, height)
+            if x >= self.LABEL_WIDTH:
+                painter.setPen(self.TEXT if day_start else self.TEXT_DIM)
+                if day_start and self.mode == WEEK:
+                    label = datetime.date.fromordinal(scheduling.day_of(minute)).strftime('%d.%m')
+                else:
+                    label = f"{minute % scheduling.MINUTES_PER_DAY // 60:02d}:00"
+                painter.drawText(QRect(x + 3, 0, 80, self.HEADER_HEIGHT),
+                                 Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, label)
+            minute += step
+
+        now = datetime.datetime.now()
+        now_minute = now.date().toordinal() * scheduling.MINUTES_PER_DAY + now.hour * 60 + now.minute
+        if first <= now_minute <= last:
+            x = self.x_of(now_minute)
+            painter.setPen(QPen(self.NOW_LINE, 1))
+            painter.drawLine(x, self.HEADER_HEIGHT, x, height)
+
+    @staticmethod
+    def movie_color(movie_id):
+        return QColor.fromHsv(movie_id * 47 % 360, 110, 200)
+
+    def paint_item(self, painter, row, start, item, dragging=False):
+        session = item.session
+        rect = self.item_rect(row, start, start + item.end - item.start)
+        film = QRect(rect)
+        film.setWidth(max(int(session.duration * self.scale), 2))
+        color = self.CONFLICT if dragging and self.drag_conflict else self.movie_color(session.movie_id)
+        painter.setPen(Qt.PenStyle.NoPen)
+        # Уборка после фильма — бледная полоса за сеансом
+        buffer_color = QColor(color)
+        buffer_color.setAlpha(70)
+        painter.fillRect(rect, buffer_color)
+        painter.fillRect(film, color)
+        if dragging:
+            painter.setPen(QPen(self.TEXT, 2))
+            painter.drawRect(film.adjusted(1, 1, -1, -1))
+
+        if film.width() > 24:
+            text_rect = film.adjusted(4, 2, -4, -2)
+            painter.setPen(QColor('#111'))
+            metrics = painter.fontMetrics()
+            minute = start % scheduling.MINUTES_PER_DAY
+            label = f"{minute // 60:02d}:{minute % 60:02d}"
+            # В узком блоке (неделя) обрезанные подписи не читаются, поэтому не рисуются
+            if metrics.horizontalAdvance(label) <= text_rect.width():
+                painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop, label)
+            title = metrics.elidedText(session.title, Qt.TextElideMode.ElideRight, text_rect.width())
+            if len(title) > 3:
+                painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignBottom, title)
+
+    # Перетаскивание
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.MouseButton.LeftButton:
+            return super().mousePressEvent(event)
+        item = self.item_at(event.position().toPoint())
+        if item is None:
+            return
+        self.drag = item
+        self.drag_offset = self.minute_at(event.position().x()) - item.start
+        self.drag_start = item.start
+        self.drag_hall = item.session.hall
+        self.drag_conflict = False
+        self.viewport().update()
+
+    def mouseMoveEvent(self, event):
+        pos = event.position().toPoint()
+        if self.drag is None:
+            item = self.item_at(pos)
+            self.viewport().setCursor(
+                Qt.CursorShape.OpenHandCursor if item is not None else Qt.CursorShape.ArrowCursor)
+            if item is not None:
+                session = item.session
+                self.viewport().setToolTip(
+                    f"{session.title}\n{session.date} {session.time[:5]}, {session.duration} мин\n"
+                    f"Продано билетов: {session.sold}")
+            else:
+                self.viewport().setToolTip("")
+            return
+        start = self.minute_at(pos.x()) - self.drag_offset
+        start = int(round(start / SNAP_MINUTES) * SNAP_MINUTES)
+        row = self.row_at(pos.y())
+        hall = self.halls[row] if row is not None else self.drag_hall
+        if (start, hall) != (self.drag_start, self.drag_hall):
+            self.drag_start, self.drag_hall = start, hall
+            length = self.drag.end - self.drag.start
+            self.drag_conflict = bool(self.index.conflicts(hall, start, start + length, ignore=self.drag.session.id))
+            self.viewport().update()
+
+    def mouseReleaseEvent(self, event):
+        if self.drag is None or event.button() != Qt.MouseButton.LeftButton:
+            return super().mouseReleaseEvent(event)
+        item, start, hall, conflict = self.drag, self.drag_start, self.drag_hall, self.drag_conflict
+        self.drag = None
+        self.viewport().update()
+        if (start, hall) == (item.start, item.session.hall) or conflict:
+            return
+        day = datetime.date.fromordinal(scheduling.day_of(start))
+        minute = start % scheduling.MINUTES_PER_DAY
+        self.move_requested.emit(item.session, day.isoformat(), f"{minute // 60:02d}:{minute % 60:02d}:00", hall)
+
+    def move_item(self, session, date, time, hall):
+        """Сдвигает сеанс в сетке после успешного переноса в базе."""
+        for item in self.items.get(session.hall, ()):
+            if item.session is session:
+                break
+        else:
+            return
+        self.items[session.hall].remove(item)
+        self.index.remove(session.hall, item.start, item.end, session.id)
+        session.date, session.time, session.hall = date, time, hall
+        item.start, item.end = scheduling.interval(date, time, session.duration, self.buffer)
+        bisect.insort(self.items.setdefault(hall, []), item)
+        self.index.add(hall, item.start, item.end, session.id)
+        self.viewport().update()
+
+    def wheelEvent(self, event):
+        # Колесо без модификаторов листает время, с Shift — залы
+        delta = event.angleDelta()
+        if delta.x():
+            return super().wheelEvent(event)
+        if event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
+            scrollbar = self.verticalScrollBar()
+        else:
+            scrollbar = self.horizontalScrollBar()
+        scrollbar.setValue(scrollbar.value() - delta.y())
+        event.accept()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
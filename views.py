@@ -0,0 +1,455 @@
+"""Модели и делегаты списков для отображения через Model/View.
+
+Вместо отдельного виджета на каждую строку представление рисует только
+видимые элементы, поэтому память и прокрутка не зависят от размера списка.
+"""
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, QRect, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QPainter
+from PyQt6.QtWidgets import QStyle, QStyledItemDelegate
+
+import posters
+import repository
+import services
+import workers
+
+
+class MovieListModel(QAbstractListModel):
+    """Фильмы афиши, подгружаемые страницами через canFetchMore/fetchMore.
+
+    С выбранной датой список — фильмы с ещё не начавшимися сеансами этого
+    дня из DayCache целиком, строка поиска фильтрует его по названию.
+    """
+
+    MovieRole = Qt.ItemDataRole.UserRole + 1
+
+    loaded = pyqtSignal()
+    failed = pyqtSignal(object)
+
+    def __init__(self, repo, parent=None, day_cache=None):
+        super().__init__(parent)
+        self.repo = repo
+        self.day_cache = day_cache if day_cache is not None else repository.DayCache(repo)
+        self.queries = workers.AsyncQueries(self)
+        self.movies = []
+        self.search_text = ""
+        self.date = None
+        self.has_more = True
+        self.task = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.movies)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        movie = self.movies[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return movie.title
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return movie.description
+        if role == self.MovieRole:
+            return movie
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.has_more and self.task is None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        if self.date is not None:
+            self.task = self.queries.run(
+                services.afisha_on, self.day_cache, self.date, self.search_text,
+                on_result=self.on_page_loaded, on_error=self.on_failed)
+        else:
+            after_id = self.movies[-1].id if self.movies and not self.search_text else 0
+            self.task = self.queries.run(
+                services.afisha, self.repo, after_id, self.search_text,
+                on_result=self.on_page_loaded, on_error=self.on_failed)
+
+    def set_search(self, text):
+        """Сброс списка и загрузка афиши (пустой text) или результатов поиска."""
+        self._reset(text, self.date)
+
+    def set_date(self, date):
+        """Сброс списка и загрузка афиши на день date (ГГГГ-ММ-ДД) или на все дни (None)."""
+        self._reset(self.search_text, date)
+
+    def _reset(self, text, date):
+        self.queries.cancel(self.task)
+        self.task = None
+        self.beginResetModel()
+        self.movies = []
+        self.search_text = text
+        self.date = date
+        self.has_more = True
+        self.endResetModel()
+        self.fetchMore()
+
+    def on_page_loaded(self, movies):
+        self.task = None
+        if movies:
+            first = len(self.movies)
+            self.beginInsertRows(QModelIndex(), first, first + len(movies) - 1)
+            self.movies.extend(movies)
+            self.endInsertRows()
+        # Поиск и афиша на день возвращают весь список сразу
+        self.has_more = self.date is None and not self.search_text and len(movies) == repository.PAGE_SIZE
+        self.loaded.emit()
+
+    def on_failed(self, error):
+        self.task = None
+        self.has_more = False
+        self.failed.emit(error)
+
+
+class MovieCardDelegate(QStyledItemDelegate):
+    """Карточка фильма: постер, название и описание, нарисованные без виджетов.
+
+    У фильма афиши на день вместо описания выводятся времена сеансов.
+    """
+
+    CARD_SIZE = QSize(200, 250)
+    POSTER_SIZE = posters.CARD_SIZE
+    PADDING = 6
+
+    BACKGROUND = QColor('#111')
+    BACKGROUND_HOVER = QColor('#222')
+    PLACEHOLDER = QColor('#1c1c1c')
+    TITLE_COLOR = QColor('#fff')
+    DESCRIPTION_COLOR = QColor('#aaa')
+    TIMES_COLOR = QColor('#FFD700')
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.title_font = QFont('Arial')
+        self.title_font.setPixelSize(14)
+        self.title_font.setWeight(QFont.Weight.DemiBold)
+        self.description_font = QFont('Arial')
+        self.description_font.setPixelSize(13)
+
+    def sizeHint(self, option, index):
+        return self.CARD_SIZE
+
+    def paint(self, painter, option, index):
+        movie = index.data(MovieListModel.MovieRole)
+        if movie is None:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        rect = option.rect
+
+        hovered = option.state & QStyle.StateFlag.State_MouseOver
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.BACKGROUND_HOVER if hovered else self.BACKGROUND)
+        painter.drawRoundedRect(rect, 4, 4)
+
+        # Пока постер читается в фоне, на его месте рисуется заглушка
+        poster_rect = QRect(rect.topLeft(), self.POSTER_SIZE)
+        pixmap = posters.cache.request(movie.poster_path, self.POSTER_SIZE)
+        if pixmap is None or pixmap.isNull():
+            painter.setBrush(self.PLACEHOLDER)
+            painter.drawRect(poster_rect.adjusted(self.PADDING, self.PADDING, -self.PADDING, 0))
+        else:
+            target = QRect(0, 0, pixmap.width(), pixmap.height())
+            target.moveCenter(poster_rect.center())
+            painter.drawPixmap(target, pixmap)
+
+        text_rect = rect.adjusted(self.PADDING, self.POSTER_SIZE.height() + self.PADDING, -self.PADDING, -self.PADDING)
+        painter.setFont(self.title_font)
+        painter.setPen(self.TITLE_COLOR)
+        title = painter.fontMetrics().elidedText(movie.title, Qt.TextElideMode.ElideRight, text_rect.width())
+        title_height = painter.fontMetrics().height()
+        painter.drawText(
+            QRect(text_rect.left(), text_rect.top(), text_rect.width(), title_height),
+            Qt.AlignmentFlag.AlignCenter, title)
+
+        painter.setFont(self.description_font)
+        if isinstance(movie, repository.DayMovie):
+            painter.setPen(self.TIMES_COLOR)
+            text = "  ".join(time[:5] for time in movie.times)
+        else:
+            painter.setPen(self.DESCRIPTION_COLOR)
+            text = movie.description
+        painter.drawText(
+            text_rect.adjusted(0, title_height + self.PADDING, 0, 0),
+            Qt.AlignmentFlag.AlignHCenter.value | Qt.AlignmentFlag.AlignTop.value | Qt.TextFlag.TextWordWrap.value,
+            text)
+        painter.restore()
+
+
+def visible_rows(view):
+    """Первая и последняя видимые строки списка или None.
+
+    Элементы в IconMode идут по строкам сетки слева направо, поэтому
+    видимые строки модели образуют непрерывный отрезок и ищутся бинарным
+    поиском по visualRect без обхода всей модели.
+    """
+    model = view.model()
+    count = model.rowCount() if model is not None else 0
+    if not count:
+        return None
+    height = view.viewport().height()
+
+    def first_where(predicate):
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if predicate(view.visualRect(model.index(middle, 0))):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    first = first_where(lambda rect: rect.bottom() >= 0)
+    last = first_where(lambda rect: rect.top() > height) - 1
+    return (first, last) if first <= last else None
+
+
+def prefetch_posters(view, size, ahead=repository.PAGE_SIZE):
+    """Постеры видимых строк и ahead следующих; загрузка остальных отменяется."""
+    rows = visible_rows(view)
+    if rows is None:
+        return
+    model = view.model()
+    first, last = rows
+    keys = []
+    for row in range(first, min(last + 1 + ahead, model.rowCount())):
+        movie = model.index(row, 0).data(MovieListModel.MovieRole)
+        if row <= last:
+            keys.append(posters.cache.key(movie.poster_path, size))
+        else:
+            keys.append(posters.cache.prefetch(movie.poster_path, size))
+    posters.cache.retain(keys)
+
+
+class TicketListModel(QAbstractListModel):
+    """Билеты пользователя: сначала предстоящие сеансы, прошедшие — по запросу.
+
+    Обе части подгружаются страницами по ключу (дата, время, id).
+    refresh() перечитывает уже загруженный объём и применяет разницу по
+    id билета: строки удаляются, вставляются и обновляются по отдельности.
+    """
+
+    TicketRole = Qt.ItemDataRole.UserRole + 1
+    PastRole = Qt.ItemDataRole.UserRole + 2
+
+    loaded = pyqtSignal()
+    failed = pyqtSignal(object)
+
+    def __init__(self, repo, user_id, parent=None):
+        super().__init__(parent)
+        self.repo = repo
+        self.user_id = user_id
+        self.queries = workers.AsyncQueries(self)
+        self.upcoming = []
+        self.past = []
+        self.more_upcoming = True
+        self.more_past = True
+        self.history = False
+        self.now = repository.current_time()
+        self.task = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.upcoming) + len(self.past)
+
+    def ticket(self, row):
+        upcoming = len(self.upcoming)
+        return self.upcoming[row] if row < upcoming else self.past[row - upcoming]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        ticket = self.ticket(index.row())
+        if role == Qt.ItemDataRole.DisplayRole:
+            return ticket.title
+        if role == self.TicketRole:
+            return ticket
+        if role == self.PastRole:
+            return index.row() >= len(self.upcoming)
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.task is not None:
+            return False
+        return self.more_upcoming or (self.history and self.more_past)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        if self.more_upcoming:
+            after = self._key(self.upcoming[-1]) if self.upcoming else None
+            self.task = self.queries.run(
+                self.repo.upcoming_tickets, self.user_id, self.now, after,
+                on_result=self.on_upcoming_loaded, on_error=self.on_failed)
+        else:
+            before = self._key(self.past[-1]) if self.past else None
+            self.task = self.queries.run(
+                self.repo.past_tickets, self.user_id, self.now, before,
+                on_result=self.on_past_loaded, on_error=self.on_failed)
+
+    def show_history(self):
+        """Разрешает подгрузку прошедших сеансов после предстоящих."""
+        if not self.history:
+            self.history = True
+            self.fetchMore()
+
+    @staticmethod
+    def _key(ticket):
+        return ticket.date, ticket.time, ticket.id
+
+    def _append(self, part, tickets):
+        if not tickets:
+            return
+        first = len(self.upcoming) + len(self.past) if part is self.past else len(self.upcoming)
+        self.beginInsertRows(QModelIndex(), first, first + len(tickets) - 1)
+        part.extend(tickets)
+        self.endInsertRows()
+
+    def on_upcoming_loaded(self, tickets):
+        self.task = None
+        self._append(self.upcoming, tickets)
+        self.more_upcoming = len(tickets) == repository.TICKETS_PAGE_SIZE
+        self.loaded.emit()
+        if not self.more_upcoming and self.history:
+            self.fetchMore()
+
+    def on_past_loaded(self, tickets):
+        self.task = None
+        self._append(self.past, tickets)
+        self.more_past = len(tickets) == repository.TICKETS_PAGE_SIZE
+        self.loaded.emit()
+
+    def on_failed(self, error):
+        self.task = None
+        self.more_upcoming = self.more_past = False
+        self.failed.emit(error)
+
+    def refresh(self):
+        """Перечитывает загруженные билеты и применяет изменения построчно."""
+        self.queries.cancel(self.task)
+        now = repository.current_time()
+        upcoming_limit = max(len(self.upcoming), repository.TICKETS_PAGE_SIZE)
+        past_limit = max(len(self.past), repository.TICKETS_PAGE_SIZE) if self.history else 0
+        self.task = self.queries.run(
+            self._reload, now, upcoming_limit, past_limit,
+            on_result=self.on_refreshed, on_error=self.on_failed)
+
+    def _reload(self, now, upcoming_limit, past_limit):
+        upcoming = self.repo.upcoming_tickets(self.user_id, now, limit=upcoming_limit)
+        past = self.repo.past_tickets(self.user_id, now, limit=past_limit) if past_limit else []
+        return now, upcoming, upcoming_limit, past, past_limit
+
+    def on_refreshed(self, result):
+        self.task = None
+        now, upcoming, upcoming_limit, past, past_limit = result
+        self.now = now
+        # Раздел билета входит в ключ: билет, чей сеанс прошёл, переезжает вниз
+        old = [(False, ticket) for ticket in self.upcoming] + [(True, ticket) for ticket in self.past]
+        new = [(False, ticket) for ticket in upcoming] + [(True, ticket) for ticket in past]
+        self._apply(old, new)
+        self.upcoming, self.past = upcoming, past
+        self.more_upcoming = len(upcoming) == upcoming_limit
+        self.more_past = not self.history or len(past) == past_limit
+        self.loaded.emit()
+
+    def _apply(self, old, new):
+        """Превращает список old в new сигналами удаления, вставки и изменения строк.
+
+        Сначала удаляются билеты, которых больше нет или у которых сменился
+        раздел, дата или время; порядок оставшихся совпадает с new, поэтому
+        дальше достаточно одного прохода слиянием.
+        """
+        def key(entry):
+            past, ticket = entry
+            return past, ticket.date, ticket.time
+
+        new_keys = {entry[1].id: key(entry) for entry in new}
+        current = list(old)
+        for row in range(len(current) - 1, -1, -1):
+            entry = current[row]
+            if new_keys.get(entry[1].id) != key(entry):
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del current[row]
+                self._set_rows(current)
+                self.endRemoveRows()
+
+        for row, entry in enumerate(new):
+            if row < len(current) and current[row][1].id == entry[1].id:
+                if current[row][1] != entry[1]:
+                    current[row] = entry
+                    self._set_rows(current)
+                    index = self.index(row)
+                    self.dataChanged.emit(index, index)
+                continue
+            self.beginInsertRows(QModelIndex(), row, row)
+            current.insert(row, entry)
+            self._set_rows(current)
+            self.endInsertRows()
+
+    def _set_rows(self, entries):
+        self.upcoming = [ticket for past, ticket in entries if not past]
+        self.past = [ticket for past, ticket in entries if past]
+
+
+class TicketDelegate(QStyledItemDelegate):
+    """Билет: фильм, дата, время и зал слева, количество справа."""
+
+    ROW_HEIGHT = 86
+    PADDING = 12
+    MARGIN = 5
+
+    BACKGROUND = QColor('#222')
+    BACKGROUND_PAST = QColor('#3a3a3a')
+    TEXT = QColor('#fff')
+    TEXT_PAST = QColor('#aaa')
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.title_font = QFont('Arial')
+        self.title_font.setPixelSize(16)
+        self.title_font.setWeight(QFont.Weight.Bold)
+        self.info_font = QFont('Arial')
+        self.info_font.setPixelSize(14)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        ticket = index.data(TicketListModel.TicketRole)
+        if ticket is None:
+            return
+        past = index.data(TicketListModel.PastRole)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        rect = option.rect.adjusted(0, self.MARGIN, 0, -self.MARGIN)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.BACKGROUND_PAST if past else self.BACKGROUND)
+        painter.drawRoundedRect(rect, 8, 8)
+
+        content = rect.adjusted(self.PADDING, self.PADDING // 2, -self.PADDING, -self.PADDING // 2)
+        painter.setPen(self.TEXT_PAST if past else self.TEXT)
+        painter.setFont(self.info_font)
+        quantity = f"Билетов: {ticket.quantity}"
+        quantity_width = painter.fontMetrics().horizontalAdvance(quantity)
+        painter.drawText(content, (Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignTop), quantity)
+
+        text_width = content.width() - quantity_width - self.PADDING
+        painter.setFont(self.title_font)
+        title_height = painter.fontMetrics().height()
+        title = painter.fontMetrics().elidedText(ticket.title, Qt.TextElideMode.ElideRight, text_width)
+        painter.drawText(
+            QRect(content.left(), content.top(), text_width, title_height),
+            (Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter), title)
+
+        painter.setFont(self.info_font)
+        line_height = painter.fontMetrics().height()
+        lines = (f"Дата: {ticket.date}   Время: {ticket.time}", f"Зал: {ticket.hall}")
+        top = content.top() + title_height + 2
+        for line in lines:
+            painter.drawText(
+                QRect(content.left(), top, text_width, line_height),
+                (Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter), line)
+            top += line_height
+        painter.restore()
@@ -0,0 +1,104 @@
+"""Выполнение запросов к базе вне потока интерфейса.
+
+Функция запускается в пуле потоков QThreadPool, результат возвращается
+в поток интерфейса через сигналы. Каждый рабочий поток получает своё
+соединение у db.manager, поэтому интерфейс никогда не ждёт SQLite.
+"""
+import threading
+import traceback
+
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+import db
+
+MAX_DB_THREADS = 4
+
+_pool = None
+
+
+def pool() -> QThreadPool:
+    """Пул потоков для работы с базой."""
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(MAX_DB_THREADS)
+    return _pool
+
+
+class QuerySignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+
+
+class QueryTask(QRunnable):
+    """Задача пула: вызывает fn(*args, **kwargs) и сообщает результат сигналом."""
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = QuerySignals()
+        self.cancelled = False
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def run(self):
+        if self.cancelled:
+            return
+        with self._lock:
+            self._conn = db.get_connection()
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            if not self.cancelled:
+                traceback.print_exc()
+                self.signals.failed.emit(e)
+        else:
+            if not self.cancelled:
+                self.signals.finished.emit(result)
+        finally:
+            with self._lock:
+                self._conn = None
+
+    def cancel(self):
+        """Отмена: результат не будет доставлен, выполняющийся запрос прерывается."""
+        self.cancelled = True
+        with self._lock:
+            if self._conn is not None:
+                self._conn.interrupt()
+
+
+class AsyncQueries:
+    """Запросы, принадлежащие виджету: все отменяются вместе с ним."""
+
+    def __init__(self, owner: QObject):
+        self._owner = owner
+        self._tasks = set()
+        owner.destroyed.connect(self.cancel_all)
+
+    def run(self, fn, *args, on_result=None, on_error=None, **kwargs) -> QueryTask:
+        task = QueryTask(fn, *args, **kwargs)
+        task.signals.finished.connect(lambda result: self._deliver(task, on_result, result))
+        task.signals.failed.connect(lambda error: self._deliver(task, on_error, error))
+        self._tasks.add(task)
+        pool().start(task)
+        return task
+
+    def _deliver(self, task, callback, value):
+        # Результат мог прийти в очередь событий уже после отмены задачи
+        self._tasks.discard(task)
+        if task.cancelled or callback is None or sip.isdeleted(self._owner):
+            return
+        callback(value)
+
+    def cancel(self, task):
+        if task is not None:
+            self._tasks.discard(task)
+            task.cancel()
+
+    def cancel_all(self):
+        tasks, self._tasks = self._tasks, set()
+        for task in tasks:
+            task.cancel()